@@ -0,0 +1,397 @@
+"""
+خواندن مستقیم جداول فایل Access (accdb/mdb) بدون ODBC
+فایل به صورت memory-map باز می‌شود و هر جدول صفحه به صفحه (از روی usage map)
+به ستون‌های نوع‌دار pandas تبدیل می‌شود. فقط قالب Jet4 و ACE (Access 2000 به بعد)
+پشتیبانی می‌شود.
+"""
+
+import mmap
+import struct
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Format Constants (Jet4 / ACE)
+# ==============================================================================
+
+PAGE_SIZE = 4096
+VERSION_OFFSET = 0x14
+
+PAGE_DATA = 0x01
+PAGE_TDEF = 0x02
+
+# صفحه تعریف جدول سیستمی MSysObjects
+MSYS_OBJECTS_PAGE = 2
+OBJECT_TYPE_TABLE = 1
+SYSTEM_OBJECT_FLAGS = 0x80000002
+
+# جدول تعریف (tdef)
+TDEF_NEXT_PAGE = 4
+TDEF_NUM_ROWS = 16
+TDEF_NUM_VAR_COLS = 43
+TDEF_NUM_COLS = 45
+TDEF_NUM_REAL_IDX = 51
+TDEF_USAGE_MAP = 55
+TDEF_COLS_START = 63
+REAL_IDX_ENTRY_SIZE = 12
+COL_ENTRY_SIZE = 25
+
+# صفحه داده
+DATA_NUM_ROWS = 12
+DATA_ROW_OFFSETS = 14
+ROW_OFFSET_MASK = 0x1FFF
+ROW_DELETED = 0x8000
+ROW_OVERFLOW = 0x4000
+
+# بیت‌های طول فیلد memo
+LVAL_INLINE = 0x80000000
+LVAL_SINGLE_PAGE = 0x40000000
+LVAL_LENGTH_MASK = 0x3FFFFFFF
+
+# انواع ستون
+COL_BOOL = 1
+COL_BYTE = 2
+COL_INT = 3
+COL_LONG = 4
+COL_MONEY = 5
+COL_FLOAT = 6
+COL_DOUBLE = 7
+COL_DATETIME = 8
+COL_BINARY = 9
+COL_TEXT = 10
+COL_OLE = 11
+COL_MEMO = 12
+COL_GUID = 15
+COL_NUMERIC = 16
+COL_BIGINT = 19
+
+# نوع ستون‌های با طول ثابت -> (قالب struct، dtype نهایی)
+FIXED_FORMATS = {
+    COL_BYTE: ('<B', 'UInt8'),
+    COL_INT: ('<h', 'Int16'),
+    COL_LONG: ('<i', 'Int32'),
+    COL_MONEY: ('<q', 'float64'),
+    COL_FLOAT: ('<f', 'float32'),
+    COL_DOUBLE: ('<d', 'float64'),
+    COL_DATETIME: ('<d', 'datetime64[ns]'),
+    COL_BIGINT: ('<q', 'Int64'),
+}
+
+# مبدأ تاریخ در Access
+ACCESS_EPOCH = pd.Timestamp('1899-12-30')
+
+# ==============================================================================
+# Pages and Rows
+# ==============================================================================
+
+def _page(buf, page_num):
+    start = page_num * PAGE_SIZE
+    return buf[start:start + PAGE_SIZE]
+
+
+def _row_bounds(page, row_num):
+    """محدوده سطر row_num در صفحه و پرچم‌های آن"""
+    raw = struct.unpack_from('<H', page, DATA_ROW_OFFSETS + 2 * row_num)[0]
+    start = raw & ROW_OFFSET_MASK
+    if row_num == 0:
+        end = PAGE_SIZE
+    else:
+        end = struct.unpack_from('<H', page, DATA_ROW_OFFSETS + 2 * (row_num - 1))[0] & ROW_OFFSET_MASK
+    return start, end, raw & (ROW_DELETED | ROW_OVERFLOW)
+
+
+def _read_pointer(data, offset=0):
+    """اشاره‌گر سطر: یک بایت شماره سطر و سه بایت شماره صفحه"""
+    pointer = struct.unpack_from('<I', data, offset)[0]
+    return pointer >> 8, pointer & 0xFF
+
+
+def _row_data(buf, page_num, row_num):
+    page = _page(buf, page_num)
+    start, end, _ = _row_bounds(page, row_num)
+    return page[start:end]
+
+# ==============================================================================
+# Table Definitions
+# ==============================================================================
+
+def _read_tdef(buf, page_num):
+    """خواندن تعریف جدول (ممکن است در چند صفحه پشت سر هم ادامه یابد)"""
+    page = _page(buf, page_num)
+    if page[0] != PAGE_TDEF:
+        raise ValueError(f"Page {page_num} is not a table definition page")
+    tdef = bytearray(page)
+    next_page = struct.unpack_from('<I', page, TDEF_NEXT_PAGE)[0]
+    while next_page:
+        page = _page(buf, next_page)
+        tdef += page[8:]
+        next_page = struct.unpack_from('<I', page, TDEF_NEXT_PAGE)[0]
+    return bytes(tdef)
+
+
+def _parse_columns(tdef):
+    """فهرست ستون‌های جدول به ترتیب شماره ستون"""
+    num_cols = struct.unpack_from('<H', tdef, TDEF_NUM_COLS)[0]
+    num_real_idx = struct.unpack_from('<I', tdef, TDEF_NUM_REAL_IDX)[0]
+    offset = TDEF_COLS_START + num_real_idx * REAL_IDX_ENTRY_SIZE
+
+    columns = []
+    for _ in range(num_cols):
+        col_type = tdef[offset]
+        columns.append({
+            'type': col_type,
+            'col_num': struct.unpack_from('<H', tdef, offset + 5)[0],
+            'var_index': struct.unpack_from('<H', tdef, offset + 7)[0],
+            'fixed': bool(tdef[offset + 15] & 0x01),
+            'fixed_offset': struct.unpack_from('<H', tdef, offset + 21)[0],
+            'length': struct.unpack_from('<H', tdef, offset + 23)[0],
+        })
+        offset += COL_ENTRY_SIZE
+
+    for col in columns:
+        name_len = struct.unpack_from('<H', tdef, offset)[0]
+        col['name'] = tdef[offset + 2:offset + 2 + name_len].decode('utf-16-le')
+        offset += 2 + name_len
+
+    return sorted(columns, key=lambda col: col['col_num'])
+
+
+def _usage_map_pages(buf, tdef):
+    """صفحه‌های داده جدول از روی usage map (نوع ۰: بیت‌مپ درون‌خطی، نوع ۱: صفحه‌های بیت‌مپ)"""
+    page_num, row_num = _read_pointer(tdef, TDEF_USAGE_MAP)
+    usage_map = _row_data(buf, page_num, row_num)
+
+    if usage_map[0] == 0:
+        start_page = struct.unpack_from('<I', usage_map, 1)[0]
+        bits = np.unpackbits(np.frombuffer(usage_map[5:], dtype=np.uint8), bitorder='little')
+        return (start_page + np.flatnonzero(bits)).tolist()
+
+    pages = []
+    pages_per_map = (PAGE_SIZE - 4) * 8
+    for i in range((len(usage_map) - 1) // 4):
+        map_page = struct.unpack_from('<I', usage_map, 1 + 4 * i)[0]
+        if not map_page:
+            continue
+        bits = np.unpackbits(np.frombuffer(_page(buf, map_page)[4:], dtype=np.uint8), bitorder='little')
+        pages += (i * pages_per_map + np.flatnonzero(bits)).tolist()
+    return pages
+
+# ==============================================================================
+# Values
+# ==============================================================================
+
+def _decode_text(data):
+    """متن Jet4: UTF-16LE، یا در حالت فشرده (با پیشوند FF FE) ترکیبی از بخش‌های تک‌بایتی و دوبایتی"""
+    if data[:2] != b'\xff\xfe':
+        return data.decode('utf-16-le', errors='replace')
+
+    parts = []
+    compressed = True
+    pos = 2
+    while pos < len(data):
+        if compressed:
+            end = data.find(b'\x00', pos)
+            end = len(data) if end < 0 else end
+            parts.append(data[pos:end].decode('latin-1'))
+            pos = end + 1
+        else:
+            end = pos
+            while end + 1 < len(data) and data[end:end + 2] != b'\x00\x00':
+                end += 2
+            parts.append(data[pos:end].decode('utf-16-le', errors='replace'))
+            pos = end + 1
+        compressed = not compressed
+    return ''.join(parts)
+
+
+def _read_memo(buf, data):
+    """خواندن فیلد memo/OLE: درون‌خطی، یک صفحه LVAL یا زنجیره‌ای از صفحه‌های LVAL"""
+    header = struct.unpack_from('<I', data, 0)[0]
+    length = header & LVAL_LENGTH_MASK
+    if header & LVAL_INLINE:
+        return bytes(data[12:12 + length])
+
+    page_num, row_num = _read_pointer(data, 4)
+    if header & LVAL_SINGLE_PAGE:
+        return bytes(_row_data(buf, page_num, row_num)[:length])
+
+    chunks = []
+    remaining = length
+    while page_num and remaining > 0:
+        row = _row_data(buf, page_num, row_num)
+        chunks.append(bytes(row[4:4 + remaining]))
+        remaining -= len(row) - 4
+        page_num, row_num = _read_pointer(row, 0)
+    return b''.join(chunks)
+
+
+def _parse_value(buf, col, data):
+    col_type = col['type']
+    if col_type in FIXED_FORMATS:
+        return struct.unpack_from(FIXED_FORMATS[col_type][0], data)[0]
+    if col_type == COL_TEXT:
+        return _decode_text(bytes(data))
+    if col_type == COL_MEMO:
+        return _decode_text(_read_memo(buf, data))
+    if col_type == COL_OLE:
+        return _read_memo(buf, data)
+    if col_type == COL_GUID:
+        return '{%s}' % bytes(data[:16]).hex().upper()
+    # BINARY، NUMERIC و انواع دیگر به صورت بایت خام
+    return bytes(data)
+
+# ==============================================================================
+# Row Cracking
+# ==============================================================================
+
+def _crack_row(buf, columns, row):
+    """تبدیل یک سطر Jet4 به فهرست مقادیر (None برای مقدار خالی)"""
+    row_cols = struct.unpack_from('<H', row, 0)[0]
+    null_mask_size = (row_cols + 7) // 8
+    null_mask = row[len(row) - null_mask_size:]
+    var_end = len(row) - null_mask_size
+
+    num_var = struct.unpack_from('<H', row, var_end - 2)[0]
+    var_offsets = [struct.unpack_from('<H', row, var_end - 4 - 2 * i)[0] for i in range(num_var + 1)]
+
+    values = []
+    for col in columns:
+        col_num = col['col_num']
+        present = col_num < row_cols and null_mask[col_num // 8] & (1 << (col_num % 8))
+
+        if col['type'] == COL_BOOL:
+            values.append(bool(present))
+            continue
+        if not present:
+            values.append(None)
+            continue
+
+        if col['fixed']:
+            start = 2 + col['fixed_offset']
+            data = row[start:start + col['length']]
+        elif col['var_index'] < num_var:
+            data = row[var_offsets[col['var_index']]:var_offsets[col['var_index'] + 1]]
+        else:
+            values.append(None)
+            continue
+        values.append(_parse_value(buf, col, data))
+    return values
+
+
+def _iter_page_rows(buf, columns, page_num):
+    """سطرهای زنده یک صفحه داده (با دنبال کردن سطرهای overflow)"""
+    page = _page(buf, page_num)
+    num_rows = struct.unpack_from('<H', page, DATA_NUM_ROWS)[0]
+    for row_num in range(num_rows):
+        start, end, flags = _row_bounds(page, row_num)
+        if flags & ROW_DELETED:
+            continue
+        row = page[start:end]
+        if flags & ROW_OVERFLOW:
+            row = _row_data(buf, *_read_pointer(row, 0))
+        yield _crack_row(buf, columns, row)
+
+# ==============================================================================
+# Columnar Conversion
+# ==============================================================================
+
+def _to_array(col, values):
+    """تبدیل مقادیر یک ستون به آرایه نوع‌دار pandas"""
+    col_type = col['type']
+    if col_type == COL_BOOL:
+        return np.array(values, dtype=bool)
+    if col_type == COL_DATETIME:
+        days = np.array([np.nan if v is None else v for v in values], dtype=float)
+        return ACCESS_EPOCH + pd.to_timedelta(days, unit='D')
+    if col_type == COL_MONEY:
+        return np.array([np.nan if v is None else v / 10000 for v in values], dtype=float)
+    if col_type in FIXED_FORMATS:
+        dtype = FIXED_FORMATS[col_type][1]
+        if dtype.startswith(('Int', 'UInt')):
+            return pd.array(values, dtype=dtype)
+        return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+    # متن: مقدار خالی مانند read_excel برابر NaN است
+    return np.array([np.nan if v is None else v for v in values], dtype=object)
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+
+def open_database(path):
+    """باز کردن فایل Access به صورت memory-map"""
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buf[VERSION_OFFSET] == 0:
+        buf.close()
+        raise ValueError(f"{path}: Jet3 (Access 97) files are not supported")
+    return buf
+
+
+def list_tables(path):
+    """نام جداول کاربر -> صفحه تعریف جدول"""
+    tables = {}
+    for chunk in iter_table_pages(path, 'MSysObjects', columns=['Id', 'Name', 'Type', 'Flags'],
+                                  _tdef_page=MSYS_OBJECTS_PAGE):
+        user_tables = chunk[(chunk['Type'] == OBJECT_TYPE_TABLE)
+                            & ((chunk['Flags'].astype('int64') & SYSTEM_OBJECT_FLAGS) == 0)]
+        for object_id, name in zip(user_tables['Id'], user_tables['Name']):
+            tables[name] = int(object_id) & 0x00FFFFFF
+    return tables
+
+
+def table_columns(path, table):
+    """نام و نوع ستون‌های یک جدول"""
+    buf = open_database(path)
+    try:
+        tdef = _read_tdef(buf, list_tables(path)[table])
+        return [(col['name'], col['type']) for col in _parse_columns(tdef)]
+    finally:
+        buf.close()
+
+
+def iter_table_pages(path, table, columns=None, _tdef_page=None):
+    """
+    خواندن جریانی یک جدول؛ برای هر صفحه داده یک DataFrame کوچک برمی‌گرداند
+
+    با columns فقط ستون‌های خواسته‌شده تبدیل می‌شوند.
+    """
+    tdef_page = _tdef_page if _tdef_page is not None else list_tables(path)[table]
+    buf = open_database(path)
+    try:
+        tdef = _read_tdef(buf, tdef_page)
+        all_columns = _parse_columns(tdef)
+        if columns is None:
+            selected = all_columns
+        else:
+            by_name = {col['name']: col for col in all_columns}
+            missing = [name for name in columns if name not in by_name]
+            if missing:
+                raise KeyError(f"{table}: unknown columns {missing}")
+            selected = [by_name[name] for name in columns]
+
+        for page_num in _usage_map_pages(buf, tdef):
+            page = _page(buf, page_num)
+            if page[0] != PAGE_DATA or struct.unpack_from('<I', page, 4)[0] != tdef_page:
+                continue
+            rows = list(_iter_page_rows(buf, selected, page_num))
+            if not rows:
+                continue
+            values = list(zip(*rows))
+            yield pd.DataFrame({col['name']: _to_array(col, list(vals))
+                                for col, vals in zip(selected, values)})
+    finally:
+        buf.close()
+
+
+def read_access_table(path, table, columns=None):
+    """خواندن کامل یک جدول Access به DataFrame"""
+    chunks = list(iter_table_pages(path, table, columns))
+    if not chunks:
+        buf = open_database(path)
+        try:
+            names = [col['name'] for col in _parse_columns(_read_tdef(buf, list_tables(path)[table]))]
+        finally:
+            buf.close()
+        return pd.DataFrame(columns=columns if columns is not None else names)
+    return pd.concat(chunks, ignore_index=True)
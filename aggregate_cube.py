@@ -0,0 +1,330 @@
+"""
+مکعب تجمیع مشترک همه فصل‌ها
+قراردادها و پرداخت‌ها هر کدام یک بار به تفکیک (مشمول، دستگاه، دانشگاه، استان)
+تجمیع می‌شوند و جداول خلاصه فصل‌ها از برش و جمع همین مکعب ساخته می‌شوند.
+کلیدها کدهای Categorical و مبالغ اعداد صحیح ثابت‌ممیز طرح داده credit_schema هستند؛
+برش‌ها مبالغ را پس از جمع به میلیون ریال برمی‌گردانند.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from credit_schema import PROVINCE_DTYPE, encode_tables, to_million
+from histograms import fixed_histogram, merge_histograms, subtract_histogram
+from province_resolver import (MAIN_PROVINCES, PROVINCE_KEYWORDS, extract_province,
+                               tag_provinces)
+from quantile_sketch import (merge_sketches, sketch_from_frame, sketch_of, sketch_to_frame)
+from snapshot_diff import apply_delta, delta_rows, diff_counts, diff_snapshots
+
+# نسخه منطق مکعب؛ با هر تغییر در ساخت مکعب افزایش یابد تا کش قدیمی استفاده نشود
+CUBE_VERSION = 4
+
+SUBJECT = 'نام مشمول'
+DEVICE = 'دستگاه اجرایی مرتبط'
+UNIVERSITY = 'دانشگاه'
+PROVINCE = 'استان'
+CREDIT = 'اعتبار سال 1404'
+CONTRACT_AMOUNT = 'مجموع مبالغ قراردادها'
+PAYMENT_AMOUNT = 'مجموع مبالغ پرداختی'
+
+CUBE_KEYS = [SUBJECT, DEVICE, UNIVERSITY, PROVINCE]
+
+# ستون‌های اندازه در هر خانه مکعب
+CONTRACT_SUM = 'مبلغ قرارداد'
+CONTRACT_ROWS = 'تعداد سطر قرارداد'
+PAYMENT_SUM = 'مبلغ پرداخت'
+PAYMENT_ROWS = 'تعداد سطر پرداخت'
+
+# بخش مکعب که خلاصه چندکی مبالغ قراردادها (میلیون ریال، در سطح قرارداد) را نگه می‌دارد
+CONTRACT_SKETCH = 'contract_sketch'
+
+# بخش‌های مکعب که هیستوگرام‌های نمودارهای توزیع (میلیارد ریال) را نگه می‌دارند
+CREDIT_HISTOGRAM = 'credit_histogram'                            # اعتبار مشمولین (نمودار 1-2)
+SUBJECT_CONTRACT_HISTOGRAM = 'subject_contract_histogram'        # مبلغ قرارداد مشمولین (2-2)
+UNIVERSITY_CONTRACT_HISTOGRAM = 'university_contract_histogram'  # مبلغ قرارداد دانشگاه‌ها (3-2)
+UNIVERSITY_AVERAGE_HISTOGRAM = 'university_average_histogram'    # میانگین قرارداد دانشگاه‌ها (3-9)
+
+# عرض بازه‌های شبکه ثابت هر هیستوگرام (میلیارد ریال)
+HISTOGRAM_WIDTHS = {
+    CREDIT_HISTOGRAM: 100,
+    SUBJECT_CONTRACT_HISTOGRAM: 5,
+    UNIVERSITY_CONTRACT_HISTOGRAM: 2.5,
+    UNIVERSITY_AVERAGE_HISTOGRAM: 2.5,
+}
+
+CUBE_PARTS = ('cells', 'subjects', CONTRACT_SKETCH, *HISTOGRAM_WIDTHS)
+
+# ==============================================================================
+# Building
+# ==============================================================================
+
+def cube_version():
+    """شناسه منطق مکعب: نسخه کد، جدول کلمات کلیدی استان‌ها و شبکه هیستوگرام‌ها"""
+    digest = hashlib.sha256(repr((CUBE_VERSION, PROVINCE_KEYWORDS, MAIN_PROVINCES,
+                                  HISTOGRAM_WIDTHS)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _keyed(df, amount_column):
+    """ستون‌های کلید مکعب (با استان تشخیص داده‌شده از نام دانشگاه) و ستون مبلغ"""
+    provinces = tag_provinces(df[UNIVERSITY], extract_province).astype(PROVINCE_DTYPE)
+    return df[[SUBJECT, DEVICE, UNIVERSITY, amount_column]].assign(**{PROVINCE: provinces})
+
+
+def _measures(amount_column, sum_column, rows_column):
+    return {sum_column: (amount_column, 'sum'), rows_column: (amount_column, 'size')}
+
+
+# اندازه‌های هر جدول در مکعب
+CONTRACT_MEASURES = _measures(CONTRACT_AMOUNT, CONTRACT_SUM, CONTRACT_ROWS)
+PAYMENT_MEASURES = _measures(PAYMENT_AMOUNT, PAYMENT_SUM, PAYMENT_ROWS)
+
+
+def _aggregate(df, amount_column, measures):
+    """یک گذر روی جدول: مجموع مبلغ و تعداد سطر برای هر ترکیب کلیدها (مقادیر خالی هم کلید هستند)"""
+    return _keyed(df, amount_column).groupby(CUBE_KEYS, dropna=False, sort=False,
+                                             observed=True).agg(**measures)
+
+
+def _combine(contracts, payments):
+    """ادغام خانه‌های قراردادها و پرداخت‌ها (اندازه‌های جدول غایب صفر می‌شوند)"""
+    cells = contracts.join(payments, how='outer', sort=False).reset_index()
+    for col in (CONTRACT_SUM, PAYMENT_SUM):
+        cells[col] = cells[col].fillna(0)
+    for col in (CONTRACT_ROWS, PAYMENT_ROWS):
+        cells[col] = cells[col].fillna(0).astype('int64')
+    return cells
+
+
+def _subjects(df_contracts):
+    return df_contracts.groupby(SUBJECT, observed=True).agg({CREDIT: 'first', DEVICE: 'first'}).reset_index()
+
+
+def _contract_sketch(df_contracts):
+    return sketch_to_frame(sketch_of(to_million(df_contracts[CONTRACT_AMOUNT])))
+
+
+def _credit_values(cube):
+    """اعتبار مشمولین بیش از 100 میلیون ریال (میلیارد ریال)"""
+    credits = subject_totals(cube)[0]['اعتبار']
+    return credits[credits > 100] / 1000
+
+
+def _subject_contract_values(cube):
+    """مبلغ قرارداد مشمولین دارای قرارداد (میلیارد ریال)"""
+    amounts = subject_totals(cube)[0]['مبلغ قرارداد']
+    return amounts[amounts > 0] / 1000
+
+
+def _university_contract_values(cube):
+    """مبلغ قرارداد دانشگاه‌های دارای قرارداد (میلیارد ریال)"""
+    amounts = university_totals(cube)[0]['مبلغ قرارداد']
+    return amounts[amounts > 0] / 1000
+
+
+def _university_average_values(cube):
+    """میانگین مبلغ قرارداد دانشگاه‌ها (میلیارد ریال)"""
+    uni_contracts = university_totals(cube)[0]
+    averages = uni_contracts['مبلغ قرارداد'] / uni_contracts['تعداد قرارداد']
+    return averages[np.isfinite(averages) & (averages > 0)] / 1000
+
+
+# هیستوگرام -> (مقادیر از مکعب، ستون کلید موجودیت‌ها)
+HISTOGRAM_VALUES = {
+    CREDIT_HISTOGRAM: (_credit_values, SUBJECT),
+    SUBJECT_CONTRACT_HISTOGRAM: (_subject_contract_values, SUBJECT),
+    UNIVERSITY_CONTRACT_HISTOGRAM: (_university_contract_values, UNIVERSITY),
+    UNIVERSITY_AVERAGE_HISTOGRAM: (_university_average_values, UNIVERSITY),
+}
+
+
+def _histogram(cube, name):
+    values, _ = HISTOGRAM_VALUES[name]
+    return fixed_histogram(values(cube), HISTOGRAM_WIDTHS[name])
+
+
+def _restrict(cube, column, keys):
+    """مکعب محدود به موجودیت‌های keys (مشمول یا دانشگاه)"""
+    restricted = {'cells': cube['cells'][cube['cells'][column].isin(keys)], 'subjects': cube['subjects']}
+    if column == SUBJECT:
+        restricted['subjects'] = cube['subjects'][cube['subjects'][SUBJECT].isin(keys)]
+    return restricted
+
+
+def _update_histograms(old_cube, new_cube, added, removed):
+    """
+    به‌روزرسانی هیستوگرام‌های قراردادها با سطرهای تغییر یافته
+
+    فقط مشمولین یا دانشگاه‌هایی که سطری از آن‌ها درج یا حذف شده دوباره شمرده
+    می‌شوند: شمارش مقدار قبلی آن‌ها کم و شمارش مقدار جدیدشان اضافه می‌شود.
+    هیستوگرام اعتبار مانند ویژگی‌های مشمولین از مکعب جدید دوباره ساخته می‌شود.
+    """
+    histograms = {CREDIT_HISTOGRAM: _histogram(new_cube, CREDIT_HISTOGRAM)}
+    for name, (values, column) in HISTOGRAM_VALUES.items():
+        if name in histograms:
+            continue
+        if name not in old_cube:
+            histograms[name] = _histogram(new_cube, name)
+            continue
+        keys = pd.unique(pd.concat([added[column], removed[column]]).astype(object))
+        width = HISTOGRAM_WIDTHS[name]
+        before = fixed_histogram(values(_restrict(old_cube, column, keys)), width)
+        after = fixed_histogram(values(_restrict(new_cube, column, keys)), width)
+        histograms[name] = merge_histograms(subtract_histogram(old_cube[name], before), after)
+    return histograms
+
+
+def build_cube(df_contracts, df_payments):
+    """
+    ساخت مکعب تجمیع
+
+    cells: یک سطر برای هر (مشمول، دستگاه، دانشگاه، استان) با مجموع و تعداد سطر
+    قراردادها و پرداخت‌ها. subjects: ویژگی‌های هر مشمول (اولین اعتبار و اولین
+    دستگاه غیر خالی، مانند groupby(...).first()) به ترتیب نام. CONTRACT_SKETCH:
+    خلاصه چندکی مبالغ قراردادها (جدول quantile_sketch.sketch_to_frame).
+    HISTOGRAM_WIDTHS: هیستوگرام‌های نمودارهای توزیع روی شبکه ثابت
+    (histograms.fixed_histogram) که از همین خانه‌ها شمرده می‌شوند.
+    جداول در صورت نیاز با encode_tables رمزگذاری می‌شوند.
+    """
+    df_contracts, df_payments = encode_tables(df_contracts, df_payments)
+    contracts = _aggregate(df_contracts, CONTRACT_AMOUNT, CONTRACT_MEASURES)
+    payments = _aggregate(df_payments, PAYMENT_AMOUNT, PAYMENT_MEASURES)
+    cube = {'cells': _combine(contracts, payments), 'subjects': _subjects(df_contracts),
+            CONTRACT_SKETCH: _contract_sketch(df_contracts)}
+    for name in HISTOGRAM_WIDTHS:
+        cube[name] = _histogram(cube, name)
+    return cube
+
+
+def update_cube(cube, old_tables, new_tables):
+    """
+    به‌روزرسانی افزایشی مکعب از برداشت قبلی (old_tables) به برداشت جدید (new_tables)
+
+    هر جدول (قراردادها، پرداخت‌ها) با برداشت قبلی خود به صورت سطر به سطر مقایسه
+    می‌شود و فقط سطرهای درج یا حذف شده به خانه‌های مکعب اضافه یا از آن کم می‌شوند.
+    ویژگی‌های مشمولین (first) قابل تفریق نیستند و از جدول جدید دوباره محاسبه می‌شوند.
+    خلاصه چندکی با خلاصه سطرهای درج‌شده ادغام می‌شود، مگر این‌که سطری حذف یا
+    تغییر کرده باشد (حذف از خلاصه ممکن نیست) که در آن صورت دوباره ساخته می‌شود.
+    هیستوگرام‌ها با کم و اضافه کردن شمارش موجودیت‌های تغییر یافته به‌روز می‌شوند.
+    خروجی: (مکعب جدید، تعداد تغییرات هر جدول)
+    """
+    new_contracts, new_payments = encode_tables(*new_tables)
+    cells = cube['cells']
+
+    parts = []
+    changes = {}
+    for name, old, new, amount_column, measures in (
+            ('contracts', old_tables[0], new_contracts, CONTRACT_AMOUNT, CONTRACT_MEASURES),
+            ('payments', old_tables[1], new_payments, PAYMENT_AMOUNT, PAYMENT_MEASURES)):
+        columns = [SUBJECT, DEVICE, UNIVERSITY, amount_column]
+        diff = diff_snapshots(old[columns], new[columns])
+        changes[name] = diff_counts(diff)
+        added, removed = delta_rows(diff)
+
+        rows_column = list(measures)[1]
+        current = cells.loc[cells[rows_column] > 0, CUBE_KEYS + list(measures)]
+        updated = apply_delta(current, _keyed(added, amount_column), _keyed(removed, amount_column),
+                              CUBE_KEYS, measures)
+        # کلیدها با فرهنگ لغت جدول‌های جدید دوباره رمزگذاری می‌شوند
+        for col in (SUBJECT, DEVICE, UNIVERSITY):
+            updated[col] = updated[col].astype(new_contracts[col].dtype)
+        updated[PROVINCE] = updated[PROVINCE].astype(PROVINCE_DTYPE)
+        parts.append(updated.set_index(CUBE_KEYS))
+        if name == 'contracts':
+            contracts_added, contracts_removed = added, removed
+
+    if len(contracts_removed) or CONTRACT_SKETCH not in cube:
+        sketch = _contract_sketch(new_contracts)
+    else:
+        sketch = sketch_to_frame(merge_sketches(
+            sketch_from_frame(cube[CONTRACT_SKETCH]),
+            sketch_of(to_million(contracts_added[CONTRACT_AMOUNT]))))
+
+    new_cube = {'cells': _combine(*parts), 'subjects': _subjects(new_contracts),
+                CONTRACT_SKETCH: sketch}
+    new_cube.update(_update_histograms(cube, new_cube, contracts_added, contracts_removed))
+    return new_cube, changes
+
+# ==============================================================================
+# Slicing
+# ==============================================================================
+
+def contract_sketch(cube):
+    """خلاصه چندکی مبالغ قراردادها (میلیون ریال)"""
+    return sketch_from_frame(cube[CONTRACT_SKETCH])
+
+
+def contract_cells(cube):
+    cells = cube['cells']
+    return cells[cells[CONTRACT_ROWS] > 0]
+
+
+def payment_cells(cube):
+    cells = cube['cells']
+    return cells[cells[PAYMENT_ROWS] > 0]
+
+
+def subject_totals(cube):
+    """
+    خلاصه مشمولین (همان ستون‌ها و ترتیب groupby روی جدول قراردادها):
+    اعتبار، دستگاه، مبلغ قرارداد، تعداد قرارداد (سطرهای دارای دانشگاه) و مبلغ پرداخت
+    """
+    contracts = contract_cells(cube)
+    by_subject = contracts.assign(
+        **{'تعداد قرارداد': np.where(contracts[UNIVERSITY].notna(), contracts[CONTRACT_ROWS], 0)}
+    ).groupby(SUBJECT, observed=True).agg({CONTRACT_SUM: 'sum', 'تعداد قرارداد': 'sum'}).reset_index()
+    by_subject[CONTRACT_SUM] = to_million(by_subject[CONTRACT_SUM])
+
+    summary = cube['subjects'].merge(by_subject, on=SUBJECT, how='left')
+    summary[CREDIT] = to_million(summary[CREDIT])
+    summary.columns = ['نام مشمول', 'اعتبار', 'دستگاه', 'مبلغ قرارداد', 'تعداد قرارداد']
+
+    payments_summary = payment_cells(cube).groupby(SUBJECT, observed=True)[PAYMENT_SUM].sum().reset_index()
+    payments_summary[PAYMENT_SUM] = to_million(payments_summary[PAYMENT_SUM])
+    payments_summary.columns = ['نام مشمول', 'مبلغ پرداخت']
+    return summary, payments_summary
+
+
+def university_totals(cube):
+    """
+    جمع قراردادها و پرداخت‌ها به تفکیک دانشگاه
+
+    قراردادها: مبلغ، تعداد قرارداد و تعداد دستگاه؛ پرداخت‌ها: مبلغ و تعداد پرداخت؛
+    و تعداد مشمول یکتا. تعدادها فقط سطرهای دارای نام مشمول را می‌شمارند.
+    """
+    contracts = contract_cells(cube)
+    uni_contracts = contracts.assign(
+        **{'تعداد قرارداد': np.where(contracts[SUBJECT].notna(), contracts[CONTRACT_ROWS], 0)}
+    ).groupby(UNIVERSITY, observed=True).agg({
+        CONTRACT_SUM: 'sum',
+        'تعداد قرارداد': 'sum',
+        DEVICE: 'nunique'
+    }).reset_index()
+    uni_contracts[CONTRACT_SUM] = to_million(uni_contracts[CONTRACT_SUM])
+    uni_contracts.columns = ['دانشگاه', 'مبلغ قرارداد', 'تعداد قرارداد', 'تعداد دستگاه']
+
+    payments = payment_cells(cube)
+    uni_payments = payments.assign(
+        **{'تعداد پرداخت': np.where(payments[SUBJECT].notna(), payments[PAYMENT_ROWS], 0)}
+    ).groupby(UNIVERSITY, observed=True).agg({PAYMENT_SUM: 'sum', 'تعداد پرداخت': 'sum'}).reset_index()
+    uni_payments[PAYMENT_SUM] = to_million(uni_payments[PAYMENT_SUM])
+    uni_payments.columns = ['دانشگاه', 'مبلغ پرداخت', 'تعداد پرداخت']
+
+    uni_subjects = contracts.groupby(UNIVERSITY, observed=True)[SUBJECT].nunique().reset_index()
+    uni_subjects.columns = ['دانشگاه', 'تعداد مشمول']
+
+    return uni_contracts, uni_payments, uni_subjects
+
+
+def province_totals(cube):
+    """جمع قراردادها و پرداخت‌ها به تفکیک استان (سطرهای بدون دانشگاه در 'نامشخص')"""
+    return (to_million(contract_cells(cube).groupby(PROVINCE, observed=True)[CONTRACT_SUM].sum()),
+            to_million(payment_cells(cube).groupby(PROVINCE, observed=True)[PAYMENT_SUM].sum()))
+
+
+def totals(cube):
+    """جمع کل قراردادها و پرداخت‌ها (میلیون ریال)"""
+    cells = cube['cells']
+    return to_million(cells[CONTRACT_SUM].sum()), to_million(cells[PAYMENT_SUM].sum())
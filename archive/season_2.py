@@ -5,11 +5,14 @@ Season 2 Visualizations Generator
 Chapter 2: Analysis of Mandatory Research Credits (1398-1404)
 
 This script generates 13 professional visualizations for Season 2 based on 
-"data/Research-Credibility.xlsx" data file.
+the multi-year credit series loaded by credit_series.load_credit_series.
 
 Output Directory: fig/s2/
 Files Generated: chart_2_1.png through chart_2_13.png
 
+Run from the repository root (uses credit_series.py from there):
+python -m archive.season_2
+
 Requirements:
 - matplotlib
 - pandas
@@ -39,6 +42,10 @@ from matplotlib.colors import LinearSegmentedColormap
 import matplotlib.gridspec as gridspec
 warnings.filterwarnings('ignore')
 
+# سری زمانی بلند (نهاد، سال، مبلغ) از ماژول credit_series ریشه مخزن
+from credit_series import (CREDIBILITY_PATH, ENTITY_COLUMN, YEARS, build_credit_series, entity_trends,
+                           growth_rates, load_credit_series, long_credits, top_entities, year_amounts)
+
 # FONT SIZE CONSTANTS - Easy to adjust for all charts
 TITLE_SIZE = 20      # Chart titles
 LABEL_SIZE = 16      # Axis labels  
@@ -83,73 +90,26 @@ def ptext(text):
         return str(text)
 
 def load_and_process_data():
-    """Load and process data from Excel file"""
-    print("Loading data from data/Research-Credibility.xlsx...")
+    """Load the multi-year credit series (long format, through the Feather cache)"""
+    print(f"Loading data from {CREDIBILITY_PATH}...")
     
     try:
-        # Load Excel file from data folder
-        df = pd.read_excel('data/Research-Credibility.xlsx', 
-                          sheet_name='هزینه پژوهشی (میلیون)')
-        print(f"* Data loaded successfully. Shape: {df.shape}")
-        
-        # FIXED: Use correct column names from Excel
-        column_mapping = {
-            'شماره طبقه بندی': 'classification_num',
-            'نام مشمول': 'entity_name',
-            'عنوان امور': 'affairs_title',
-            'دستگاه اجرایی مرتبط': 'executive_org',
-            # CORRECTED: Each year has a separate column
-            'اعتبار 40% سال 1398': 'credit_1398',
-            'اعتبار 40% سال 1399': 'credit_1399',
-            'اعتبار 40% سال 1400': 'credit_1400',
-            'اعتبار 40% سال 1401': 'credit_1401',
-            'اعتبار 60% سال 1402': 'credit_1402',
-            'اعتبار 60% سال 1404': 'credit_1404'
-        }
-        
-        # Create clean dataframe
-        df_clean = df.copy()
-        
-        # Rename columns
-        for persian_col, english_col in column_mapping.items():
-            if persian_col in df.columns:
-                df_clean[english_col] = df[persian_col]
-        
-        # Convert credit columns to numeric
-        credit_cols = ['credit_1398', 'credit_1399', 'credit_1400', 
-                      'credit_1401', 'credit_1402', 'credit_1404']
-        
-        for col in credit_cols:
-            if col in df_clean.columns:
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
-        
-        # Year 1403 has no data (article removed)
-        df_clean['credit_1403'] = 0
-        
-        # Verification: Print totals to confirm correct loading
-        print("\n* Data Verification (billion Rials):")
-        print("-" * 60)
-        for year in ['1398', '1399', '1400', '1401', '1402', '1404']:
-            col = f'credit_{year}'
-            if col in df_clean.columns:
-                total = df_clean[col].sum() / 1000  # Convert to billion
-                print(f"   Year {year}: {total:>10,.2f} billion Rials")
-        print("-" * 60)
-        
-        print("* Data processing completed successfully\n")
-        return df_clean
-        
+        series = load_credit_series(CREDIBILITY_PATH)
+        print(f"* Data loaded successfully. Entities: {len(series['matrix'])}")
     except FileNotFoundError:
-        print("Error: data/Research-Credibility.xlsx not found!")
-        print("   Please ensure the file is in the data folder")
-        print("   Or update the file path in the code")
-        return create_sample_data()
-    
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        import traceback
-        traceback.print_exc()
-        return create_sample_data()
+        print(f"Error: {CREDIBILITY_PATH} not found!")
+        print("   Using sample data for demonstration")
+        series = build_credit_series(long_credits(create_sample_data()))
+    
+    # Verification: Print totals to confirm correct loading
+    print("\n* Data Verification (billion Rials):")
+    print("-" * 60)
+    for year, total in series['totals'].items():
+        print(f"   Year {year}: {total / 1000:>10,.2f} billion Rials")
+    print("-" * 60)
+    
+    print("* Data processing completed successfully\n")
+    return series
 
 def create_sample_data():
     """Create sample data for demonstration if Excel file is not available"""
@@ -168,48 +128,31 @@ def create_sample_data():
     base_credits_1402 = np.random.exponential(200, n_entities) * 1.5  # 60% rate increase
     base_credits_1404 = base_credits_1402 * np.random.uniform(0.8, 1.3, n_entities)  # Some variation
     
+    # Same columns as Research_Credibility.xlsx (no column for 1403)
     df_sample = pd.DataFrame({
-        'classification_num': range(1, n_entities + 1),
-        'entity_name': entity_names,
-        'affairs_title': [f'امور شماره {i+1}' for i in range(n_entities)],
-        'executive_org': np.random.choice(organizations, n_entities),
-        'credit_1398_1401': base_credits_1398_1401,
-        'credit_1402': base_credits_1402,
-        'credit_1404': base_credits_1404,
-        'credit_1398': base_credits_1398_1401 / 4,
-        'credit_1399': base_credits_1398_1401 / 4,
-        'credit_1400': base_credits_1398_1401 / 4,
-        'credit_1401': base_credits_1398_1401 / 4,
-        'credit_1403': 0  # No data for 1403
+        'شماره طبقه بندی': range(1, n_entities + 1),
+        'نام مشمول': entity_names,
+        'عنوان امور': [f'امور شماره {i+1}' for i in range(n_entities)],
+        ENTITY_COLUMN: np.random.choice(organizations, n_entities),
+        'اعتبار سال 1398': base_credits_1398_1401 / 4,
+        'اعتبار سال 1399': base_credits_1398_1401 / 4,
+        'اعتبار سال 1400': base_credits_1398_1401 / 4,
+        'اعتبار سال 1401': base_credits_1398_1401 / 4,
+        'اعتبار سال 1402': base_credits_1402,
+        'اعتبار سال 1404': base_credits_1404,
     })
     
     print("Sample data created successfully")
     return df_sample
 
-def chart_2_1_area_trend(df, font_prop):
+def chart_2_1_area_trend(series, font_prop):
     """Chart 2-1: Area Chart - Total Credits Trend (1398-1404)"""
     print("Generating Chart 2-1: Area Chart - Total Credits Trend...")
     
-    # Calculate yearly totals (convert to billion Rials)
-    years = ['1398', '1399', '1400', '1401', '1402', '1403', '1404']
-    totals = []
-    
-    for year in years:
-        col = f'credit_{year}'
-        if col in df.columns:
-            total = df[col].sum() / 1000  # Convert million to billion
-            totals.append(total)
-        else:
-            totals.append(0)
-    
-    # Calculate growth rates
-    growth_rates = [0]  # First year has no growth rate
-    for i in range(1, len(totals)):
-        if totals[i-1] > 0:
-            growth = ((totals[i] - totals[i-1]) / totals[i-1]) * 100
-            growth_rates.append(growth)
-        else:
-            growth_rates.append(0)
+    # Yearly totals (billion Rials) and growth rates from the credit series
+    years = [str(year) for year in series['totals'].index]
+    totals = (series['totals'] / 1000).tolist()
+    rates = growth_rates(series['totals']).tolist()
     
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 12), height_ratios=[3, 1])
     
@@ -254,9 +197,9 @@ def chart_2_1_area_trend(df, font_prop):
     ax1.grid(True, alpha=0.3)
     
     # Growth rate chart
-    bars = ax2.bar(x_pos[1:], growth_rates[1:], alpha=0.7, 
+    bars = ax2.bar(x_pos[1:], rates[1:], alpha=0.7, 
                    color=['#3498db' if i < 3 else '#e67e22' if i < 4 else '#e74c3c' if i < 5 else '#27ae60' 
-                          for i in range(len(growth_rates[1:]))])
+                          for i in range(len(rates[1:]))])
     
     # Chart 2-1: Growth rate Y-axis label font size
     ax2.set_ylabel(ptext('نرخ رشد (%)'), fontproperties=font_prop, fontsize=LABEL_SIZE)
@@ -267,7 +210,7 @@ def chart_2_1_area_trend(df, font_prop):
     ax2.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
     
     # Chart 2-1: Data labels font size
-    for i, (total, growth) in enumerate(zip(totals, growth_rates)):
+    for i, (total, growth) in enumerate(zip(totals, rates)):
         if total > 0:
             ax1.annotate(f'{total:.1f}', (i, total), textcoords="offset points", 
                         xytext=(0,10), ha='center', fontsize=ANNOTATION_SIZE, fontproperties=font_prop)
@@ -279,28 +222,13 @@ def chart_2_1_area_trend(df, font_prop):
     plt.savefig('fig/s2/chart_2_1.png', dpi=300, bbox_inches='tight', facecolor='white')
     plt.close()
 
-def chart_2_2_combo_annual(df, font_prop):
+def chart_2_2_combo_annual(series, font_prop):
     """Chart 2-2: Combo Chart - Annual Credits + Growth Rate"""
     print("Generating Chart 2-2: Combo Chart - Annual Credits + Growth Rate...")
     
-    years = ['1398', '1399', '1400', '1401', '1402', '1403', '1404']
-    totals = []
-    
-    for year in years:
-        col = f'credit_{year}'
-        if col in df.columns:
-            total = df[col].sum() / 1000  # Convert to billion
-            totals.append(total)
-        else:
-            totals.append(0)
-    
-    growth_rates = [0]
-    for i in range(1, len(totals)):
-        if totals[i-1] > 0:
-            growth = ((totals[i] - totals[i-1]) / totals[i-1]) * 100
-            growth_rates.append(growth)
-        else:
-            growth_rates.append(0)
+    years = [str(year) for year in series['totals'].index]
+    totals = (series['totals'] / 1000).tolist()
+    rates = growth_rates(series['totals']).tolist()
     
     fig, ax1 = plt.subplots(figsize=(16, 10))
     
@@ -328,7 +256,7 @@ def chart_2_2_combo_annual(df, font_prop):
     
     # Second y-axis for growth rate
     ax2 = ax1.twinx()
-    line = ax2.plot(x_pos[1:], growth_rates[1:], 'ro-', linewidth=3, markersize=8, 
+    line = ax2.plot(x_pos[1:], rates[1:], 'ro-', linewidth=3, markersize=8, 
                     color='#e74c3c', label=ptext('نرخ رشد'))
     
     # Chart 2-2: Right Y-axis label font size
@@ -342,7 +270,7 @@ def chart_2_2_combo_annual(df, font_prop):
                         textcoords="offset points", xytext=(0,5), ha='center', 
                         fontsize=ANNOTATION_SIZE, fontproperties=font_prop)
     
-    for i, growth in enumerate(growth_rates[1:], 1):
+    for i, growth in enumerate(rates[1:], 1):
         if abs(growth) > 0.1:
             ax2.annotate(f'{growth:.1f}%', (i, growth), textcoords="offset points", 
                         xytext=(0,10), ha='center', fontsize=ANNOTATION_SIZE, 
@@ -360,20 +288,12 @@ def chart_2_2_combo_annual(df, font_prop):
     plt.savefig('fig/s2/chart_2_2.png', dpi=300, bbox_inches='tight', facecolor='white')
     plt.close()
 
-def chart_2_3_waterfall(df, font_prop):
+def chart_2_3_waterfall(series, font_prop):
     """Chart 2-3: Waterfall Chart - Credit Changes (1398→1404)"""
     print("Generating Chart 2-3: Waterfall Chart - Credit Changes...")
     
-    years = ['1398', '1399', '1400', '1401', '1402', '1403', '1404']
-    totals = []
-    
-    for year in years:
-        col = f'credit_{year}'
-        if col in df.columns:
-            total = df[col].sum() / 1000
-            totals.append(total)
-        else:
-            totals.append(0)
+    years = [str(year) for year in series['totals'].index]
+    totals = (series['totals'] / 1000).tolist()
     
     # Calculate changes
     changes = [totals[0]]  # Starting value
@@ -437,15 +357,12 @@ def chart_2_3_waterfall(df, font_prop):
     plt.savefig('fig/s2/chart_2_3.png', dpi=300, bbox_inches='tight', facecolor='white')
     plt.close()
 
-def chart_2_4_treemap(df, font_prop):
+def chart_2_4_treemap(series, font_prop):
     """Chart 2-4: Treemap - Credits Distribution by Executive Organization (1404)"""
     print("Generating Chart 2-4: Treemap - Credits Distribution by Organization...")
     
-    # Group by organization for 1404
-    org_totals = df.groupby('executive_org')['credit_1404'].sum().sort_values(ascending=False)
-    
-    # Get top 10 organizations
-    top_orgs = org_totals.head(10)
+    # Top 10 organizations of 1404 from the precomputed ranking
+    top_orgs = entity_trends(series, top_entities(series, 10, year=1404))[1404]
     
     # Prepare data for treemap
     sizes = top_orgs.values / 1000  # Convert to billions
@@ -470,29 +387,14 @@ def chart_2_4_treemap(df, font_prop):
     plt.savefig('fig/s2/chart_2_4.png', dpi=300, bbox_inches='tight', facecolor='white')
     plt.close()
 
-def chart_2_5_stacked_area(df, font_prop):
+def chart_2_5_stacked_area(series, font_prop):
     """Chart 2-5: Stacked Area Chart - Credits by Organization Over Time"""
     print("Generating Chart 2-5: Stacked Area Chart - Credits by Organization...")
     
-    # Get top 8 organizations by total credits
-    df['total_credits'] = df[['credit_1398', 'credit_1399', 'credit_1400', 'credit_1401', 
-                             'credit_1402', 'credit_1404']].sum(axis=1)
-    top_orgs = df.groupby('executive_org')['total_credits'].sum().nlargest(8).index
-    
-    years = ['1398', '1399', '1400', '1401', '1402', '1403', '1404']
-    year_cols = [f'credit_{year}' for year in years]
-    
-    # Prepare data matrix
-    org_data = []
-    for org in top_orgs:
-        org_df = df[df['executive_org'] == org]
-        yearly_totals = []
-        for col in year_cols:
-            if col in df.columns:
-                yearly_totals.append(org_df[col].sum() / 1000)  # Convert to billions
-            else:
-                yearly_totals.append(0)
-        org_data.append(yearly_totals)
+    # Top 8 organizations by total credits, yearly values in billions
+    top_orgs = top_entities(series, 8)
+    years = [str(year) for year in series['totals'].index]
+    org_data = (entity_trends(series, top_orgs) / 1000).to_numpy()
     
     fig, ax = plt.subplots(figsize=(16, 10))
     
@@ -528,25 +430,14 @@ def chart_2_5_stacked_area(df, font_prop):
     plt.savefig('fig/s2/chart_2_5.png', dpi=300, bbox_inches='tight', facecolor='white')
     plt.close()
 
-def create_remaining_charts(df, font_prop):
+def create_remaining_charts(series, font_prop):
     """Create charts 2-6 through 2-13"""
     print("Generating remaining charts (2-6 through 2-13)...")
     
     # Chart 2-6: Heatmap - Organization Credits Across Years
-    top_orgs = df.groupby('executive_org')['credit_1404'].sum().nlargest(15).index
-    years = ['1398', '1399', '1400', '1401', '1402', '1403', '1404']
-    
-    heatmap_data = []
-    for org in top_orgs:
-        org_df = df[df['executive_org'] == org]
-        row = []
-        for year in years:
-            col = f'credit_{year}'
-            if col in df.columns:
-                row.append(org_df[col].sum() / 1000)
-            else:
-                row.append(0)
-        heatmap_data.append(row)
+    top_orgs = top_entities(series, 15, year=1404)
+    years = [str(year) for year in series['totals'].index]
+    heatmap_data = (entity_trends(series, top_orgs) / 1000).to_numpy()
     
     fig, ax = plt.subplots(figsize=(12, 10))
     im = ax.imshow(heatmap_data, cmap='YlOrRd', aspect='auto')
@@ -566,12 +457,16 @@ def create_remaining_charts(df, font_prop):
     plt.savefig('fig/s2/chart_2_6.png', dpi=300, bbox_inches='tight', facecolor='white')
     plt.close()
     
-    # Chart 2-7: Horizontal Bar - Top 20 Entities (1404)
-    top_entities = df.nlargest(20, 'credit_1404')
+    # Per-row amounts of each year, sliced from the long table
+    credits_1402 = year_amounts(series, 1402)
+    credits_1404 = year_amounts(series, 1404)
+    
+    # Chart 2-7: Horizontal Bar - Top 20 Organizations (1404)
+    top_rows = entity_trends(series, top_entities(series, 20, year=1404))[1404]
     
     fig, ax = plt.subplots(figsize=(14, 12))
-    y_pos = range(len(top_entities))
-    bars = ax.barh(y_pos, top_entities['credit_1404'] / 1000, alpha=0.8, color='#3498db')
+    y_pos = range(len(top_rows))
+    bars = ax.barh(y_pos, top_rows / 1000, alpha=0.8, color='#3498db')
     
     # Chart 2-7: Title font size
     ax.set_title(ptext('۲۰ نهاد برتر از نظر اعتبارات (۱۴۰۴)'), 
@@ -580,7 +475,7 @@ def create_remaining_charts(df, font_prop):
     # Chart 2-7: Axis labels font size
     ax.set_xlabel(ptext('اعتبارات (میلیارد ریال)'), fontproperties=font_prop, fontsize=LABEL_SIZE)
     ax.set_yticks(y_pos)
-    ax.set_yticklabels([ptext(name) for name in top_entities['entity_name']], 
+    ax.set_yticklabels([ptext(name) for name in top_rows.index], 
                        fontproperties=font_prop, fontsize=TICK_SIZE)
     ax.tick_params(axis='x', labelsize=TICK_SIZE)
     
@@ -589,13 +484,13 @@ def create_remaining_charts(df, font_prop):
     plt.close()
     
     # Chart 2-8: Pareto Chart
-    sorted_entities = df.sort_values('credit_1404', ascending=False)
-    cumulative_pct = (sorted_entities['credit_1404'].cumsum() / sorted_entities['credit_1404'].sum()) * 100
+    sorted_entities = credits_1404.sort_values(ascending=False)
+    cumulative_pct = (sorted_entities.cumsum() / sorted_entities.sum()) * 100
     
     fig, ax1 = plt.subplots(figsize=(16, 10))
     
     x_pos = range(len(sorted_entities))
-    bars = ax1.bar(x_pos, sorted_entities['credit_1404'] / 1000, alpha=0.7, color='#3498db')
+    bars = ax1.bar(x_pos, sorted_entities / 1000, alpha=0.7, color='#3498db')
     
     ax2 = ax1.twinx()
     line = ax2.plot(x_pos, cumulative_pct, 'ro-', linewidth=2, markersize=4, color='#e74c3c')
@@ -625,27 +520,22 @@ def create_remaining_charts(df, font_prop):
             ax.set_title(ptext(f'نمودار رتبه‌بندی (نمودار {chart_num}-2)'), 
                         fontproperties=font_prop, fontsize=TITLE_SIZE, fontweight='bold')
             # Simple line plot showing ranking changes
-            for i in range(min(15, len(df))):
-                ax.plot([1398, 1404], [i+1, len(df)-i], 'o-', alpha=0.6)
+            n_rows = len(credits_1404)
+            for i in range(min(15, n_rows)):
+                ax.plot([1398, 1404], [i+1, n_rows-i], 'o-', alpha=0.6)
                 
         elif chart_num == 10:  # Box plot
             ax.set_title(ptext(f'نمودار جعبه‌ای توزیع اعتبارات (نمودار {chart_num}-2)'), 
                         fontproperties=font_prop, fontsize=TITLE_SIZE, fontweight='bold')
-            years = ['1398', '1399', '1400', '1401', '1402', '1404']
-            data_for_box = []
-            for year in years:
-                col = f'credit_{year}'
-                if col in df.columns:
-                    data_for_box.append(df[col].dropna())
-                else:
-                    data_for_box.append([0])
-            ax.boxplot(data_for_box, labels=[ptext(year) for year in years])
+            years = [year for year in YEARS if year != 1403]
+            data_for_box = [year_amounts(series, year) for year in years]
+            ax.boxplot(data_for_box, labels=[ptext(str(year)) for year in years])
             
         elif chart_num == 11:  # Scatter plot
             ax.set_title(ptext(f'نمودار پراکندگی ۱۴۰۲ در مقابل ۱۴۰۴ (نمودار {chart_num}-2)'), 
                         fontproperties=font_prop, fontsize=TITLE_SIZE, fontweight='bold')
-            ax.scatter(df['credit_1402'], df['credit_1404'], alpha=0.6, s=50)
-            max_val = max(df['credit_1402'].max(), df['credit_1404'].max())
+            ax.scatter(credits_1402, credits_1404, alpha=0.6, s=50)
+            max_val = max(credits_1402.max(), credits_1404.max())
             ax.plot([0, max_val], [0, max_val], 'r--', alpha=0.7)
             ax.set_xlabel(ptext('اعتبارات ۱۴۰۲'), fontproperties=font_prop, fontsize=LABEL_SIZE)
             ax.set_ylabel(ptext('اعتبارات ۱۴۰۴'), fontproperties=font_prop, fontsize=LABEL_SIZE)
@@ -653,14 +543,14 @@ def create_remaining_charts(df, font_prop):
         elif chart_num == 12:  # Sunburst (simplified as pie chart)
             ax.set_title(ptext(f'نمودار دایره‌ای توزیع سلسله مراتبی (نمودار {chart_num}-2)'), 
                         fontproperties=font_prop, fontsize=TITLE_SIZE, fontweight='bold')
-            org_totals = df.groupby('executive_org')['credit_1404'].sum().nlargest(8)
+            org_totals = entity_trends(series, top_entities(series, 8, year=1404))[1404]
             ax.pie(org_totals.values, labels=[ptext(org) for org in org_totals.index], 
                    autopct='%1.1f%%', startangle=90)
             
         else:  # Histogram
             ax.set_title(ptext(f'هیستوگرام توزیع فراوانی اعتبارات (نمودار {chart_num}-2)'), 
                         fontproperties=font_prop, fontsize=TITLE_SIZE, fontweight='bold')
-            ax.hist(df['credit_1404'].dropna(), bins=20, alpha=0.7, color='#3498db', edgecolor='black')
+            ax.hist(credits_1404, bins=20, alpha=0.7, color='#3498db', edgecolor='black')
             ax.set_xlabel(ptext('اعتبارات (میلیون ریال)'), fontproperties=font_prop, fontsize=LABEL_SIZE)
             ax.set_ylabel(ptext('فراوانی'), fontproperties=font_prop, fontsize=LABEL_SIZE)
         
@@ -681,26 +571,26 @@ def main():
     os.makedirs('fig/s2', exist_ok=True)
     
     try:
-        # Load data
-        df = load_and_process_data()
+        # Long-format (organization, year, amount) series; all charts slice it
+        series = load_and_process_data()
         
         # Generate all charts
-        chart_2_1_area_trend(df, font_prop)
+        chart_2_1_area_trend(series, font_prop)
         print("* Chart 2-1 completed")
         
-        chart_2_2_combo_annual(df, font_prop)
+        chart_2_2_combo_annual(series, font_prop)
         print("* Chart 2-2 completed")
         
-        chart_2_3_waterfall(df, font_prop)
+        chart_2_3_waterfall(series, font_prop)
         print("* Chart 2-3 completed")
         
-        chart_2_4_treemap(df, font_prop)
+        chart_2_4_treemap(series, font_prop)
         print("* Chart 2-4 completed")
         
-        chart_2_5_stacked_area(df, font_prop)
+        chart_2_5_stacked_area(series, font_prop)
         print("* Chart 2-5 completed")
         
-        create_remaining_charts(df, font_prop)
+        create_remaining_charts(series, font_prop)
         print("* Charts 2-6 through 2-13 completed")
         
         print("=" * 70)
@@ -0,0 +1,346 @@
+"""
+بنچمارک مراحل ساخت گزارش ساتع
+زمان هر مرحله (بارگذاری، آماده‌سازی، تشخیص استان، شکل‌دهی متن، ساخت نمودار،
+رسم و کدگذاری PNG/JPG) روی داده واقعی و نسخه‌های بزرگ‌شده آن اندازه‌گیری می‌شود،
+در تاریخچه JSON ثبت و با خط مبنا مقایسه می‌شود.
+
+اجرا:
+    python benchmark.py
+    python benchmark.py --scales 1 10 --repeat 5
+    python benchmark.py --save-baseline
+    python benchmark.py --scales 1 --synthetic data/synthetic
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+
+import data_loader
+import report_utils
+import synthetic_data
+import province_resolver
+from province_resolver import make_province_resolver, tag_provinces
+
+# ==============================================================================
+# Settings
+# ==============================================================================
+
+BENCH_DIR = Path('./benchmarks')
+HISTORY_PATH = BENCH_DIR / 'history.json'
+BASELINE_PATH = BENCH_DIR / 'baseline.json'
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+
+# فصل‌هایی که در بنچمارک اجرا می‌شوند (نقشه به geopandas نیاز دارد و جدا اندازه‌گیری نمی‌شود)
+CHAPTERS = {
+    's1': 'season_1',
+    's2': 'season_2',
+    's3': 'season_3',
+}
+
+# مرحله‌ای کندتر از این نسبت خط مبنا (و بیش از حداقل اختلاف) پسرفت حساب می‌شود
+REGRESSION_RATIO = 1.25
+REGRESSION_MIN_SECONDS = 0.05
+
+# ==============================================================================
+# Synthetic Inputs
+# ==============================================================================
+
+def scale_dataset(df_contracts, df_payments, factor):
+    """
+    بزرگ کردن داده واقعی با تکرار سطرها
+
+    در هر نسخه نام مشمول و دانشگاه پسوند شماره نسخه می‌گیرند تا تعداد
+    گروه‌ها هم به همان نسبت بزرگ شود؛ کلمات کلیدی استان حفظ می‌شوند.
+    """
+    if factor == 1:
+        return df_contracts, df_payments
+
+    def tile(df):
+        copies = []
+        for i in range(factor):
+            copy = df.copy()
+            if i:
+                copy['نام مشمول'] = copy['نام مشمول'].astype(str) + f' {i}'
+                copy['دانشگاه'] = copy['دانشگاه'].astype(str) + f' {i}'
+            copies.append(copy)
+        return pd.concat(copies, ignore_index=True)
+
+    return tile(df_contracts), tile(df_payments)
+
+# ==============================================================================
+# Timing
+# ==============================================================================
+
+def _time(func, repeat=1, setup=None):
+    """کمترین زمان اجرای func در repeat بار (setup قبل از هر بار و خارج از زمان‌سنجی)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _bench_load(df_contracts, df_payments, label, repeat, tmp_dir):
+    """بارگذاری: پردازش اکسل‌های واقعی در مقیاس ۱ و خواندن کش Feather در همه مقیاس‌ها"""
+    results = {}
+    if label == '1':
+        results['load/excel'], _ = _time(
+            lambda: (pd.read_excel(data_loader.CONTRACTS_PATH), pd.read_excel(data_loader.PAYMENTS_PATH)),
+            repeat)
+        # خروجی کامل قراردادها: تجمیع جریانی در حین خواندن
+        results['load/export-stream'], _ = _time(data_loader.aggregate_contract_export, repeat)
+
+    # کش Feather با همان مسیر کد data_loader (یک بار نوشتن، سپس خواندن گرم)
+    paths = []
+    for name, df in (('contracts', df_contracts), ('payments', df_payments)):
+        source = Path(tmp_dir) / f'{name}_{label}.pkl'
+        df.to_pickle(source)
+        data_loader.read_cached(source, 0, lambda df=df: df, cache_dir=tmp_dir)
+        paths.append(source)
+    results['load/feather'], _ = _time(
+        lambda: [data_loader.read_cached(p, 0, None, cache_dir=tmp_dir) for p in paths], repeat)
+    return results
+
+
+def _bench_prepare(data, modules, repeat):
+    """آماده‌سازی: ساخت مکعب تجمیع مشترک و prepare هر فصل"""
+    results = {}
+    # کش تشخیص استان پاک می‌شود تا هزینه واقعی آن در ساخت مکعب دیده شود
+    results['prepare/shared'], shared = _time(
+        lambda: data_loader.prepare_report_data(data['contracts'], data['payments']), repeat,
+        province_resolver.extract_province.cache_clear)
+
+    chapter_data = {}
+    for name, module in modules.items():
+        results[f'prepare/{name}'], chapter_data[name] = _time(
+            lambda module=module: module.prepare(shared), repeat)
+    return results, chapter_data
+
+
+def _bench_provinces(data, repeat):
+    """تشخیص استان روی ستون دانشگاه هر دو جدول با resolver تازه"""
+    def run():
+        resolve = make_province_resolver(province_resolver.PROVINCE_KEYWORDS,
+                                         province_resolver.MAIN_PROVINCES)
+        return [tag_provinces(data[key]['دانشگاه'], resolve) for key in ('contracts', 'payments')]
+
+    elapsed, _ = _time(run, repeat)
+    return {'provinces': elapsed}
+
+
+def _bench_shaping(data, repeat):
+    """شکل‌دهی متن فارسی همه نام‌های یکتا با کش خالی"""
+    names = pd.concat([data['contracts']['نام مشمول'], data['contracts']['دانشگاه'],
+                       data['payments']['دانشگاه']], ignore_index=True)
+    elapsed, _ = _time(lambda: report_utils.fix_persian_labels(names), repeat,
+                       report_utils._shape_text.cache_clear)
+    return {'shaping': elapsed}
+
+
+def _bench_charts(chapter_data, modules, output_dir):
+    """
+    زمان هر نمودار به سه بخش تقسیم می‌شود: ساخت شکل، رسم Agg و کدگذاری PNG/JPG
+
+    save_figure هر فصل با نسخه‌ای جایگزین می‌شود که همان render_figure و
+    encode_figure را جداگانه زمان‌سنجی می‌کند.
+    """
+    results = {}
+    for name, module in modules.items():
+        for chart in module.CHARTS:
+            timings = {}
+
+            def timed_save(fig, path, dpi=400, jpg_quality=95, parallel=True):
+                start = time.perf_counter()
+                image = report_utils.render_figure(fig, dpi)
+                timings['draw'] = time.perf_counter() - start
+                start = time.perf_counter()
+                report_utils.encode_figure(image, path, dpi, jpg_quality, parallel)
+                timings['encode'] = time.perf_counter() - start
+
+            original_save = module.save_figure
+            module.save_figure = timed_save
+            try:
+                total, _ = _time(lambda: chart(chapter_data[name], Path(output_dir)))
+            finally:
+                module.save_figure = original_save
+
+            key = f'chart/{name}/{chart.__name__}'
+            results[f'{key}/build'] = total - timings.get('draw', 0) - timings.get('encode', 0)
+            results[f'{key}/draw'] = timings.get('draw', 0)
+            results[f'{key}/encode'] = timings.get('encode', 0)
+    return results
+
+
+def _bench_dataset(label, contracts, payments, modules, repeat, charts, tmp_dir):
+    """همه مراحل برای یک مجموعه داده"""
+    data = {'contracts': contracts, 'payments': payments}
+    stages = {'rows/contracts': len(contracts), 'rows/payments': len(payments)}
+
+    stages.update(_bench_load(contracts, payments, label, repeat, tmp_dir))
+    prepare_results, chapter_data = _bench_prepare(data, modules, repeat)
+    stages.update(prepare_results)
+    stages.update(_bench_provinces(data, repeat))
+    stages.update(_bench_shaping(data, repeat))
+    if charts:
+        stages.update(_bench_charts(chapter_data, modules, tmp_dir))
+
+    for stage, value in stages.items():
+        if not stage.startswith('rows/'):
+            print(f"  {stage:<45} {value:8.3f}s")
+    return stages
+
+
+def run_benchmark(scales=None, repeat=3, chart_max_scale=10, synthetic_dir=None, synthetic_year=1404):
+    """
+    اجرای همه مراحل برای هر مقیاس؛ خروجی: مقیاس -> مرحله -> ثانیه
+
+    با synthetic_dir داده تولیدشده با synthetic_data نیز (با برچسب 'synthetic')
+    بنچمارک می‌شود؛ نمودارها روی آن ساخته نمی‌شوند.
+    """
+    scales = scales or DEFAULT_SCALES
+    modules = {name: importlib.import_module(module) for name, module in CHAPTERS.items()}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_contracts = data_loader.load_contracts()
+        df_payments = data_loader.load_payments()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for factor in scales:
+            print(f"\nScale x{factor}...")
+            contracts, payments = scale_dataset(df_contracts, df_payments, factor)
+            results[str(factor)] = _bench_dataset(str(factor), contracts, payments, modules, repeat,
+                                                  factor <= chart_max_scale, tmp_dir)
+
+        if synthetic_dir is not None:
+            contracts, payments = synthetic_data.load_synthetic(synthetic_year, synthetic_dir)
+            print(f"\nSynthetic {synthetic_year} ({len(contracts):,} contract rows)...")
+            results['synthetic'] = _bench_dataset('synthetic', contracts, payments, modules, repeat,
+                                                  False, tmp_dir)
+    return results
+
+# ==============================================================================
+# History and Regressions
+# ==============================================================================
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_record(results):
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+def _load_json(path, default):
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, value):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(value, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def append_history(record, path=HISTORY_PATH):
+    history = _load_json(path, [])
+    history.append(record)
+    _write_json(path, history)
+
+
+def find_regressions(results, baseline, ratio=REGRESSION_RATIO, min_seconds=REGRESSION_MIN_SECONDS):
+    """مراحلی که نسبت به خط مبنا کندتر شده‌اند: (مقیاس، مرحله، مبنا، فعلی)"""
+    regressions = []
+    for scale, stages in results.items():
+        base_stages = baseline.get('results', {}).get(scale, {})
+        for stage, value in stages.items():
+            base = base_stages.get(stage)
+            if stage.startswith('rows/') or base is None:
+                continue
+            if value > base * ratio and value - base > min_seconds:
+                regressions.append((scale, stage, base, value))
+    return regressions
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SATE report benchmark')
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES,
+                        help='data scale factors (default: 1 10 100 1000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='repetitions per stage, the minimum is kept (charts run once)')
+    parser.add_argument('--chart-max-scale', type=int, default=10,
+                        help='largest scale at which charts are rendered (default: 10)')
+    parser.add_argument('--synthetic', type=Path, default=None,
+                        help='also benchmark a dataset written by synthetic_data.py')
+    parser.add_argument('--synthetic-year', type=int, default=1404)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help=f'store this run as the baseline in {BASELINE_PATH}')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.scales, args.repeat, args.chart_max_scale,
+                            args.synthetic, args.synthetic_year)
+    record = make_record(results)
+    append_history(record)
+    print(f"\n✓ Results appended to {HISTORY_PATH}")
+
+    if args.save_baseline:
+        _write_json(BASELINE_PATH, record)
+        print(f"✓ Baseline saved to {BASELINE_PATH}")
+        return 0
+
+    baseline = _load_json(BASELINE_PATH, None)
+    if baseline is None:
+        print("No baseline stored; run with --save-baseline to create one")
+        return 0
+
+    regressions = find_regressions(results, baseline)
+    if not regressions:
+        print(f"✓ No regressions against baseline {baseline.get('commit')} ({baseline.get('timestamp')})")
+        return 0
+
+    print(f"\n✗ {len(regressions)} regressions against baseline {baseline.get('commit')}:")
+    for scale, stage, base, value in regressions:
+        print(f"  {scale:<10} {stage:<45} {base:8.3f}s -> {value:8.3f}s ({value / base:.2f}x)")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+ساخت کامل گزارش ساتع در یک اجرا
+داده‌ها یک بار بارگذاری و آماده می‌شوند و نمودارهای همه فصل‌ها روی همان جداول ساخته می‌شوند
+
+اجرا:
+    python build_report.py
+    python build_report.py --chapters s1 s3
+    python build_report.py --jobs 4
+    python build_report.py --force
+    python build_report.py --stats-only
+
+به طور پیش‌فرض فقط نمودارهایی ساخته می‌شوند که داده یا کدشان نسبت به
+مانیفست figs/.manifest.json تغییر کرده است. با --stats-only فقط آمار و
+فایل‌های اکسل فصل‌ها ساخته می‌شوند و کتابخانه‌های رسم اصلاً import نمی‌شوند.
+"""
+
+import os
+
+# بک‌اند بدون پنجره پیش از هر import احتمالی matplotlib
+os.environ['MPLBACKEND'] = 'Agg'
+
+import argparse
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import chart_manifest
+from data_loader import load_report_data
+from font_setup import preload_fonts
+from report_utils import shaping_cache_info
+
+# ==============================================================================
+# Chapters
+# ==============================================================================
+
+# نام فصل -> ماژول آن؛ ماژول‌ها فقط هنگام نیاز import می‌شوند
+CHAPTERS = {
+    's1': 'season_1',
+    's2': 'season_2',
+    's3': 'season_3',
+    's3_map': 'test',
+}
+
+# ==============================================================================
+# Chart Tasks
+# ==============================================================================
+
+# داده‌های آماده‌شده هر فصل در هر پردازه کارگر (یک بار در initializer تنظیم می‌شود)
+_worker_data = None
+
+
+def _init_worker(chapter_data):
+    global _worker_data
+    _worker_data = chapter_data
+
+
+def render_chart(chapter, chart_name, chapter_data=None):
+    """ساخت یک نمودار از یک فصل؛ در پردازه کارگر از داده‌های initializer استفاده می‌شود"""
+    if chapter_data is None:
+        chapter_data = _worker_data
+    module = importlib.import_module(CHAPTERS[chapter])
+    start = time.perf_counter()
+    getattr(module, chart_name)(chapter_data[chapter], module.OUTPUT_DIR)
+    return chapter, chart_name, time.perf_counter() - start
+
+
+def render_charts(tasks, chapter_data, jobs=1):
+    """
+    اجرای نمودارها به صورت سریال یا موازی
+
+    هر نمودار یک کار مستقل است و فایل خروجی خودش را می‌نویسد، بنابراین
+    خروجی اجرای موازی با اجرای سریال یکسان است.
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        return [render_chart(chapter, chart_name, chapter_data) for chapter, chart_name in tasks]
+
+    # فونت‌ها پیش از fork بارگذاری می‌شوند تا کارگرها آن‌ها را دوباره باز نکنند
+    preload_fonts()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)),
+                             initializer=_init_worker, initargs=(chapter_data,)) as pool:
+        futures = [pool.submit(render_chart, chapter, chart_name) for chapter, chart_name in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+# ==============================================================================
+# Report
+# ==============================================================================
+
+def build_report(chapters=None, data=None, jobs=1, force=False, stats_only=False):
+    """
+    تولید نمودارها و آمار فصل‌های انتخاب‌شده روی یک مجموعه داده مشترک
+
+    اگر data داده نشود، هر دو جدول یک بار بارگذاری می‌شوند. با jobs > 1
+    نمودارها در یک ProcessPoolExecutor ساخته می‌شوند. نمودارهایی که برش
+    داده، فایل‌های ورودی و کدشان با مانیفست یکسان است دوباره ساخته نمی‌شوند
+    مگر با force=True. با stats_only=True فقط prepare و finish فصل‌ها
+    (آمار و فایل‌های اکسل) اجرا می‌شوند.
+    """
+    chapters = list(chapters or CHAPTERS)
+    if data is None:
+        data = load_report_data()
+
+    modules = {name: importlib.import_module(CHAPTERS[name]) for name in chapters}
+
+    manifest = chart_manifest.load_manifest()
+    entries = {}
+    # هش هر فایل ورودی فقط یک بار در هر اجرا محاسبه می‌شود
+    file_hashes = {}
+    chapter_data = {}
+    tasks = []
+    for name, module in modules.items():
+        Path(module.OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+        chapter_data[name] = module.prepare(data)
+        if stats_only:
+            continue
+        for chart in module.CHARTS:
+            key = f'{name}/{chart.__name__}'
+            entries[key] = chart_manifest.chart_entry(
+                chart, module.CHART_DEPENDENCIES[chart.__name__], chapter_data[name], file_hashes)
+            outputs = chart_manifest.output_paths(module.OUTPUT_DIR, chart.__name__)
+            if not force and chart_manifest.is_up_to_date(entries[key], manifest.get(key), outputs):
+                print(f"- {chart.__name__} unchanged, skipped")
+                continue
+            tasks.append((name, chart.__name__))
+
+    for chapter, chart_name, elapsed in render_charts(tasks, chapter_data, jobs):
+        manifest[f'{chapter}/{chart_name}'] = entries[f'{chapter}/{chart_name}']
+        chart_manifest.save_manifest(manifest)
+        if jobs > 1:
+            print(f"✓ {chart_name} rendered in {elapsed:.1f}s")
+
+    for name, module in modules.items():
+        module.finish(chapter_data[name], module.OUTPUT_DIR)
+
+    if jobs <= 1 and tasks:
+        # در حالت موازی هر پردازه کارگر کش جداگانه‌ای دارد
+        info = shaping_cache_info()
+        print(f"Text shaping cache: {info.hits} hits, {info.misses} misses")
+
+    return chapter_data
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SATE report builder')
+    parser.add_argument('--chapters', nargs='+', choices=list(CHAPTERS), default=None,
+                        help='chapters to build (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help=f'number of worker processes for chart rendering '
+                             f'(default: 1, this machine has {os.cpu_count()} cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every chart, ignoring the manifest')
+    parser.add_argument('--stats-only', action='store_true',
+                        help='only compute statistics and workbooks, without charts')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    build_report(args.chapters, jobs=args.jobs, force=args.force, stats_only=args.stats_only)
+    print(f"\n✓ Report built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+مانیفست وابستگی نمودارها برای ساخت افزایشی گزارش
+برای هر نمودار فایل‌های ورودی، ستون‌ها، نسخه کد و هش برش داده‌ای که رسم کرده ثبت می‌شود
+و فقط نمودارهایی که یکی از این‌ها برایشان تغییر کرده دوباره ساخته می‌شوند
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import sys
+import types
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import font_setup
+import report_utils
+from data_loader import file_sha256
+from lazy_imports import LazyModule, lazy_import
+
+matplotlib = lazy_import('matplotlib')
+
+MANIFEST_PATH = Path('./figs/.manifest.json')
+
+# ریشه مخزن؛ ماژول‌هایی که فایلشان در این پوشه است کد گزارش به حساب می‌آیند
+REPO_ROOT = Path(__file__).resolve().parent
+
+# ==============================================================================
+# Hashing
+# ==============================================================================
+
+def _update_hash(digest, value):
+    """افزودن یک مقدار (DataFrame، Series، آرایه یا مقدار ساده) به هش"""
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(sorted(value.attrs.items())).encode('utf-8'))
+        for col in value.columns:
+            digest.update(str(col).encode('utf-8'))
+            _update_hash(digest, value[col])
+    elif isinstance(value, pd.Series):
+        try:
+            hashed = pd.util.hash_pandas_object(value, index=True)
+        except TypeError:
+            # ستون‌هایی مانند geometry که قابل هش مستقیم نیستند
+            hashed = pd.util.hash_pandas_object(value.astype(str), index=True)
+        digest.update(hashed.values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode('utf-8'))
+
+
+def data_hash(chapter_data, columns):
+    """هش برش دقیق داده‌ای که نمودار می‌خواند (کلید -> فهرست ستون‌ها یا None برای کل مقدار)"""
+    digest = hashlib.sha256()
+    for key in sorted(columns):
+        digest.update(key.encode('utf-8'))
+        value = chapter_data[key]
+        if columns[key] is not None and isinstance(value, pd.DataFrame):
+            value = value[columns[key]]
+        _update_hash(digest, value)
+    return digest.hexdigest()
+
+
+def _referenced_names(func):
+    """نام‌های سراسری که تابع (یا کدهای تو در تو آن) به آن‌ها ارجاع می‌دهد"""
+    names = set()
+    codes = [func.__code__]
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+    return names
+
+
+def _referenced_functions(func, module):
+    """توابع هم‌ماژولی که تابع (یا کدهای تو در تو آن) به نامشان ارجاع می‌دهد"""
+    return [getattr(module, name) for name in sorted(_referenced_names(func))
+            if inspect.isfunction(getattr(module, name, None))
+            and getattr(module, name).__module__ == module.__name__]
+
+
+def _repo_module(value):
+    """ماژول مخزنی که value (ماژول، تابع یا کلاس) از آن آمده است، یا None"""
+    if isinstance(value, LazyModule):
+        return None
+    if isinstance(value, types.ModuleType):
+        module = value
+    elif inspect.isfunction(value) or inspect.isclass(value):
+        module = sys.modules.get(value.__module__)
+    else:
+        return None
+    path = getattr(module, '__file__', None)
+    return module if path is not None and Path(path).resolve().parent == REPO_ROOT else None
+
+
+def _module_closure(modules):
+    """ماژول‌های مخزن به همراه همه ماژول‌های مخزنی که (به صورت گذرا) import می‌کنند"""
+    seen = {}
+    stack = list(modules)
+    while stack:
+        module = stack.pop()
+        if module.__name__ in seen:
+            continue
+        seen[module.__name__] = module
+        stack.extend(m for m in map(_repo_module, vars(module).values()) if m is not None)
+    return [seen[name] for name in sorted(seen)]
+
+
+def _is_constant(value):
+    """مقدار سراسری ماژول که جزو داده‌های کد است (نه ماژول، تابع یا کلاس)"""
+    return not isinstance(value, (types.ModuleType, LazyModule)) and not callable(value)
+
+
+def _update_constant(digest, name, value):
+    """افزودن یک ثابت ماژول به هش (مجموعه‌ها مرتب می‌شوند تا ترتیبشان در هر اجرا یکسان باشد)"""
+    digest.update(name.encode('utf-8'))
+    if isinstance(value, (set, frozenset)):
+        value = sorted(value, key=repr)
+    _update_hash(digest, value)
+
+
+@lru_cache(maxsize=None)
+def _source_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def code_version(func, modules=()):
+    """
+    نسخه کد یک نمودار: متن تابع و توابع کمکی همان ماژول که صدا می‌زند، مقدار
+    ثابت‌های سراسری همان ماژول که به آن‌ها ارجاع می‌دهند (رنگ‌ها، آستانه‌ها و ...)
+    و مقادیر پیش‌فرض پارامترهایشان (مانند OUTPUT_DIR)، متن کامل هر ماژول دیگر
+    مخزن که این توابع به آن می‌رسند (به صورت گذرا، مثلاً concentration یا
+    quantile_sketch)، فونت‌های ثبت‌شده و نسخه matplotlib
+
+    modules نام ماژول‌هایی است که نمودار فقط از طریق داده آماده‌شده به آن‌ها
+    وابسته است (مثلاً province_geometry که در prepare خوانده می‌شود).
+    """
+    module = sys.modules[func.__module__]
+    digest = hashlib.sha256()
+    seen = set()
+    helpers = {report_utils, font_setup, *map(importlib.import_module, modules)}
+    stack = [func]
+    while stack:
+        f = stack.pop()
+        if f in seen:
+            continue
+        seen.add(f)
+        digest.update(inspect.getsource(f).encode('utf-8'))
+        _update_hash(digest, f.__defaults__)
+        stack.extend(_referenced_functions(f, module))
+        names = sorted(_referenced_names(f))
+        for name in names:
+            if name in vars(module) and _is_constant(vars(module)[name]):
+                _update_constant(digest, name, vars(module)[name])
+        helpers.update(m for m in (_repo_module(getattr(module, name, None)) for name in names)
+                       if m is not None and m is not module)
+
+    for helper in _module_closure(helpers):
+        if helper is not module:
+            digest.update(f'{helper.__name__}:{_source_digest(helper.__file__)}'.encode('utf-8'))
+    for path in font_setup.font_files():
+        digest.update(f'{path.name}:{path.stat().st_size}'.encode('utf-8'))
+    digest.update(matplotlib.__version__.encode('utf-8'))
+    return digest.hexdigest()
+
+# ==============================================================================
+# Manifest
+# ==============================================================================
+
+def load_manifest(path=MANIFEST_PATH):
+    """خواندن مانیفست ذخیره‌شده (یا دیکشنری خالی)"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True),
+                    encoding='utf-8')
+
+
+def file_hashes(paths, known=None):
+    """
+    هش فایل‌های ورودی موجود (مسیر -> هش)
+
+    known هش‌های محاسبه‌شده قبلی همین اجرا را نگه می‌دارد تا هر فایل (مثلاً
+    کارگاه‌های اکسل مشترک همه نمودارها) فقط یک بار خوانده شود.
+    """
+    known = known if known is not None else {}
+    for f in map(str, paths):
+        if f not in known and Path(f).exists():
+            known[f] = file_sha256(f)
+    return {f: known[f] for f in map(str, paths) if f in known}
+
+
+def chart_entry(chart, dependencies, chapter_data, known_files=None):
+    """
+    ساخت رکورد مانیفست یک نمودار از وابستگی‌های اعلام‌شده آن
+
+    known_files دیکشنری مشترک هش فایل‌ها در یک اجرای ساخت گزارش است (file_hashes).
+    """
+    return {
+        'files': file_hashes(dependencies['files'], known_files),
+        'columns': dependencies['columns'],
+        'code_version': code_version(chart, dependencies.get('modules', ())),
+        'data_hash': data_hash(chapter_data, dependencies['columns']),
+    }
+
+
+def output_paths(output_dir, chart_name):
+    return [Path(output_dir) / f'{chart_name}.png', Path(output_dir) / f'{chart_name}.jpg']
+
+
+def is_up_to_date(entry, stored, outputs):
+    """نمودار به‌روز است اگر فایل‌های ورودی، کد و داده‌اش تغییر نکرده و فایل‌های خروجی موجود باشند"""
+    return (stored is not None
+            and stored.get('files') == entry['files']
+            and stored.get('code_version') == entry['code_version']
+            and stored.get('data_hash') == entry['data_hash']
+            and all(p.exists() for p in outputs))
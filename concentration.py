@@ -0,0 +1,273 @@
+"""
+شاخص‌های تمرکز (نابرابری) اعتبارات، قراردادها و پرداخت‌ها
+ضریب جینی، منحنی لورنز، شاخص هرفیندال (HHI)، سهم k عضو برتر و نقطه ۸۰/۲۰ همه از
+یک آرایه مرتب‌شده و جمع تجمعی آن به دست می‌آیند؛ نتیجه هر آرایه ورودی حافظه‌گذاری
+می‌شود تا محاسبه دوباره روی همان داده (در متن نمودار، جدول آمار و خلاصه) تکرار نشود.
+همین شاخص‌ها برای همه گروه‌ها (دستگاه، استان و ...) با یک مرتب‌سازی و کاهش‌های
+قطعه‌ای (reduceat) و بدون حلقه روی گروه‌ها محاسبه می‌شوند.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# آستانه پیش‌فرض قانون پارتو (۸۰٪ مقدار)
+PARETO_THRESHOLD = 0.8
+
+# تعداد نیمرخ‌های حافظه‌گذاری‌شده
+PROFILE_CACHE_SIZE = 32
+
+# چکیده آرایه‌های ورودی -> نیمرخ (به ترتیب آخرین استفاده؛ خود ورودی‌ها نگه داشته نمی‌شوند)
+_profiles = {}
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def _as_array(values):
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+    return np.ascontiguousarray(values, dtype=float)
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+def _digest(array):
+    """چکیده 16 بایتی محتوای آرایه پیوسته (بدون کپی آن)"""
+    return hashlib.blake2b(memoryview(array), digest_size=16).digest()
+
+
+def _profile(values, weights):
+    # تنها مرتب‌سازی: نزولی (ترتیب نمودار پارتو)؛ ترتیب صعودی لورنز نمای معکوس همین آرایه است
+    order = np.argsort(-values, kind='stable')
+    desc = values[order]
+    amounts = desc if weights is None else desc * weights[order]
+
+    n = len(desc)
+    total = amounts.sum()
+    cumulative_share = np.cumsum(amounts) / total
+    if weights is None:
+        population_share = np.arange(1, n + 1) / n
+    else:
+        population_share = np.cumsum(weights[order]) / weights.sum()
+
+    # جینی از مساحت زیر منحنی لورنز (صعودی): G = 1 - Σ Δp (L_i + L_{i-1})
+    lorenz = np.concatenate(([0.0], 1.0 - cumulative_share[::-1][1:], [1.0])) if n else np.zeros(1)
+    population = np.concatenate(([0.0], 1.0 - population_share[::-1][1:], [1.0])) if n else np.zeros(1)
+    gini = 1.0 - np.sum(np.diff(population) * (lorenz[1:] + lorenz[:-1])) if n else np.nan
+
+    return {
+        'n': n,
+        'total': total,
+        'values': _read_only(desc),
+        'weights': _read_only(weights[order]) if weights is not None else None,
+        'cumulative_share': _read_only(cumulative_share),
+        'population_share': _read_only(population_share),
+        'lorenz': (_read_only(population), _read_only(lorenz)),
+        'gini': gini,
+        'hhi': np.sum((amounts / total) ** 2) if n else np.nan,
+    }
+
+# ==============================================================================
+# Concentration Profile
+# ==============================================================================
+
+def concentration(values, weights=None):
+    """
+    نیمرخ تمرکز یک آرایه (مثلاً اعتبار هر مشمول)
+
+    خروجی دیکشنری است با:
+    values: مقادیر به ترتیب نزولی، cumulative_share: سهم تجمعی مقدار (منحنی پارتو)،
+    population_share: سهم تجمعی جمعیت، lorenz: نقاط (p، L) منحنی لورنز از (0، 0)
+    تا (1، 1)، gini، hhi (مجموع مربع سهم‌ها، بین 1/n و 1) و n و total.
+    با weights (مثلاً تعداد افراد هر ردیف) هر مقدار نماینده weights عضو است و
+    سهم جمعیت و جینی وزنی محاسبه می‌شوند.
+    """
+    values = _as_array(values)
+    weights = _as_array(weights) if weights is not None else None
+    key = (_digest(values), _digest(weights) if weights is not None else None)
+
+    profile = _profiles.pop(key, None)
+    if profile is None:
+        profile = _profile(values, weights)
+    _profiles[key] = profile
+    if len(_profiles) > PROFILE_CACHE_SIZE:
+        del _profiles[next(iter(_profiles))]
+    return profile
+
+
+def entity_concentration(values, entities):
+    """
+    نیمرخ تمرکز پس از جمع values به تفکیک entities (مثلاً مبلغ هر قرارداد به تفکیک دانشگاه)
+
+    جمع گروه‌ها با np.bincount روی کدهای factorize انجام می‌شود؛ ردیف‌های بدون
+    گروه (NaN) کنار گذاشته می‌شوند.
+    """
+    codes, uniques = pd.factorize(pd.Series(entities))
+    valid = codes >= 0
+    totals = np.bincount(codes[valid], weights=_as_array(values)[valid], minlength=len(uniques))
+    return concentration(totals)
+
+# ==============================================================================
+# Shares
+# ==============================================================================
+
+def top_k_share(profile, k):
+    """سهم k عضو برتر از کل (بین 0 و 1)"""
+    k = min(int(k), profile['n'])
+    return profile['cumulative_share'][k - 1] if k > 0 else 0.0
+
+
+def top_fraction_share(profile, fraction):
+    """
+    سهم fraction (مثلاً 0.2) برتر جمعیت از کل
+
+    بدون وزن همان int(n * fraction) عضو اول است؛ با وزن، اعضایی که سهم تجمعی
+    جمعیتشان از fraction بیشتر نشود.
+    """
+    if profile['weights'] is None:
+        count = int(profile['n'] * fraction)
+    else:
+        count = int(np.searchsorted(profile['population_share'], fraction, side='right'))
+    return top_k_share(profile, count)
+
+
+def crossing_share(profile, threshold=PARETO_THRESHOLD):
+    """
+    سهم جمعیتی که threshold (مثلاً ۸۰٪) مقدار را در اختیار دارد (نقطه ۸۰/۲۰)
+
+    تعداد اعضای برتری است که سهم تجمعی‌شان از threshold بیشتر نشود (دست‌کم یک عضو).
+    """
+    count = int(np.searchsorted(profile['cumulative_share'] * 100, threshold * 100, side='right'))
+    return profile['population_share'][max(count, 1) - 1] if profile['n'] else 0.0
+
+# ==============================================================================
+# Grouped Concentration
+# ==============================================================================
+
+def _segments(values, groups):
+    """
+    مرتب‌سازی یک‌باره بر اساس (گروه، مقدار نزولی)
+
+    خروجی: برچسب هر قطعه، مقادیر مرتب‌شده، شروع و طول هر قطعه و جمع تجمعی
+    مقادیر درون هر قطعه. ردیف‌های بدون گروه یا بدون مقدار کنار گذاشته می‌شوند.
+    """
+    codes, uniques = pd.factorize(pd.Series(groups), sort=True)
+    values = _as_array(values)
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+
+    order = np.lexsort((-values, codes))
+    codes, values = codes[order], values[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, int)
+    counts = np.diff(np.r_[starts, len(codes)])
+
+    # جمع تجمعی درون قطعه: جمع تجمعی کل منهای جمع پیش از شروع قطعه
+    cumulative = np.cumsum(values)
+    cumulative -= np.repeat(cumulative[starts] - values[starts], counts)
+    return uniques[codes[starts]], values, starts, counts, cumulative
+
+
+def grouped_concentration(values, groups, k=10, fraction=0.2, threshold=PARETO_THRESHOLD):
+    """
+    شاخص‌های تمرکز values برای هر گروه از groups (مثلاً اعتبار مشمولین هر دستگاه)
+
+    خروجی DataFrame با یک سطر برای هر گروه (مرتب بر اساس نام گروه) و ستون‌های
+    n، total، gini، hhi، top_k_share (سهم k عضو برتر)، top_fraction_share (سهم
+    fraction برتر اعضا) و crossing_share (سهم اعضایی که threshold مقدار را دارند)؛
+    هر سطر همان نتیجه concentration روی اعضای آن گروه است.
+    """
+    labels, values, starts, counts, cumulative = _segments(values, groups)
+    totals = np.add.reduceat(values, starts) if len(values) else np.zeros(0)
+
+    # رتبه نزولی هر عضو درون گروه (از 1)
+    rank = np.arange(1, len(values) + 1) - np.repeat(starts, counts)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # جینی بر حسب رتبه نزولی: G = (n + 1) / n - 2 Σ r x / (n X)
+        weighted = np.add.reduceat(rank * values, starts) if len(values) else np.zeros(0)
+        gini = (counts + 1) / counts - 2 * weighted / (counts * totals)
+        hhi = (np.add.reduceat(values ** 2, starts) if len(values) else np.zeros(0)) / totals ** 2
+
+        top = np.minimum(int(k), counts)
+        top_k = np.where(top > 0, cumulative[starts + np.maximum(top, 1) - 1], 0) / totals
+
+        count = (counts * fraction).astype(int)
+        top_fraction = np.where(count > 0, cumulative[starts + np.maximum(count, 1) - 1], 0) / totals
+
+        within = (cumulative / np.repeat(totals, counts)) * 100 <= threshold * 100
+        crossing = np.maximum(np.add.reduceat(within, starts) if len(values) else counts, 1) / counts
+
+    return pd.DataFrame({
+        'n': counts,
+        'total': totals,
+        'gini': gini,
+        'hhi': hhi,
+        'top_k_share': top_k,
+        'top_fraction_share': top_fraction,
+        'crossing_share': crossing,
+    }, index=pd.Index(labels, name=getattr(groups, 'name', None)))
+
+
+def grouped_lorenz(values, groups, points=11):
+    """
+    نمونه‌های منحنی لورنز هر گروه در points نقطه سهم جمعیت (از 0 تا 1)
+
+    خروجی DataFrame گروه × سهم جمعیت است؛ مقدار هر خانه سهم پایین‌ترین
+    floor(p * n) عضو گروه از کل آن گروه است.
+    """
+    labels, values, starts, counts, cumulative = _segments(values, groups)
+    totals = np.add.reduceat(values, starts) if len(values) else np.zeros(0)
+    population = np.linspace(0.0, 1.0, points)
+
+    # سهم پایین‌ترین اعضا = 1 - سهم بقیه اعضا (که در ترتیب نزولی برترند)
+    bottom = np.floor(np.outer(counts, population) + 1e-9).astype(int)
+    top = counts[:, None] - bottom
+    top_sum = np.where(top > 0, cumulative[starts[:, None] + np.maximum(top, 1) - 1], 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lorenz = np.where(bottom > 0, 1 - top_sum / totals[:, None], 0.0)
+
+    return pd.DataFrame(lorenz, index=pd.Index(labels, name=getattr(groups, 'name', None)),
+                        columns=pd.Index(population, name='population_share'))
+
+# ==============================================================================
+# Appendix Tables
+# ==============================================================================
+
+# عنوان ستون‌های جدول پیوست
+APPENDIX_COLUMNS = {
+    'n': 'تعداد',
+    'total': 'مجموع',
+    'gini': 'ضریب جینی',
+    'hhi': 'شاخص هرفیندال (HHI)',
+    'top_k_share': 'سهم {k} عضو برتر (%)',
+    'top_fraction_share': 'سهم ۲۰٪ برتر (%)',
+    'crossing_share': 'درصد اعضای دارای ۸۰٪ مبلغ',
+}
+
+_PERCENT_COLUMNS = ('top_k_share', 'top_fraction_share', 'crossing_share')
+
+
+def save_concentration_appendix(values, groups, group_label, path, k=10, lorenz_points=11):
+    """
+    ذخیره جدول پیوست تمرکز به تفکیک گروه (کاربرگ شاخص‌ها و کاربرگ منحنی لورنز)
+
+    سهم‌ها به درصد نوشته می‌شوند و گروه‌ها به ترتیب مجموع نزولی مرتب می‌شوند.
+    """
+    stats = grouped_concentration(values, groups, k=k)
+    stats[list(_PERCENT_COLUMNS)] *= 100
+    stats = stats.sort_values('total', ascending=False)
+
+    lorenz = grouped_lorenz(values, groups, lorenz_points).loc[stats.index] * 100
+    lorenz.columns = [f'{p * 100:.0f}٪ جمعیت' for p in lorenz.columns]
+
+    columns = {name: label.format(k=k) for name, label in APPENDIX_COLUMNS.items()}
+    with pd.ExcelWriter(path) as writer:
+        stats.rename(columns=columns).rename_axis(group_label).to_excel(writer, sheet_name='شاخص‌های تمرکز')
+        lorenz.rename_axis(group_label).to_excel(writer, sheet_name='منحنی لورنز')
+    return stats
@@ -0,0 +1,89 @@
+"""
+طرح داده (schema) جداول اعتبارات در حافظه
+ستون‌های شناسه به صورت Categorical با فرهنگ لغت مشترک بین قراردادها و پرداخت‌ها
+نگهداری می‌شوند تا groupby و merge روی کدهای صحیح انجام شود، و مبالغ به صورت
+عدد صحیح ثابت‌ممیز (int64) ذخیره می‌شوند تا جمع‌ها دقیق و بدون خطای اعشاری باشند.
+"""
+
+import numpy as np
+import pandas as pd
+
+from province_resolver import MAIN_PROVINCES, OTHER_PROVINCE, PROVINCE_KEYWORDS, UNKNOWN_PROVINCE
+
+# ستون‌های شناسه مشترک دو جدول
+IDENTITY_COLUMNS = ['نام مشمول', 'دانشگاه', 'دستگاه اجرایی مرتبط']
+
+# ستون‌های مبلغ (میلیون ریال)
+AMOUNT_COLUMNS = ['اعتبار سال 1404', 'مجموع مبالغ قراردادها', 'مجموع مبالغ پرداختی']
+
+# مبالغ منبع تا شش رقم اعشار میلیون ریال دارند؛ ذخیره به صورت میلیونیم میلیون ریال (ریال)
+AMOUNT_SCALE = 1_000_000
+AMOUNT_DTYPE = 'Int64'
+
+# فرهنگ لغت ثابت استان‌ها (همه خروجی‌های ممکن extract_province)
+PROVINCE_DTYPE = pd.CategoricalDtype(
+    sorted(set(PROVINCE_KEYWORDS) | set(MAIN_PROVINCES) | {UNKNOWN_PROVINCE, OTHER_PROVINCE}))
+
+# ==============================================================================
+# Amounts
+# ==============================================================================
+
+def to_fixed(values):
+    """تبدیل مبالغ اعشاری میلیون ریال به عدد صحیح ثابت‌ممیز (مقادیر خالی <NA> می‌شوند)"""
+    values = pd.Series(values)
+    if values.dtype == AMOUNT_DTYPE:
+        return values
+    return np.round(values.astype('float64') * AMOUNT_SCALE).astype(AMOUNT_DTYPE)
+
+
+def to_million(values):
+    """تبدیل مبالغ ثابت‌ممیز (Series یا عدد) به میلیون ریال اعشاری (مقادیر خالی NaN می‌شوند)"""
+    if isinstance(values, pd.Series):
+        return values.astype('float64') / AMOUNT_SCALE
+    return float(values) / AMOUNT_SCALE
+
+# ==============================================================================
+# Encoding
+# ==============================================================================
+
+def shared_dtype(columns):
+    """
+    فرهنگ لغت مشترک یک ستون در چند جدول
+
+    دسته‌ها به ترتیب الفبایی مرتب می‌شوند تا کدها مستقل از ترتیب سطرها پایدار
+    بمانند و ترتیب گروه‌ها در groupby همان ترتیب رشته‌ای قبلی باشد.
+    """
+    values = set()
+    for column in columns:
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            values.update(column.cat.categories)
+        else:
+            values.update(column.dropna().unique())
+    return pd.CategoricalDtype(sorted(values))
+
+
+def encode_tables(df_contracts, df_payments):
+    """
+    رمزگذاری جداول قراردادها و پرداخت‌ها با طرح داده مشترک
+
+    ستون‌های شناسه Categorical با یک فرهنگ لغت برای هر دو جدول و ستون‌های مبلغ
+    Int64 ثابت‌ممیز می‌شوند. جداول رمزگذاری‌شده بدون تغییر برگردانده می‌شوند.
+    """
+    tables = [df_contracts.copy(), df_payments.copy()]
+    for col in IDENTITY_COLUMNS:
+        dtype = shared_dtype([df[col] for df in tables if col in df.columns])
+        for df in tables:
+            if col in df.columns:
+                df[col] = df[col].astype(dtype)
+
+    for df in tables:
+        for col in AMOUNT_COLUMNS:
+            if col in df.columns:
+                df[col] = to_fixed(df[col])
+
+    return tuple(tables)
+
+
+def memory_usage(df):
+    """حجم حافظه جدول (بایت، با احتساب رشته‌ها)"""
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,194 @@
+"""
+سری زمانی چندساله اعتبارات پژوهشی (Research_Credibility.xlsx)
+ستون‌های سالانه جدول پهن (اعتبار سال 1398 ... اعتبار سال 1404) یک بار به
+جدول بلند (نهاد، سال، مبلغ) مرتب بر اساس سال تبدیل می‌شوند و نمایه سال بازه سطرهای
+هر سال است. ماتریس نهاد × سال، جمع سالانه، مقادیر تجمعی و رتبه‌بندی N نهاد برتر
+هر سال یک بار از همین جدول پیش‌محاسبه می‌شوند و نمودارهای روند فقط برش‌هایی از
+آن‌ها هستند (بدون groupby دوباره روی جدول پهن در هر نمودار).
+"""
+
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import read_cached
+
+CREDIBILITY_PATH = Path('./data/raw_data/Research_Credibility.xlsx')
+CREDIBILITY_SHEET = 'هزینه پژوهشی (میلیون)'
+
+# سال‌های گزارش؛ سال 1403 اعتباری ندارد (حذف ماده قانونی) و صفر در نظر گرفته می‌شود
+YEARS = (1398, 1399, 1400, 1401, 1402, 1403, 1404)
+
+# سال در نام ستون سالانه («اعتبار سال 1398» یا «اعتبار 40% سال 1398»)
+YEAR_PATTERN = re.compile(r'سال\s*(\d{4})')
+
+# نسخه منطق جدول بلند؛ با هر تغییر در long_credits افزایش یابد تا کش قدیمی استفاده نشود
+SERIES_VERSION = 2
+
+ENTITY_COLUMN = 'دستگاه اجرایی مرتبط'
+
+# ستون‌های جدول بلند
+ENTITY = 'entity'
+YEAR = 'year'
+AMOUNT = 'amount'
+
+# تعداد نهادهای برتر پیش‌محاسبه‌شده برای هر سال
+TOP_N = 15
+
+# ==============================================================================
+# Long Format
+# ==============================================================================
+
+def find_year_columns(columns, years=YEARS, pattern=YEAR_PATTERN):
+    """ستون‌های سالانه -> سال، بر اساس عدد سال در نام ستون (فقط سال‌های years)"""
+    found = {}
+    for column in columns:
+        match = pattern.search(str(column))
+        if match and int(match.group(1)) in years:
+            found[column] = int(match.group(1))
+    return found
+
+
+def long_credits(df, entity_column=ENTITY_COLUMN, year_columns=None, years=YEARS):
+    """
+    تبدیل جدول پهن به جدول بلند (نهاد، سال، مبلغ) مرتب بر اساس سال
+
+    year_columns نگاشت ستون -> سال است و در صورت None از نام ستون‌ها (find_year_columns)
+    پیدا می‌شود؛ اگر هیچ ستون سالانه‌ای در جدول نباشد ValueError رخ می‌دهد.
+    مبالغ غیرعددی صفر می‌شوند و سال‌هایی از years که ستونی ندارند (مانند 1403)
+    با مبلغ صفر اضافه می‌شوند. نهاد دسته‌ای (categorical) و سال int16 است.
+    """
+    if year_columns is None:
+        year_columns = find_year_columns(df.columns, years)
+    column_of = {year: column for column, year in year_columns.items()
+                 if column in df.columns and year in years}
+    if not column_of:
+        raise ValueError(f"No yearly credit columns for years {years[0]}-{years[-1]} "
+                         f"in columns {list(df.columns)}")
+    entities = pd.Categorical(df[entity_column])
+    amounts = [pd.to_numeric(df[column_of[year]], errors='coerce').fillna(0).to_numpy(dtype=float)
+               if year in column_of else np.zeros(len(df))
+               for year in years]
+
+    return pd.DataFrame({
+        ENTITY: pd.Categorical.from_codes(np.tile(entities.codes, len(years)), entities.categories),
+        YEAR: np.repeat(np.asarray(years, dtype=np.int16), len(df)),
+        AMOUNT: np.concatenate(amounts) if amounts else np.zeros(0),
+    })
+
+
+def year_index(long):
+    """نمایه سال: سال -> بازه (slice) سطرهای آن سال در جدول بلند"""
+    years = long[YEAR].to_numpy()
+    unique = np.unique(years)
+    starts = np.searchsorted(years, unique, side='left')
+    stops = np.searchsorted(years, unique, side='right')
+    return {int(year): slice(int(start), int(stop)) for year, start, stop in zip(unique, starts, stops)}
+
+# ==============================================================================
+# Series Operations
+# ==============================================================================
+
+def rolling_mean(values, window):
+    """میانگین متحرک در طول سال‌ها (ستون‌های ماتریس یا اندیس سری سالانه)"""
+    if isinstance(values, pd.DataFrame):
+        return values.T.rolling(window, min_periods=1).mean().T
+    return values.rolling(window, min_periods=1).mean()
+
+
+def cumulative(values):
+    """جمع تجمعی در طول سال‌ها"""
+    if isinstance(values, pd.DataFrame):
+        return values.cumsum(axis=1)
+    return values.cumsum()
+
+
+def growth_rates(totals):
+    """نرخ رشد سالانه (درصد)؛ سال اول و سال‌های پس از مبلغ صفر، صفر هستند"""
+    previous = totals.shift(1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (totals - previous) / previous * 100
+    return growth.where(previous > 0, 0.0)
+
+
+def top_n_per_year(matrix, n=TOP_N):
+    """
+    رتبه‌بندی n نهاد برتر هر سال
+
+    خروجی جدول بلند (سال، رتبه، نهاد، مبلغ)؛ ترتیب برابرها همان nlargest است.
+    """
+    parts = []
+    for year in matrix.columns:
+        top = matrix[year].nlargest(n)
+        parts.append(pd.DataFrame({YEAR: year, 'rank': np.arange(1, len(top) + 1),
+                                   ENTITY: top.index, AMOUNT: top.to_numpy()}))
+    return pd.concat(parts, ignore_index=True)
+
+# ==============================================================================
+# Credit Series
+# ==============================================================================
+
+def build_credit_series(long, top_n=TOP_N):
+    """
+    پیش‌محاسبه برش‌های نمودارهای روند از جدول بلند
+
+    خروجی دیکشنری با: long و index (جدول بلند و نمایه سال)، matrix (جمع هر نهاد
+    در هر سال، نهاد × سال)، totals (جمع سالانه)، cumulative (جمع تجمعی ماتریس) و
+    top (n نهاد برتر هر سال). جمع نهاد × سال با یک np.bincount روی کدهای نهاد و
+    سال محاسبه می‌شود.
+    """
+    entities = long[ENTITY].cat
+    years = np.unique(long[YEAR].to_numpy())
+    year_codes = np.searchsorted(years, long[YEAR].to_numpy())
+    valid = entities.codes.to_numpy() >= 0
+
+    flat = entities.codes.to_numpy()[valid] * len(years) + year_codes[valid]
+    sums = np.bincount(flat, weights=long[AMOUNT].to_numpy()[valid],
+                       minlength=len(entities.categories) * len(years))
+    matrix = pd.DataFrame(sums.reshape(len(entities.categories), len(years)),
+                          index=pd.Index(entities.categories, name=ENTITY),
+                          columns=pd.Index(years.astype(int), name=YEAR))
+
+    return {
+        'long': long,
+        'index': year_index(long),
+        'matrix': matrix,
+        'totals': matrix.sum(axis=0),
+        'cumulative': cumulative(matrix),
+        'top': top_n_per_year(matrix, top_n),
+    }
+
+
+def load_credit_series(path=CREDIBILITY_PATH, sheet_name=CREDIBILITY_SHEET, entity_column=ENTITY_COLUMN,
+                       cache_dir=None):
+    """خواندن Research_Credibility.xlsx و ساخت سری زمانی (جدول بلند از طریق کش Feather)"""
+    long = read_cached(path, f'{sheet_name}.long.v{SERIES_VERSION}',
+                       lambda: long_credits(pd.read_excel(path, sheet_name=sheet_name), entity_column),
+                       cache_dir)
+    return build_credit_series(long)
+
+# ==============================================================================
+# Slicing
+# ==============================================================================
+
+def top_entities(series, n, year=None):
+    """n نهاد برتر یک سال (از رتبه‌بندی پیش‌محاسبه‌شده) یا کل سال‌ها (year=None)"""
+    if year is None:
+        return series['matrix'].sum(axis=1).nlargest(n).index
+    top = series['top']
+    top = top[top[YEAR] == year]
+    if len(top) < min(n, len(series['matrix'])):
+        return series['matrix'][year].nlargest(n).index
+    return pd.Index(top[ENTITY].iloc[:n], name=ENTITY)
+
+
+def entity_trends(series, entities):
+    """ماتریس نهاد × سال برای نهادهای داده‌شده (به همان ترتیب)"""
+    return series['matrix'].loc[entities]
+
+
+def year_amounts(series, year):
+    """مبالغ یک سال به ترتیب سطرهای جدول پهن (برش جدول بلند با نمایه سال)"""
+    return series['long'][AMOUNT].iloc[series['index'][year]].reset_index(drop=True)
@@ -0,0 +1,516 @@
+"""
+بارگذاری داده‌های اعتبارات با کش ستونی
+هر فایل اکسل (یا جدول Access) فقط یک بار خوانده می‌شود و نسخه Feather آن در data/.cache نگهداری می‌شود
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import aggregate_cube
+import credit_schema
+from lazy_imports import lazy_import
+from snapshot_diff import apply_delta, delta_rows, diff_snapshots
+from xlsx_stream import fold_batches, iter_sheet_batches
+
+# خواننده Access فقط وقتی پایگاه داده واقعاً خوانده شود import می‌شود
+access_reader = lazy_import('access_reader')
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+    feather = None
+
+# ==============================================================================
+# Paths
+# ==============================================================================
+
+DATA_DIR = Path('./data')
+CACHE_DIR = DATA_DIR / '.cache'
+
+CONTRACTS_PATH = DATA_DIR / 'Credits_Contracts.xlsx'
+PAYMENTS_PATH = DATA_DIR / 'Credits_Payments.xlsx'
+
+# پایگاه داده Access؛ در صورت وجود به جای خروجی‌های اکسل بالا خوانده می‌شود
+ACCESS_PATH = DATA_DIR / 'SATE_1404.accdb'
+ACCESS_CREDITS_TABLE = 'Corps_Credits'
+ACCESS_CONTRACTS_TABLE = 'Contracts_1404'
+ACCESS_PAYMENTS_TABLE = 'Payments_1404'
+ACCESS_CONTRACT_AMOUNT = 'مبلغ قرارداد_میلیون ریال'
+ACCESS_PAYMENT_AMOUNT = 'مبلغ پرداختی_میلیون ریال'
+
+# ستون‌های مشمولین در جداول اکسل قراردادها و پرداخت‌ها
+SUBJECT_CODE = 'شماره طبقه بندی'
+SUBJECT_COLUMNS = [SUBJECT_CODE, 'نام مشمول', 'دستگاه اجرایی مرتبط', 'اعتبار سال 1404']
+
+# خروجی کامل قراردادهای سامانه (هر تاریخ برداشت یک فایل All_Contracts_<تاریخ>.xlsx)
+EXPORT_DIR = DATA_DIR / 'raw_data'
+EXPORT_PATTERN = 'All_Contracts_*.xlsx'
+EXPORT_SHEET = 'All_Year_Cont'
+EXPORT_AMOUNT = 'مبلغ قرارداد(ریال)'
+EXPORT_KEY = 'کد رهگیری'
+
+# اندازه‌های خلاصه خروجی قراردادها
+EXPORT_MEASURES = {
+    'مبلغ قرارداد': (EXPORT_AMOUNT, 'sum'),
+    'تعداد قرارداد': (EXPORT_AMOUNT, 'size'),
+}
+
+# نوع ستون‌های خروجی قراردادها؛ سال قرارداد مقدار ذخیره‌شده فرمول LEFT(تاریخ,4) است
+EXPORT_CONVERTERS = {
+    'سال قرارداد': int,
+    'شماره قرارداد': str,
+}
+EXPORT_DTYPES = {
+    'ردیف': 'Int64',
+    'کد رهگیری': 'Int64',
+    'شناسه پیشنهاده': 'Int64',
+    'سال قرارداد': 'Int64',
+    EXPORT_AMOUNT: 'Int64',
+    'مدت زمان اجرا (ماه)': 'Int64',
+}
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def file_sha256(path, chunk_size=1 << 20):
+    """محاسبه هش SHA-256 محتوای فایل"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_stem(path, key):
+    """نام پایه فایل‌های کش برای یک کاربرگ یا جدول"""
+    return f'{Path(path).stem}.{key}'
+
+
+def _read_meta(meta_path):
+    try:
+        return json.loads(meta_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def _read_cache(cache_path):
+    """خواندن فایل کش با memory-map و یکسان‌سازی مقادیر خالی با خروجی read_excel"""
+    df = feather.read_table(cache_path, memory_map=True).to_pandas()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _write_frame(df, path):
+    """نوشتن فایل کش بدون فشرده‌سازی (برای خواندن با memory-map)"""
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path,
+                          compression='uncompressed')
+
+# ==============================================================================
+# Cached Loading
+# ==============================================================================
+
+def read_cached(path, key, reader, cache_dir=None):
+    """
+    خواندن یک کاربرگ یا جدول از طریق کش Feather
+
+    کلید کش زمان تغییر و اندازه فایل است؛ اگر این دو تغییر کرده باشند هش محتوا
+    بررسی می‌شود و فقط در صورت تغییر واقعی محتوا reader دوباره اجرا می‌شود.
+    فایل کش بدون فشرده‌سازی نوشته و به صورت memory-map خوانده می‌شود.
+    """
+    path = Path(path)
+    if feather is None:
+        print("Warning: pyarrow not installed, reading without cache")
+        return reader()
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    stem = _cache_stem(path, key)
+    meta_path = cache_dir / f'{stem}.json'
+    meta = _read_meta(meta_path)
+
+    stat = path.stat()
+    if meta is not None:
+        cache_path = cache_dir / meta['cache_file']
+        if cache_path.exists():
+            if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+                return _read_cache(cache_path)
+
+            # زمان تغییر عوض شده؛ شاید محتوا همان باشد (مثلاً کپی مجدد فایل)
+            if meta['sha256'] == file_sha256(path):
+                meta['mtime_ns'] = stat.st_mtime_ns
+                meta['size'] = stat.st_size
+                _write_meta(meta_path, meta)
+                return _read_cache(cache_path)
+
+    df = reader()
+
+    sha256 = file_sha256(path)
+    cache_path = cache_dir / f'{stem}.{sha256[:16]}.feather'
+    _write_frame(df, cache_path)
+
+    if meta is not None and meta['cache_file'] != cache_path.name:
+        (cache_dir / meta['cache_file']).unlink(missing_ok=True)
+
+    _write_meta(meta_path, {
+        'source': str(path),
+        'key': key,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': sha256,
+        'cache_file': cache_path.name,
+    })
+    return df
+
+
+def read_excel_cached(path, sheet_name=0, cache_dir=None):
+    """خواندن کاربرگ اکسل از طریق کش Feather"""
+    return read_cached(path, sheet_name, lambda: pd.read_excel(path, sheet_name=sheet_name), cache_dir)
+
+
+def read_access_cached(path, table, cache_dir=None):
+    """خواندن جدول Access (بدون ODBC) از طریق کش Feather"""
+    return read_cached(path, table, lambda: access_reader.read_access_table(path, table), cache_dir)
+
+
+def cached_sha256(path, key, cache_dir=None):
+    """هش محتوای فایل منبع؛ اگر فراداده کش هنوز معتبر باشد هش ذخیره‌شده برگردانده می‌شود"""
+    path = Path(path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    meta = _read_meta(cache_dir / f'{_cache_stem(path, key)}.json')
+    stat = path.stat()
+    if meta is not None and meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return meta['sha256']
+    return file_sha256(path)
+
+
+def load_cube(df_contracts, df_payments, sources, cache_dir=None):
+    """
+    بارگذاری مکعب تجمیع از کش، به‌روزرسانی افزایشی یا ساخت و ذخیره آن
+
+    کلید کش هش فایل‌های منبع (sources: فهرست (مسیر، کاربرگ)) به همراه نسخه
+    منطق مکعب است؛ در اجراهای بعدی با همان داده، تجمیع دوباره انجام نمی‌شود.
+    اگر داده تغییر کرده باشد و مکعب قبلی با همان نسخه منطق موجود باشد، فقط
+    سطرهای تغییر یافته نسبت به برداشت قبلی (که کنار مکعب ذخیره شده) اعمال می‌شوند.
+    """
+    if feather is None:
+        return aggregate_cube.build_cube(df_contracts, df_payments)
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    version = aggregate_cube.cube_version()
+    digest = hashlib.sha256(version.encode('utf-8'))
+    for path, key in sources:
+        digest.update(cached_sha256(path, key, cache_dir).encode('utf-8'))
+    stem = f'cube.{digest.hexdigest()[:16]}'
+    cube_parts = aggregate_cube.CUBE_PARTS
+    table_parts = ('contracts', 'payments')
+    paths = {part: cache_dir / f'{stem}.{part}.feather' for part in cube_parts + table_parts}
+
+    if all(paths[part].exists() for part in cube_parts):
+        return {part: _read_cache(paths[part]) for part in cube_parts}
+
+    df_contracts, df_payments = credit_schema.encode_tables(df_contracts, df_payments)
+
+    meta_path = cache_dir / 'cube.json'
+    meta = _read_meta(meta_path)
+    previous = None
+    if meta is not None and meta['version'] == version:
+        previous = {part: cache_dir / f"{meta['stem']}.{part}.feather"
+                    for part in cube_parts + table_parts}
+        if not all(path.exists() for path in previous.values()):
+            previous = None
+
+    if previous is not None:
+        old_cube = {part: _read_cache(previous[part]) for part in cube_parts}
+        old_tables = [_read_cache(previous[part]) for part in table_parts]
+        cube, changes = aggregate_cube.update_cube(old_cube, old_tables, (df_contracts, df_payments))
+        for name, counts in changes.items():
+            print(f"Cube delta {name}: +{counts['inserted']} / -{counts['deleted']} rows")
+    else:
+        cube = aggregate_cube.build_cube(df_contracts, df_payments)
+
+    for part in cube_parts:
+        _write_frame(cube[part], paths[part])
+    _write_frame(df_contracts, paths['contracts'])
+    _write_frame(df_payments, paths['payments'])
+    _write_meta(meta_path, {'stem': stem, 'version': version})
+
+    # حذف مکعب‌های قدیمی
+    for old in cache_dir.glob('cube.*.feather'):
+        if not old.name.startswith(stem + '.'):
+            old.unlink(missing_ok=True)
+    return cube
+
+
+def load_contracts():
+    """بارگذاری جدول قراردادها (Credits_Contracts.xlsx)"""
+    return read_excel_cached(CONTRACTS_PATH)
+
+
+def load_payments():
+    """بارگذاری جدول پرداخت‌ها (Credits_Payments.xlsx)"""
+    return read_excel_cached(PAYMENTS_PATH)
+
+
+def _join_credits(credits, table, amount_column, sum_column):
+    """
+    ساخت جدول هم‌شکل خروجی اکسل از جداول Access
+
+    یک سطر برای هر (مشمول، دانشگاه) با جمع مبالغ، و یک سطر با دانشگاه خالی برای
+    مشمولین بدون قرارداد یا پرداخت (به ترتیب سطرهای credits).
+    """
+    amounts = (table.groupby([SUBJECT_CODE, 'دانشگاه'], sort=False)[amount_column].sum()
+               .rename(sum_column).reset_index())
+    df = credits.merge(amounts, on=SUBJECT_CODE, how='left')
+    df[SUBJECT_CODE] = df[SUBJECT_CODE].astype('int64')
+    return df
+
+
+def load_access_tables(path=ACCESS_PATH, cache_dir=None):
+    """
+    بارگذاری قراردادها و پرداخت‌ها مستقیماً از پایگاه داده Access
+
+    جداول Corps_Credits، Contracts_1404 و Payments_1404 از طریق کش Feather خوانده
+    و به همان ستون‌های Credits_Contracts.xlsx و Credits_Payments.xlsx تبدیل می‌شوند؛
+    مشمولین (بدون سطرهای خالی و تکراری) به ترتیب نزولی اعتبار سال 1404 هستند.
+    """
+    credits = read_access_cached(path, ACCESS_CREDITS_TABLE, cache_dir)
+    credits = (credits.dropna(subset=[SUBJECT_CODE]).drop_duplicates(SUBJECT_CODE)[SUBJECT_COLUMNS]
+               .sort_values(['اعتبار سال 1404', SUBJECT_CODE], ascending=False, kind='stable'))
+    contracts = read_access_cached(path, ACCESS_CONTRACTS_TABLE, cache_dir)
+    payments = read_access_cached(path, ACCESS_PAYMENTS_TABLE, cache_dir)
+    return (_join_credits(credits, contracts, ACCESS_CONTRACT_AMOUNT, 'مجموع مبالغ قراردادها'),
+            _join_credits(credits, payments, ACCESS_PAYMENT_AMOUNT, 'مجموع مبالغ پرداختی'))
+
+
+def latest_export(export_dir=None):
+    """آخرین فایل خروجی قراردادها (بر اساس تاریخ برداشت در نام فایل)"""
+    export_dir = Path(export_dir) if export_dir is not None else EXPORT_DIR
+    exports = sorted(export_dir.glob(EXPORT_PATTERN))
+    if not exports:
+        raise FileNotFoundError(f"No {EXPORT_PATTERN} found in {export_dir}")
+    return exports[-1]
+
+
+def iter_contract_export(columns=None, where=None, path=None, batch_size=None):
+    """خواندن جریانی خروجی قراردادها به صورت دسته‌های نوع‌دار (فقط ستون‌ها و سطرهای لازم)"""
+    path = path if path is not None else latest_export()
+    kwargs = {'batch_size': batch_size} if batch_size is not None else {}
+    return iter_sheet_batches(path, EXPORT_SHEET, columns, where,
+                              EXPORT_CONVERTERS, EXPORT_DTYPES, **kwargs)
+
+
+def aggregate_contract_export(by=('سال قرارداد', 'دانشگاه'), where=None, path=None):
+    """
+    جمع مبلغ و تعداد قراردادهای خروجی کامل به تفکیک ستون‌های by
+
+    دسته‌ها در حین خواندن تجمیع می‌شوند، پس حافظه مستقل از اندازه فایل است.
+    """
+    by = list(by)
+    batches = iter_contract_export(by + [EXPORT_AMOUNT], where, path)
+    return fold_batches(batches, by, EXPORT_MEASURES)
+
+
+def _arrow_schema(df):
+    """طرح Arrow ثابت برای نوشتن دسته‌ای (ستون‌های object رشته‌ای‌اند، حتی اگر دسته اول خالی باشد)"""
+    return pa.schema([
+        pa.field(name, pa.string() if dtype == object
+                 else pa.from_numpy_dtype(getattr(dtype, 'numpy_dtype', dtype)))
+        for name, dtype in df.dtypes.items()
+    ])
+
+
+def _write_batches(batches, path):
+    """نوشتن دسته‌ها در یک فایل Feather (بدون فشرده‌سازی) در حین عبور آن‌ها"""
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pandas(
+                batch, schema=writer.schema if writer is not None else _arrow_schema(batch),
+                preserve_index=False)
+            if writer is None:
+                writer = pa.ipc.new_file(path, table.schema)
+            writer.write_table(table)
+            yield batch
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _diff_export(old, batches):
+    """
+    تفاوت دسته‌های برداشت جدید با سطرهای برداشت ذخیره‌شده (جدول Arrow با memory-map)
+
+    هر دسته فقط با سطرهای قبلی همان کلیدها مقایسه می‌شود؛ کلیدهای قبلی که در
+    هیچ دسته‌ای دیده نشوند حذف‌شده‌اند. خروجی: (سطرهای افزوده، سطرهای کاسته، تعدادها)
+    """
+    old_index = pd.Index(old.column(EXPORT_KEY).to_pandas())
+    if not old_index.is_unique:
+        raise ValueError(f"Stored export snapshot has duplicate keys {EXPORT_KEY}")
+    seen = np.zeros(len(old_index), dtype=bool)
+
+    added, removed = [], []
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+    for batch in batches:
+        positions = old_index.get_indexer(batch[EXPORT_KEY])
+        matched = positions[positions >= 0]
+        if seen[matched].any():
+            raise ValueError(f"New export snapshot has duplicate keys {EXPORT_KEY}")
+        seen[matched] = True
+
+        diff = diff_snapshots(old.take(matched).to_pandas(), batch, key=EXPORT_KEY)
+        batch_added, batch_removed = delta_rows(diff)
+        added.append(batch_added)
+        removed.append(batch_removed)
+        counts['inserted'] += len(diff['inserted'])
+        counts['updated'] += len(diff['updated_new'])
+
+    deleted = old.take(np.flatnonzero(~seen)).to_pandas()
+    counts['deleted'] = len(deleted)
+    removed.append(deleted)
+    return (pd.concat([*added, deleted.iloc[:0]], ignore_index=True),
+            pd.concat(removed, ignore_index=True), counts)
+
+
+def load_export_summary(by=('سال قرارداد', 'دانشگاه'), path=None, cache_dir=None):
+    """
+    خلاصه خروجی قراردادها با به‌روزرسانی افزایشی بین برداشت‌ها
+
+    ستون‌های کلید (کد رهگیری)، گروه‌بندی و مبلغ هر برداشت دسته به دسته از
+    iter_contract_export در یک فایل Feather کنار خلاصه آن نوشته می‌شوند. برای
+    برداشت جدید هر دسته بر اساس کلید با سطرهای ذخیره‌شده (memory-map) مقایسه
+    می‌شود و فقط قراردادهای درج، ویرایش یا حذف شده با apply_delta روی خلاصه قبلی
+    اعمال می‌شوند؛ حافظه مصرفی یک دسته، کلیدهای برداشت قبلی و سطرهای تغییر یافته
+    است. اگر فایل تغییر نکرده باشد خلاصه ذخیره‌شده برگردانده می‌شود.
+    """
+    path = Path(path) if path is not None else latest_export()
+    by = list(by)
+    if feather is None:
+        return aggregate_contract_export(by, path=path)
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    stem = f"export.{EXPORT_SHEET}.by_{'_'.join(by)}"
+    meta_path = cache_dir / f'{stem}.json'
+    rows_path = cache_dir / f'{stem}.rows.feather'
+    new_rows_path = cache_dir / f'{stem}.rows.new.feather'
+    summary_path = cache_dir / f'{stem}.summary.feather'
+
+    meta = _read_meta(meta_path)
+    stored = meta is not None and rows_path.exists() and summary_path.exists()
+    stat = path.stat()
+    if stored and meta['source'] == str(path) and meta['mtime_ns'] == stat.st_mtime_ns \
+            and meta['size'] == stat.st_size:
+        return _read_cache(summary_path)
+
+    batches = _write_batches(iter_contract_export([EXPORT_KEY, *by, EXPORT_AMOUNT], path=path),
+                             new_rows_path)
+    if stored:
+        old = feather.read_table(rows_path, memory_map=True)
+        added, removed, counts = _diff_export(old, batches)
+        del old
+        summary = apply_delta(_read_cache(summary_path), added, removed, by, EXPORT_MEASURES)
+        print(f"{path.name} vs {Path(meta['source']).name}: +{counts['inserted']} inserted, "
+              f"~{counts['updated']} updated, -{counts['deleted']} deleted")
+    else:
+        summary = fold_batches(batches, by, EXPORT_MEASURES)
+
+    os.replace(new_rows_path, rows_path)
+    _write_frame(summary, summary_path)
+    _write_meta(meta_path, {
+        'source': str(path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+    })
+    return summary
+
+# ==============================================================================
+# Shared Preparation
+# ==============================================================================
+
+def prepare_report_data(df_contracts, df_payments, cube=None):
+    """
+    آماده‌سازی داده‌های مشترک همه فصل‌ها
+
+    قراردادها و پرداخت‌ها فقط یک بار در مکعب تجمیع (aggregate_cube) جمع زده
+    می‌شوند و خلاصه مشمولین، دستگاه‌ها و جداول فصل‌ها برش‌هایی از همین مکعب هستند.
+    اگر cube داده نشود از روی دو جدول ساخته می‌شود.
+    جداول با طرح داده credit_schema (کدهای Categorical و مبالغ Int64) برگردانده می‌شوند.
+    """
+    df_contracts, df_payments = credit_schema.encode_tables(df_contracts, df_payments)
+    if cube is None:
+        cube = aggregate_cube.build_cube(df_contracts, df_payments)
+
+    # تجمیع داده‌ها بر اساس مشمولین
+    subjects_summary, payments_summary = aggregate_cube.subject_totals(cube)
+
+    # اضافه کردن داده‌های پرداخت
+    subjects_summary = subjects_summary.merge(payments_summary, on='نام مشمول', how='left')
+    subjects_summary['مبلغ پرداخت'] = subjects_summary['مبلغ پرداخت'].fillna(0)
+
+    # محاسبه درصدها
+    subjects_summary['درصد قرارداد'] = (subjects_summary['مبلغ قرارداد'] / subjects_summary['اعتبار']) * 100
+    subjects_summary['درصد پرداخت از اعتبار'] = (subjects_summary['مبلغ پرداخت'] / subjects_summary['اعتبار']) * 100
+    subjects_summary['درصد پرداخت از قرارداد'] = np.where(
+        subjects_summary['مبلغ قرارداد'] > 0,
+        (subjects_summary['مبلغ پرداخت'] / subjects_summary['مبلغ قرارداد']) * 100,
+        0
+    )
+
+    # تجمیع به تفکیک دستگاه
+    dept_summary = subjects_summary.groupby('دستگاه', observed=True).agg({
+        'اعتبار': 'sum',
+        'مبلغ قرارداد': 'sum',
+        'مبلغ پرداخت': 'sum',
+        'نام مشمول': 'count'
+    }).reset_index()
+    dept_summary.columns = ['دستگاه', 'اعتبار', 'مبلغ قرارداد', 'مبلغ پرداخت', 'تعداد مشمول']
+
+    return {
+        'contracts': df_contracts,
+        'payments': df_payments,
+        'subjects_summary': subjects_summary,
+        'dept_summary': dept_summary,
+        'cube': cube,
+    }
+
+
+def load_report_data():
+    """
+    بارگذاری هر دو جدول و آماده‌سازی داده‌های مشترک
+
+    اگر پایگاه داده Access موجود باشد جداول از آن خوانده می‌شوند و در غیر این
+    صورت از خروجی‌های اکسل.
+    """
+    print("\nLoading data...")
+    if ACCESS_PATH.exists():
+        print(f"Reading tables from {ACCESS_PATH}")
+        tables = load_access_tables()
+        sources = [(ACCESS_PATH, table) for table in
+                   (ACCESS_CREDITS_TABLE, ACCESS_CONTRACTS_TABLE, ACCESS_PAYMENTS_TABLE)]
+    else:
+        tables = load_contracts(), load_payments()
+        sources = [(CONTRACTS_PATH, 0), (PAYMENTS_PATH, 0)]
+    df_contracts, df_payments = credit_schema.encode_tables(*tables)
+
+    print(f"Contracts shape: {df_contracts.shape} ({credit_schema.memory_usage(df_contracts):,} bytes)")
+    print(f"Payments shape: {df_payments.shape} ({credit_schema.memory_usage(df_payments):,} bytes)")
+
+    cube = load_cube(df_contracts, df_payments, sources)
+    return prepare_report_data(df_contracts, df_payments, cube)
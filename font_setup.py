@@ -0,0 +1,139 @@
+"""
+ثبت فونت‌های Vazirmatn همراه مخزن در matplotlib
+همه وزن‌های fonts/Vazirmatn-*.ttf (نسبت به مسیر مخزن، نه یک مسیر ثابت ویندوزی) یک بار
+ثبت می‌شوند تا متن پررنگ از Vazirmatn-Bold استفاده کند و نه پررنگ‌سازی مصنوعی.
+مشخصات فونت‌ها در پوشه کش matplotlib ذخیره می‌شود و در اجراهای بعدی فایل‌های فونت
+دوباره تجزیه نمی‌شوند.
+"""
+
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from lazy_imports import lazy_import
+
+matplotlib = lazy_import('matplotlib')
+font_manager = lazy_import('matplotlib.font_manager')
+
+FONTS_DIR = Path(__file__).resolve().parent / 'fonts'
+FONT_FAMILY = 'Vazirmatn'
+FONT_PATTERN = 'Vazirmatn-*.ttf'
+FALLBACK_FAMILY = 'DejaVu Sans'
+
+# نسخه قالب فایل کش؛ با تغییر فیلدهای ذخیره‌شده افزایش یابد
+FONT_CACHE_VERSION = 1
+
+# وزن‌هایی که هنگام راه‌اندازی پیش‌بارگذاری می‌شوند (متن عادی و پررنگ نمودارها)
+PRELOAD_WEIGHTS = ('Regular', 'Bold')
+
+_registered = None
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def font_files(fonts_dir=None):
+    """فایل‌های فونت Vazirmatn موجود در مخزن"""
+    fonts_dir = Path(fonts_dir) if fonts_dir is not None else FONTS_DIR
+    return sorted(fonts_dir.glob(FONT_PATTERN))
+
+
+def _cache_path():
+    return Path(matplotlib.get_cachedir()) / f'{FONT_FAMILY.lower()}-fontlist.json'
+
+
+def _signature(path):
+    stat = path.stat()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _load_entries(paths):
+    """مشخصات ذخیره‌شده فونت‌ها، اگر هیچ فایلی از زمان ذخیره تغییر نکرده باشد"""
+    try:
+        cached = json.loads(_cache_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+    if cached.get('version') != FONT_CACHE_VERSION or \
+            cached.get('matplotlib') != matplotlib.__version__:
+        return None
+    files = cached.get('files', {})
+    if sorted(files) != sorted(str(p) for p in paths):
+        return None
+    if any(files[str(p)]['signature'] != _signature(p) for p in paths):
+        return None
+    return [font_manager.FontEntry(**files[str(p)]['entry']) for p in paths]
+
+
+def _save_entries(paths, entries):
+    cache = {
+        'version': FONT_CACHE_VERSION,
+        'matplotlib': matplotlib.__version__,
+        'files': {str(p): {'signature': _signature(p), 'entry': asdict(e)}
+                  for p, e in zip(paths, entries)},
+    }
+    try:
+        path = _cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding='utf-8')
+    except OSError:
+        pass
+
+# ==============================================================================
+# Registration
+# ==============================================================================
+
+def register_fonts(fonts_dir=None):
+    """
+    ثبت همه وزن‌های Vazirmatn در fontManager (فقط یک بار در هر پردازه)
+
+    معادل font_manager.fontManager.addfont برای هر فایل است، با این تفاوت که
+    مشخصات فونت‌ها (FontEntry) از کش خوانده می‌شوند. خروجی نام خانواده فونت
+    است، یا None اگر هیچ فایل فونتی پیدا نشود.
+    """
+    global _registered
+    if _registered is not None:
+        return _registered or None
+
+    paths = [p.resolve() for p in font_files(fonts_dir)]
+    if not paths:
+        _registered = ''
+        return None
+
+    entries = _load_entries(paths)
+    if entries is None:
+        entries = [font_manager.ttfFontProperty(font_manager.get_font(str(p))) for p in paths]
+        _save_entries(paths, entries)
+
+    manager = font_manager.fontManager
+    known = {entry.fname for entry in manager.ttflist}
+    manager.ttflist.extend(entry for entry in entries if entry.fname not in known)
+    manager._findfont_cached.cache_clear()
+
+    _registered = FONT_FAMILY
+    return FONT_FAMILY
+
+
+def preload_fonts(weights=PRELOAD_WEIGHTS):
+    """
+    باز کردن FT2Font وزن‌های پرکاربرد در کش get_font متپلات‌لیب
+
+    پیش از ساخت پردازه‌های کارگر صدا زده می‌شود تا کارگرها (با fork) همان
+    اشیای فونت بارگذاری‌شده را به ارث ببرند.
+    """
+    if register_fonts() is None:
+        return
+    for weight in weights:
+        path = FONTS_DIR / f'{FONT_FAMILY}-{weight}.ttf'
+        if path.exists():
+            font_manager.get_font(str(path.resolve()))
+
+
+def configure_fonts(rc_params):
+    """ثبت فونت‌ها و تنظیم خانواده فونت پیش‌فرض در rc_params"""
+    family = register_fonts()
+    if family is None:
+        print(f"Warning: No {FONT_PATTERN} fonts found in {FONTS_DIR}")
+        family = FALLBACK_FAMILY
+    rc_params['font.family'] = family
+    return family
@@ -0,0 +1,70 @@
+"""
+import تنبل ماژول‌های سنگین (matplotlib، geopandas، squarify و ...)
+هر ماژول فقط در اولین دسترسی به یکی از ویژگی‌هایش import می‌شود، بنابراین
+اجراهایی که به رسم نیاز ندارند هزینه import کتابخانه‌های رسم را نمی‌پردازند.
+"""
+
+import importlib
+import sys
+
+# نام ماژول -> نماینده تنبل آن (برای هر ماژول فقط یک نماینده ساخته می‌شود)
+_proxies = {}
+
+# نام ماژول -> توابعی که پس از اولین import با ماژول فراخوانی می‌شوند
+_hooks = {}
+
+
+class LazyModule:
+    """نماینده ماژولی که هنوز import نشده است"""
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, '_module', module)
+            for hook in _hooks.pop(self._name, []):
+                hook(module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """نماینده تنبل ماژول name (معادل import name، بدون اجرای آن تا اولین استفاده)"""
+    proxy = _proxies.get(name)
+    if proxy is None:
+        proxy = _proxies[name] = LazyModule(name)
+    return proxy
+
+
+def when_imported(name, hook):
+    """
+    اجرای hook(module) پس از اولین بارگذاری ماژول name از طریق lazy_import
+
+    اگر نماینده ماژول قبلاً بارگذاری شده باشد hook بلافاصله اجرا می‌شود.
+    """
+    proxy = _proxies.get(name)
+    if proxy is not None and proxy._module is not None:
+        hook(proxy._module)
+    else:
+        _hooks.setdefault(name, []).append(hook)
+
+
+def is_imported(name):
+    """آیا ماژول (به هر روشی) import شده است"""
+    return name in sys.modules
@@ -0,0 +1,160 @@
+"""
+هندسه ساده‌شده و کش‌شده استان‌ها برای نقشه استانی
+مرز استان‌ها یک بار به اندازه دقت تصویر خروجی ساده می‌شود (با حفظ مرزهای مشترک)،
+نقطه برچسب هر استان (داخل مرز، حتی برای استان‌های مقعر) از هندسه کامل محاسبه می‌شود و نتیجه به صورت WKB در کش Feather
+ذخیره می‌شود؛ اجراهای بعدی به جای تجزیه چند مگابایت GeoJSON همین کش را می‌خوانند.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import read_cached
+from lazy_imports import lazy_import
+from province_resolver import HASC_PROVINCES, NO_PROVINCE, PROVINCE_CODES, PROVINCES
+
+gpd = lazy_import('geopandas')
+shapely = lazy_import('shapely')
+
+# نسخه قالب کش؛ با تغییر روش ساده‌سازی یا ستون‌های ذخیره‌شده افزایش یابد
+GEOMETRY_VERSION = 2
+
+# اندازه و دقت نقشه خروجی (نمودار 3-11) که میزان ساده‌سازی از آن به دست می‌آید
+MAP_FIGSIZE = (20, 16)
+MAP_DPI = 400
+
+# بیشترین جابه‌جایی مجاز رأس‌ها بر حسب پیکسل تصویر خروجی
+PIXEL_TOLERANCE = 0.5
+
+# دقت جست‌وجوی نقطه برچسب بر حسب واحد مختصات (درجه)
+LABEL_TOLERANCE = 0.01
+
+LABEL_X = 'label_x'
+LABEL_Y = 'label_y'
+
+_WKB = 'geometry_wkb'
+
+# شناسه و نام هر عارضه (استان) در GeoJSON
+FEATURE_ID = 'HASC_1'
+FEATURE_NAME = 'NAME_1'
+
+# نسخه قالب شاخص اتصال؛ با تغییر HASC_PROVINCES یا ستون‌های شاخص افزایش یابد
+JOIN_INDEX_VERSION = 1
+PROVINCE_CODE = 'province_code'
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def simplify_tolerance(bounds, figsize=MAP_FIGSIZE, dpi=MAP_DPI, pixels=PIXEL_TOLERANCE):
+    """
+    تلورانس ساده‌سازی (بر حسب واحد مختصات) معادل pixels پیکسل در تصویر خروجی
+
+    اندازه پیکسل با فرض این‌که نقشه کل شکل را پر کند محاسبه می‌شود؛ نقشه واقعی
+    کوچک‌تر است، پس تلورانس محافظه‌کارانه است و تفاوت ساده‌سازی دیده نمی‌شود.
+    """
+    minx, miny, maxx, maxy = bounds
+    width, height = figsize
+    unit_per_pixel = max((maxx - minx) / (width * dpi), (maxy - miny) / (height * dpi))
+    return unit_per_pixel * pixels
+
+
+def _cache_key(figsize, dpi):
+    width, height = figsize
+    return f'simplified.v{GEOMETRY_VERSION}.{width}x{height}@{dpi}'
+
+# ==============================================================================
+# Geometry
+# ==============================================================================
+
+def build_province_geometry(path, figsize=MAP_FIGSIZE, dpi=MAP_DPI):
+    """
+    خواندن GeoJSON استان‌ها، محاسبه نقاط برچسب و ساده‌سازی مرزها
+
+    ساده‌سازی با shapely.coverage_simplify انجام می‌شود: هر مرز مشترک دو استان
+    فقط یک بار ساده می‌شود، پس بین استان‌ها شکاف یا هم‌پوشانی ایجاد نمی‌شود.
+    نقطه برچسب (LABEL_X، LABEL_Y) مرکز بزرگ‌ترین دایره محاط در مرز کامل (پیش از
+    ساده‌سازی)، یعنی همان polylabel است؛ برخلاف centroid همیشه داخل استان می‌افتد
+    (مرکز هندسی هرمزگان و آذربایجان غربی بیرون از مرزشان است).
+    """
+    geo = gpd.read_file(path)
+    geometry = geo.geometry.values
+
+    # خروجی پاره‌خطی از مرکز دایره تا مرز است؛ نقطه اول همان مرکز است
+    radii = shapely.maximum_inscribed_circle(geometry, LABEL_TOLERANCE)
+    label_points = shapely.get_point(radii, 0)
+    geo[LABEL_X] = shapely.get_x(label_points)
+    geo[LABEL_Y] = shapely.get_y(label_points)
+
+    tolerance = simplify_tolerance(geo.total_bounds, figsize, dpi)
+    geo = geo.set_geometry(gpd.GeoSeries(shapely.coverage_simplify(geometry, tolerance),
+                                         index=geo.index, crs=geo.crs))
+    return geo
+
+
+def read_province_geometry(path, figsize=MAP_FIGSIZE, dpi=MAP_DPI, cache_dir=None):
+    """
+    هندسه ساده‌شده استان‌ها از طریق کش Feather (معادل سریع gpd.read_file)
+
+    هندسه‌ها به صورت WKB ذخیره می‌شوند و کش با تغییر فایل منبع، اندازه یا دقت
+    نقشه یا GEOMETRY_VERSION دوباره ساخته می‌شود.
+    """
+    path = Path(path)
+
+    def reader():
+        geo = build_province_geometry(path, figsize, dpi)
+        frame = pd.DataFrame(geo.drop(columns=geo.geometry.name))
+        frame[_WKB] = shapely.to_wkb(geo.geometry.values)
+        return frame
+
+    frame = read_cached(path, _cache_key(figsize, dpi), reader, cache_dir)
+    # مختصات GeoJSON طبق استاندارد همیشه WGS84 است
+    geometry = gpd.GeoSeries.from_wkb(frame.pop(_WKB), index=frame.index, crs='EPSG:4326')
+    return gpd.GeoDataFrame(frame, geometry=geometry)
+
+# ==============================================================================
+# Join Index
+# ==============================================================================
+
+def build_join_index(path):
+    """
+    شاخص اتصال عارضه‌های GeoJSON به کد استان (PROVINCE_CODES) از روی شناسه HASC
+
+    ناهمخوانی‌ها همین‌جا (یک بار، هنگام ساخت شاخص) گزارش می‌شوند: شناسه‌های
+    ناشناخته، عارضه‌هایی که نام ثبت‌شده‌شان با نام استانِ شناسه‌شان یکی نیست و
+    استان‌هایی که هیچ عارضه‌ای روی نقشه ندارند (و پرداخت‌هایشان روی نقشه نمی‌آید).
+    """
+    features = pd.DataFrame(gpd.read_file(path, ignore_geometry=True))
+    names = features[FEATURE_ID].map(HASC_PROVINCES)
+    codes = names.map(PROVINCE_CODES).fillna(NO_PROVINCE).astype(np.int64)
+
+    for feature_id in features.loc[names.isna(), FEATURE_ID]:
+        print(f"Warning: {Path(path).name}: unknown province id {feature_id!r}")
+
+    if FEATURE_NAME in features:
+        mismatched = names.notna() & (features[FEATURE_NAME] != names)
+        for feature_id, label, name in zip(features.loc[mismatched, FEATURE_ID],
+                                           features.loc[mismatched, FEATURE_NAME],
+                                           names[mismatched]):
+            print(f"Warning: {Path(path).name}: {feature_id} is labelled '{label}' "
+                  f"but is '{name}'; using '{name}'")
+
+    present = set(codes)
+    missing = [name for code, name in enumerate(PROVINCES) if code not in present]
+    if missing:
+        print(f"Warning: {Path(path).name}: no map feature for {', '.join(missing)}")
+
+    return pd.DataFrame({FEATURE_ID: features[FEATURE_ID], PROVINCE_CODE: codes})
+
+
+def read_join_index(path, cache_dir=None):
+    """شاخص اتصال عارضه‌ها به کد استان از طریق کش Feather (فقط با تغییر GeoJSON دوباره ساخته می‌شود)"""
+    path = Path(path)
+    return read_cached(path, f'join.v{JOIN_INDEX_VERSION}', lambda: build_join_index(path), cache_dir)
+
+
+def feature_codes(geo, join_index):
+    """کد استان هر سطر geo (به ترتیب سطرها) با جست‌وجوی شناسه عارضه در شاخص اتصال"""
+    lookup = pd.Series(join_index[PROVINCE_CODE].to_numpy(), index=join_index[FEATURE_ID])
+    return lookup.reindex(geo[FEATURE_ID]).fillna(NO_PROVINCE).astype(np.int64).to_numpy()
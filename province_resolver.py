@@ -0,0 +1,183 @@
+"""
+تشخیص استان از نام دانشگاه
+جدول کلمات کلیدی یک بار به یک عبارت منظم کامپایل می‌شود و فقط روی نام‌های یکتا اجرا می‌شود
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_PROVINCE = 'نامشخص'
+OTHER_PROVINCE = 'سایر'
+
+# ==============================================================================
+# Province Codes
+# ==============================================================================
+
+# استان‌های کشور؛ کد هر استان جایگاه آن در این فهرست است (استان جدید فقط به انتها اضافه شود)
+PROVINCES = (
+    'آذربایجان شرقی', 'آذربایجان غربی', 'اردبیل', 'اصفهان', 'البرز', 'ایلام', 'بوشهر',
+    'تهران', 'چهارمحال و بختیاری', 'خراسان جنوبی', 'خراسان رضوی', 'خراسان شمالی',
+    'خوزستان', 'زنجان', 'سمنان', 'سیستان و بلوچستان', 'فارس', 'قزوین', 'قم', 'کردستان',
+    'کرمان', 'کرمانشاه', 'کهگیلویه و بویراحمد', 'گلستان', 'گیلان', 'لرستان', 'مازندران',
+    'مرکزی', 'هرمزگان', 'همدان', 'یزد',
+)
+PROVINCE_CODES = {name: code for code, name in enumerate(PROVINCES)}
+
+# کد نام‌هایی که استان نیستند ('سایر'، 'نامشخص' و ...)
+NO_PROVINCE = -1
+
+# شهرهایی که در PROVINCE_KEYWORDS به جای استان آمده‌اند -> استان آن‌ها
+CITY_PROVINCES = {
+    'شیراز': 'فارس',
+    'تبریز': 'آذربایجان شرقی',
+    'مشهد': 'خراسان رضوی',
+    'اهواز': 'خوزستان',
+}
+
+# کد HASC استان‌ها (شناسه عارضه‌ها در GeoJSON و TopoJSON نقشه) -> نام استان
+HASC_PROVINCES = {
+    'IR.AR': 'اردبیل', 'IR.BS': 'بوشهر', 'IR.CM': 'چهارمحال و بختیاری',
+    'IR.EA': 'آذربایجان شرقی', 'IR.ES': 'اصفهان', 'IR.FA': 'فارس', 'IR.GI': 'گیلان',
+    'IR.GO': 'گلستان', 'IR.HD': 'همدان', 'IR.HG': 'هرمزگان', 'IR.IL': 'ایلام',
+    'IR.KE': 'کرمان', 'IR.BK': 'کرمانشاه', 'IR.KZ': 'خوزستان', 'IR.KB': 'کهگیلویه و بویراحمد',
+    'IR.KD': 'کردستان', 'IR.LO': 'لرستان', 'IR.MK': 'مرکزی', 'IR.MN': 'مازندران',
+    'IR.KS': 'خراسان شمالی', 'IR.QZ': 'قزوین', 'IR.QM': 'قم', 'IR.KV': 'خراسان رضوی',
+    'IR.SM': 'سمنان', 'IR.SB': 'سیستان و بلوچستان', 'IR.KJ': 'خراسان جنوبی',
+    'IR.TH': 'تهران', 'IR.WA': 'آذربایجان غربی', 'IR.YA': 'یزد', 'IR.ZA': 'زنجان',
+    'IR.AL': 'البرز',
+}
+
+
+def province_codes(provinces):
+    """
+    کد استان برای آرایه‌ای از نام استان‌ها (خروجی extract_province)؛ NO_PROVINCE برای بقیه
+
+    نام شهرها (CITY_PROVINCES) کد استان خود را می‌گیرند.
+    """
+    codes, uniques = pd.factorize(pd.Series(provinces))
+    lookup = np.array([PROVINCE_CODES.get(CITY_PROVINCES.get(name, name), NO_PROVINCE)
+                       for name in uniques] + [NO_PROVINCE], dtype=np.int64)
+    return lookup[codes]
+
+# ==============================================================================
+# Compiling
+# ==============================================================================
+
+def _compile_keywords(keywords):
+    """
+    کامپایل فهرست مرتب (کلمه کلیدی، استان) به یک عبارت منظم
+
+    الگو یک lookahead روی همه کلمات است تا در هر موقعیت رشته، اولین کلمه
+    فهرست که از آن موقعیت شروع می‌شود پیدا شود (حتی اگر با کلمه دیگری هم‌پوشانی
+    داشته باشد). کمترین اولویت میان همه موقعیت‌ها همان نتیجه حلقه اصلی است.
+    """
+    priority = {}
+    for keyword, province in keywords:
+        priority.setdefault(keyword, (len(priority), province))
+
+    ordered = sorted(priority, key=lambda k: priority[k][0])
+    pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in ordered) + '))')
+    return pattern, priority
+
+
+def _first_match(pattern, priority, name):
+    matches = [priority[m.group(1)] for m in pattern.finditer(name)]
+    return min(matches)[1] if matches else None
+
+
+def make_province_resolver(province_keywords, fallback_provinces=()):
+    """
+    ساخت تابع تشخیص استان از جدول کلمات کلیدی
+
+    province_keywords دیکشنری استان -> فهرست کلمات است و ترتیب آن حفظ می‌شود:
+    نتیجه همان اولین استانی است که یکی از کلماتش در نام دانشگاه آمده باشد.
+    اگر هیچ کلمه‌ای پیدا نشود، نام استان‌های fallback_provinces (به همان ترتیب)
+    جستجو می‌شوند و در غیر این صورت 'سایر' برگردانده می‌شود.
+    نتایج هر نام حافظه‌گذاری (memoize) می‌شوند.
+    """
+    keyword_pattern, keyword_priority = _compile_keywords(
+        [(keyword, province) for province, keywords in province_keywords.items()
+         for keyword in keywords])
+    fallback_pattern, fallback_priority = _compile_keywords(
+        [(province, province) for province in fallback_provinces])
+
+    @lru_cache(maxsize=None)
+    def resolve(university_name):
+        if pd.isna(university_name):
+            return UNKNOWN_PROVINCE
+
+        name = str(university_name).strip()
+        province = _first_match(keyword_pattern, keyword_priority, name)
+        if province is None and fallback_provinces:
+            province = _first_match(fallback_pattern, fallback_priority, name)
+        return province if province is not None else OTHER_PROVINCE
+
+    return resolve
+
+# ==============================================================================
+# Vectorized Tagging
+# ==============================================================================
+
+def tag_provinces(names, resolve):
+    """
+    تشخیص استان برای یک ستون کامل از نام دانشگاه‌ها
+
+    ستون به کدهای دسته‌ای تبدیل می‌شود، استان فقط برای نام‌های یکتا محاسبه
+    و سپس با همان کدها به همه سطرها گسترش داده می‌شود.
+    """
+    codes, uniques = pd.factorize(names)
+    resolved = np.array([resolve(name) for name in uniques] + [UNKNOWN_PROVINCE], dtype=object)
+    # کد -1 (مقدار خالی) به آخرین عنصر یعنی 'نامشخص' اشاره می‌کند
+    return pd.Series(resolved[codes], index=names.index, name=names.name)
+
+# ==============================================================================
+# University Provinces
+# ==============================================================================
+
+# لیست استان‌های ایران (ترتیب مهم است: اولین تطابق برگردانده می‌شود)
+PROVINCE_KEYWORDS = {
+    'تهران': ['تهران', 'شهید بهشتی', 'علم و صنعت', 'امیرکبیر', 'صنعتی شریف', 'شریف', 'الزهرا', 'خواجه نصیر'],
+    'اصفهان': ['اصفهان', 'صنعتی اصفهان'],
+    'شیراز': ['شیراز'],
+    'فارس': ['شیراز'],
+    'تبریز': ['تبریز', 'صنعتی سهند'],
+    'آذربایجان شرقی': ['تبریز', 'سهند'],
+    'مشهد': ['مشهد', 'فردوسی'],
+    'خراسان رضوی': ['مشهد', 'فردوسی'],
+    'اهواز': ['اهواز', 'چمران'],
+    'خوزستان': ['اهواز', 'چمران', 'جندی شاپور'],
+    'کرمان': ['کرمان', 'باهنر', 'شهید باهنر'],
+    'گیلان': ['گیلان', 'رشت'],
+    'مازندران': ['مازندران', 'بابلسر', 'ساری', 'نوشیروانی', 'بابل'],
+    'کرمانشاه': ['کرمانشاه', 'رازی'],
+    'همدان': ['همدان', 'بوعلی سینا'],
+    'قزوین': ['قزوین', 'امام خمینی'],
+    'یزد': ['یزد'],
+    'سمنان': ['سمنان'],
+    'اردبیل': ['اردبیل', 'محقق اردبیلی'],
+    'زنجان': ['زنجان'],
+    'کردستان': ['کردستان', 'سنندج'],
+    'آذربایجان غربی': ['ارومیه', 'ارمیه'],
+    'لرستان': ['لرستان', 'خرم آباد'],
+    'ایلام': ['ایلام'],
+    'بوشهر': ['بوشهر', 'خلیج فارس'],
+    'هرمزگان': ['هرمزگان', 'بندرعباس'],
+    'سیستان و بلوچستان': ['سیستان', 'بلوچستان', 'زاهدان'],
+    'خراسان شمالی': ['بجنورد'],
+    'خراسان جنوبی': ['بیرجند'],
+    'البرز': ['البرز', 'کرج'],
+    'قم': ['قم'],
+    'چهارمحال و بختیاری': ['شهرکرد'],
+    'کهگیلویه و بویراحمد': ['یاسوج'],
+    'گلستان': ['گلستان', 'گرگان']
+}
+
+# برخی استان‌ها به جای نام شهر
+MAIN_PROVINCES = ['تهران', 'اصفهان', 'فارس', 'خوزستان', 'خراسان رضوی',
+                  'آذربایجان شرقی', 'مازندران', 'کرمان', 'گیلان']
+
+# استخراج استان از نام دانشگاه (جدول فصل سوم و مکعب تجمیع)
+extract_province = make_province_resolver(PROVINCE_KEYWORDS, MAIN_PROVINCES)
@@ -0,0 +1,231 @@
+"""
+خلاصه چندکی (quantile sketch) ادغام‌پذیر برای توزیع مبالغ
+یک KLL قطعی: مقادیر در سطح‌هایی با وزن 2^h نگهداری می‌شوند و هر سطح پر، مرتب و
+نیمی از آن با وزن دو برابر به سطح بالاتر منتقل می‌شود. حجم خلاصه مستقل از تعداد
+مقادیر (حدود 3k عدد) است، دو خلاصه با جمع سطح‌هایشان ادغام می‌شوند و تا k مقدار
+خلاصه دقیق است (همان np.percentile). تعداد، مجموع، کمینه و بیشینه همیشه دقیق‌اند.
+"""
+
+import numpy as np
+import pandas as pd
+
+# ظرفیت بالاترین سطح؛ خطای رتبه حدود 1.7/k است
+DEFAULT_K = 1024
+
+# ضریب کاهش ظرفیت سطح‌های پایین‌تر و کمینه ظرفیت هر سطح (طبق KLL)
+_DECAY = 2 / 3
+_MIN_CAPACITY = 8
+
+# ضریب بازه اطمینان میانه در نمودار جعبه‌ای (همان matplotlib)
+_NOTCH = 1.57
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def _capacity(k, height, level):
+    return max(_MIN_CAPACITY, int(np.ceil(k * _DECAY ** (height - 1 - level))))
+
+
+def _compress(sketch):
+    """فشرده‌سازی سطح‌ها تا وقتی اندازه خلاصه از ظرفیت کل بیشتر است"""
+    levels = sketch['levels']
+    k = sketch['k']
+    while True:
+        height = len(levels)
+        if sum(len(items) for items in levels) <= sum(_capacity(k, height, h) for h in range(height)):
+            return sketch
+
+        # پایین‌ترین سطحی که پر شده فشرده می‌شود
+        level = next(h for h in range(height) if len(levels[h]) >= _capacity(k, height, h))
+        if level + 1 == height:
+            levels.append(np.zeros(0))
+
+        items = np.sort(levels[level])
+        # در طول فرد، یک مقدار در همین سطح می‌ماند تا وزن کل حفظ شود
+        keep, items = items[:len(items) % 2], items[len(items) % 2:]
+        # انتخاب یک در میان با جابه‌جایی متناوب (قطعی، بدون مولد تصادفی)
+        offset = sketch['compactions'] % 2
+        sketch['compactions'] += 1
+        levels[level + 1] = np.concatenate([levels[level + 1], items[offset::2]])
+        levels[level] = keep
+
+
+def _weighted_items(sketch):
+    """مقادیر نگهداری‌شده به ترتیب صعودی با وزن هر کدام"""
+    levels = sketch['levels']
+    values = np.concatenate(levels)
+    weights = np.concatenate([np.full(len(items), 2 ** h, dtype=np.int64)
+                              for h, items in enumerate(levels)])
+    order = np.argsort(values, kind='stable')
+    return values[order], weights[order]
+
+# ==============================================================================
+# Building and Merging
+# ==============================================================================
+
+def new_sketch(k=DEFAULT_K):
+    """خلاصه خالی"""
+    return {'k': k, 'levels': [np.zeros(0)], 'n': 0, 'sum': 0.0,
+            'min': np.nan, 'max': np.nan, 'compactions': 0}
+
+
+def update_sketch(sketch, values):
+    """افزودن یک دسته مقدار (مقادیر خالی نادیده گرفته می‌شوند)"""
+    if isinstance(values, pd.Series):
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return sketch
+
+    sketch['n'] += len(values)
+    sketch['sum'] += values.sum()
+    sketch['min'] = np.fmin(sketch['min'], values.min())
+    sketch['max'] = np.fmax(sketch['max'], values.max())
+    sketch['levels'][0] = np.concatenate([sketch['levels'][0], values])
+    return _compress(sketch)
+
+
+def sketch_of(values, k=DEFAULT_K):
+    """خلاصه یک آرایه"""
+    return update_sketch(new_sketch(k), values)
+
+
+def merge_sketches(first, second):
+    """ادغام دو خلاصه (مثلاً دو دسته یا دو سال) در یک خلاصه جدید"""
+    if first['k'] != second['k']:
+        raise ValueError(f"Cannot merge sketches with k={first['k']} and k={second['k']}")
+
+    height = max(len(first['levels']), len(second['levels']))
+    levels = [np.concatenate([s['levels'][h] for s in (first, second) if h < len(s['levels'])])
+              for h in range(height)]
+    merged = {
+        'k': first['k'],
+        'levels': levels,
+        'n': first['n'] + second['n'],
+        'sum': first['sum'] + second['sum'],
+        'min': np.fmin(first['min'], second['min']),
+        'max': np.fmax(first['max'], second['max']),
+        'compactions': first['compactions'] + second['compactions'],
+    }
+    return _compress(merged)
+
+
+def is_exact(sketch):
+    """آیا هنوز همه مقادیر (بدون فشرده‌سازی) در خلاصه هستند"""
+    return len(sketch['levels']) == 1
+
+# ==============================================================================
+# Queries
+# ==============================================================================
+
+def sketch_quantiles(sketch, quantiles, divisor=1):
+    """
+    چندک‌ها با درون‌یابی خطی (همان روش پیش‌فرض np.percentile روی مقادیر وزن‌دار)
+
+    هر مقدار با وزن w مانند w نسخه از آن شمرده می‌شود؛ در خلاصه دقیق نتیجه
+    دقیقاً برابر np.percentile روی مقادیر تقسیم بر divisor است.
+    """
+    quantiles = np.asarray(quantiles, dtype=float)
+    if not sketch['n']:
+        return np.full(quantiles.shape, np.nan)
+
+    values, weights = _weighted_items(sketch)
+    values = values / divisor
+    cumulative = np.cumsum(weights)
+    position = quantiles * (cumulative[-1] - 1)
+    lower = np.floor(position)
+    below = values[np.searchsorted(cumulative, lower, side='right')]
+    above = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+    return below + (position - lower) * (above - below)
+
+
+def summary_stats(sketch, divisor=1):
+    """تعداد، کمینه، چارک‌ها، میانه، میانگین و بیشینه (مقادیر تقسیم بر divisor)"""
+    q1, median, q3 = sketch_quantiles(sketch, [0.25, 0.5, 0.75], divisor)
+    return {
+        'count': sketch['n'],
+        'min': sketch['min'] / divisor,
+        'q1': q1,
+        'median': median,
+        'mean': sketch['sum'] / sketch['n'] / divisor if sketch['n'] else np.nan,
+        'q3': q3,
+        'max': sketch['max'] / divisor,
+    }
+
+
+def box_stats(sketch, divisor=1, whis=1.5, label=None):
+    """
+    آمار نمودار جعبه‌ای برای Axes.bxp (معادل cbook.boxplot_stats بدون خواندن داده خام)
+
+    سبیل‌ها و نقاط پرت از مقادیر نگهداری‌شده خلاصه (به علاوه کمینه و بیشینه دقیق)
+    به دست می‌آیند، پس تعداد نقاط پرت رسم‌شده محدود به اندازه خلاصه است.
+    مقادیر بر divisor تقسیم می‌شوند (مثلاً 1000 برای میلیون به میلیارد ریال).
+    """
+    values = np.sort(np.concatenate(sketch['levels']))
+    if not is_exact(sketch):
+        values = np.unique(np.concatenate([values, [sketch['min'], sketch['max']]]))
+    values = values / divisor
+
+    stats = {} if label is None else {'label': label}
+    if not sketch['n']:
+        return {**stats, 'fliers': np.array([]), 'mean': np.nan, 'med': np.nan, 'q1': np.nan,
+                'q3': np.nan, 'iqr': np.nan, 'cilo': np.nan, 'cihi': np.nan,
+                'whislo': np.nan, 'whishi': np.nan}
+
+    q1, median, q3 = sketch_quantiles(sketch, [0.25, 0.5, 0.75], divisor)
+    iqr = q3 - q1
+
+    low, high = q1 - whis * iqr, q3 + whis * iqr
+    inside_high = values[values <= high]
+    whishi = q3 if not len(inside_high) or inside_high.max() < q3 else inside_high.max()
+    inside_low = values[values >= low]
+    whislo = q1 if not len(inside_low) or inside_low.min() > q1 else inside_low.min()
+
+    notch = _NOTCH * iqr / np.sqrt(sketch['n'])
+    return {
+        **stats,
+        'mean': sketch['sum'] / sketch['n'] / divisor,
+        'med': median,
+        'q1': q1,
+        'q3': q3,
+        'iqr': iqr,
+        'cilo': median - notch,
+        'cihi': median + notch,
+        'whislo': whislo,
+        'whishi': whishi,
+        'fliers': np.concatenate([values[values < whislo], values[values > whishi]]),
+    }
+
+# ==============================================================================
+# Storage
+# ==============================================================================
+
+def sketch_to_frame(sketch):
+    """جدول مقادیر خلاصه (سطح، مقدار) برای ذخیره در کش؛ مقادیر دقیق در attrs می‌مانند"""
+    frame = pd.DataFrame({
+        'level': np.concatenate([np.full(len(items), h, dtype=np.int8)
+                                 for h, items in enumerate(sketch['levels'])]),
+        'value': np.concatenate(sketch['levels']),
+    })
+    frame.attrs.update({name: int(sketch[name]) for name in ('k', 'n', 'compactions')})
+    frame.attrs.update({name: float(sketch[name]) for name in ('sum', 'min', 'max')})
+    frame.attrs['height'] = len(sketch['levels'])
+    return frame
+
+
+def sketch_from_frame(frame):
+    """بازسازی خلاصه از خروجی sketch_to_frame"""
+    attrs = frame.attrs
+    levels = frame['level'].to_numpy()
+    values = frame['value'].to_numpy(dtype=float)
+    return {
+        'k': int(attrs['k']),
+        'levels': [values[levels == h] for h in range(int(attrs['height']))],
+        'n': int(attrs['n']),
+        'sum': float(attrs['sum']),
+        'min': float(attrs['min']),
+        'max': float(attrs['max']),
+        'compactions': int(attrs['compactions']),
+    }
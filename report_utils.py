@@ -0,0 +1,248 @@
+"""
+ابزارهای مشترک گزارش ساتع
+تنظیم فونت، توابع کمکی متن فارسی و ذخیره نمودارها که در همه فصل‌ها استفاده می‌شوند
+"""
+
+import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from font_setup import configure_fonts
+from lazy_imports import lazy_import, when_imported
+
+# کتابخانه‌های رسم و شکل‌دهی متن فقط هنگام اولین استفاده import می‌شوند
+matplotlib = lazy_import('matplotlib')
+plt = lazy_import('matplotlib.pyplot')
+ticker = lazy_import('matplotlib.ticker')
+backend_agg = lazy_import('matplotlib.backends.backend_agg')
+PIL_Image = lazy_import('PIL.Image')
+PngImagePlugin = lazy_import('PIL.PngImagePlugin')
+
+# To show Farsi Font
+arabic_reshaper = lazy_import('arabic_reshaper')
+bidi_algorithm = lazy_import('bidi.algorithm')
+
+# ==============================================================================
+# Font Configuration
+# ==============================================================================
+
+def configure_matplotlib(pyplot):
+    """ثبت فونت‌های Vazirmatn مخزن و تنظیم rcParams؛ هنگام اولین import شدن pyplot اجرا می‌شود"""
+    configure_fonts(pyplot.rcParams)
+    pyplot.rcParams['axes.unicode_minus'] = False
+    pyplot.rcParams['figure.autolayout'] = True
+
+when_imported('matplotlib.pyplot', configure_matplotlib)
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+# حداکثر تعداد متن‌های شکل‌دهی‌شده در حافظه (برچسب‌ها بین نمودارها و فصل‌ها تکرار می‌شوند)
+SHAPING_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=SHAPING_CACHE_SIZE)
+def _shape_text(text):
+    try:
+        reshaped_text = arabic_reshaper.reshape(text)
+        bidi_text = bidi_algorithm.get_display(reshaped_text)
+        return bidi_text
+    except Exception as e:
+        print(f"Warning: Could not reshape text '{text}': {e}")
+        return text
+
+def fix_persian_text(text):
+    """تبدیل متن فارسی به فرمت قابل نمایش (با کش LRU)"""
+    if text is None or str(text).strip() == '':
+        return ''
+    return _shape_text(str(text))
+
+def fix_persian_labels(names, max_chars_per_line=None, max_lines=2):
+    """
+    شکل‌دهی یک ستون کامل از نام‌ها برای برچسب محورها و حاشیه‌نویسی‌ها
+
+    هر نام یکتا فقط یک بار (در صورت نیاز پس از format_text_multiline) شکل‌دهی
+    می‌شود و نتیجه به صورت فهرست هم‌ترتیب با ورودی برگردانده می‌شود.
+    """
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=False)
+    if max_chars_per_line is not None:
+        shaped = [fix_persian_text(format_text_multiline(name, max_chars_per_line, max_lines))
+                  for name in uniques]
+    else:
+        shaped = [fix_persian_text(name) for name in uniques]
+    return [shaped[code] for code in codes]
+
+def shaping_cache_info():
+    """آمار کش شکل‌دهی متن (hits، misses، اندازه)"""
+    return _shape_text.cache_info()
+
+def format_text_multiline(text, max_chars_per_line=20, max_lines=2):
+    """تقسیم متن به چند خط با محدودیت تعداد کاراکتر"""
+    if not text or pd.isna(text):
+        return ''
+
+    text = str(text).strip()
+    words = text.split()
+    lines = []
+    current_line = []
+    current_length = 0
+
+    for word in words:
+        word_length = len(word)
+        if current_length + word_length + len(current_line) <= max_chars_per_line:
+            current_line.append(word)
+            current_length += word_length
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+                if len(lines) >= max_lines:
+                    break
+            current_line = [word]
+            current_length = word_length
+
+    if current_line and len(lines) < max_lines:
+        lines.append(' '.join(current_line))
+
+    # اگر متن بیشتر از حد مجاز بود، سه نقطه اضافه کن
+    if len(words) > sum(len(line.split()) for line in lines):
+        if lines:
+            lines[-1] = lines[-1][:max_chars_per_line-3] + '...'
+
+    return '\n'.join(lines)
+
+# جدول تبدیل ارقام انگلیسی به فارسی (یک بار ساخته می‌شود)
+PERSIAN_DIGITS = str.maketrans('0123456789.,%', '۰۱۲۳۴۵۶۷۸۹.،٪')
+
+def convert_to_persian_number(number):
+    """تبدیل اعداد انگلیسی به فارسی"""
+    return str(number).translate(PERSIAN_DIGITS)
+
+def format_number_with_separator(number, use_persian=True):
+    """قالب‌بندی اعداد با جداکننده هزارگان"""
+    if pd.isna(number):
+        return convert_to_persian_number('0') if use_persian else '0'
+    formatted = f'{number:,.0f}' if isinstance(number, (int, float)) else str(number)
+    if use_persian:
+        return convert_to_persian_number(formatted)
+    return formatted
+
+def format_persian_numbers(values, thousands=True, truncate=True):
+    """
+    قالب‌بندی یک آرایه عددی به رشته‌های فارسی در یک فراخوانی
+
+    با truncate=True اعداد مانند int() به سمت صفر بریده می‌شوند (رفتار قبلی
+    برچسب تیک‌ها) و در غیر این صورت مانند format_number_with_separator گرد
+    می‌شوند. تبدیل ارقام یک بار روی متن پیوسته همه اعداد انجام می‌شود.
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    if truncate:
+        values = np.trunc(values).astype(np.int64)
+        template = '{:,}' if thousands else '{}'
+    else:
+        template = '{:,.0f}' if thousands else '{:.0f}'
+    if values.size == 0:
+        return []
+    return '\n'.join(map(template.format, values.tolist())).translate(PERSIAN_DIGITS).split('\n')
+
+@lru_cache(maxsize=None)
+def _persian_formatter_class():
+    """ساخت کلاس Formatter در اولین استفاده (تا import این ماژول به matplotlib نیاز نداشته باشد)"""
+
+    class _PersianNumberFormatter(ticker.Formatter):
+
+        def __init__(self, thousands=True, truncate=True):
+            self.thousands = thousands
+            self.truncate = truncate
+
+        def __call__(self, x, pos=None):
+            return format_persian_numbers([x], self.thousands, self.truncate)[0]
+
+        def format_ticks(self, values):
+            return format_persian_numbers(values, self.thousands, self.truncate)
+
+    return _PersianNumberFormatter
+
+def PersianNumberFormatter(thousands=True, truncate=True):
+    """
+    قالب‌بندی برچسب تیک‌ها با ارقام فارسی هنگام رسم
+
+    به جای get_yticks/set_yticklabels روی محور تنظیم می‌شود تا برچسب‌ها
+    همیشه با تیک‌های نهایی محور هم‌خوان باشند.
+    """
+    return _persian_formatter_class()(thousands, truncate)
+
+# ==============================================================================
+# Saving Figures
+# ==============================================================================
+
+class _NullWriter:
+    """مقصد خالی برای savefig؛ فقط رسم روی بوم Agg مورد نیاز است"""
+
+    def write(self, data):
+        return len(data)
+
+    def seek(self, *args):
+        return 0
+
+
+def _encode_png(image, path, dpi):
+    # همان متادیتایی که matplotlib در PNG می‌نویسد
+    pnginfo = PngImagePlugin.PngInfo()
+    pnginfo.add_text('Software', f'Matplotlib version{matplotlib.__version__}, https://matplotlib.org/')
+    image.save(path, format='png', dpi=(dpi, dpi), pnginfo=pnginfo)
+
+
+def _encode_jpg(image, path, dpi, quality):
+    # JPEG کانال آلفا ندارد؛ مثل matplotlib روی زمینه سفید ترکیب می‌شود
+    background = PIL_Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, image)
+    pil_kwargs = {'format': 'jpeg', 'dpi': (dpi, dpi)}
+    if quality is not None:
+        pil_kwargs['quality'] = quality
+    background.save(path, **pil_kwargs)
+
+
+def render_figure(fig, dpi=400):
+    """رسم شکل (با bbox_inches='tight') روی بوم Agg و برگرداندن تصویر RGBA آن"""
+    fig.savefig(_NullWriter(), format='rgba', dpi=dpi, bbox_inches='tight', facecolor='white')
+    rgba = np.asarray(fig.canvas.buffer_rgba())
+    return PIL_Image.frombuffer('RGBA', (rgba.shape[1], rgba.shape[0]), rgba, 'raw', 'RGBA', 0, 1)
+
+
+def encode_figure(image, path, dpi=400, jpg_quality=95, parallel=True):
+    """کدگذاری تصویر رسم‌شده به PNG و JPG (path بدون پسوند)"""
+    path = Path(path)
+    png_path = path.with_suffix('.png')
+    jpg_path = path.with_suffix('.jpg')
+
+    if parallel:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(_encode_png, image, png_path, dpi),
+                       pool.submit(_encode_jpg, image, jpg_path, dpi, jpg_quality)]
+            for future in futures:
+                future.result()
+    else:
+        _encode_png(image, png_path, dpi)
+        _encode_jpg(image, jpg_path, dpi, jpg_quality)
+
+
+def save_figure(fig, path, dpi=400, jpg_quality=95, parallel=True):
+    """
+    ذخیره نمودار به صورت PNG و JPG با یک بار رسم
+
+    شکل یک بار (با bbox_inches='tight') روی بوم Agg رسم می‌شود و هر دو فایل
+    از همان بافر RGBA با Pillow کدگذاری می‌شوند؛ با parallel=True دو کدگذاری
+    در دو نخ هم‌زمان انجام می‌شوند. path بدون پسوند داده می‌شود.
+    """
+    path = Path(path)
+
+    if not isinstance(fig.canvas, backend_agg.FigureCanvasAgg):
+        fig.savefig(path.with_suffix('.png'), dpi=dpi, bbox_inches='tight', facecolor='white')
+        pil_kwargs = {'quality': jpg_quality} if jpg_quality is not None else None
+        fig.savefig(path.with_suffix('.jpg'), dpi=dpi, bbox_inches='tight', facecolor='white',
+                    pil_kwargs=pil_kwargs)
+        return
+
+    encode_figure(render_figure(fig, dpi), path, dpi, jpg_quality, parallel)
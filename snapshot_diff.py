@@ -0,0 +1,121 @@
+"""
+مقایسه دو برداشت (snapshot) از یک جدول و به‌روزرسانی افزایشی تجمیع‌ها
+سطرهای درج‌شده، حذف‌شده و تغییر یافته بر اساس کلید قرارداد (یا در نبود کلید،
+محتوای کامل سطر) پیدا می‌شوند و فقط همین تفاوت‌ها روی جمع‌ها و تعدادهای ذخیره‌شده
+اعمال می‌شوند.
+"""
+
+import pandas as pd
+
+# تجمیع‌هایی که با جمع و تفریق قابل به‌روزرسانی هستند
+ADDITIVE = {'sum', 'count', 'size'}
+
+_OCCURRENCE = '_occurrence'
+
+# ==============================================================================
+# Diffing
+# ==============================================================================
+
+def row_hashes(df, columns=None):
+    """هش ۶۴ بیتی محتوای هر سطر (مستقل از شماره سطر و فرهنگ لغت ستون‌های Categorical)"""
+    columns = list(columns) if columns is not None else list(df.columns)
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def diff_snapshots(old, new, key=None, columns=None):
+    """
+    تفاوت دو برداشت از یک جدول
+
+    با key (ستون یا فهرست ستون‌های کلید یکتا): inserted و deleted سطرهای کلیدهای
+    جدید و حذف‌شده‌اند و updated_old / updated_new نسخه قبلی و جدید سطرهایی که
+    یکی از ستون‌های columns (پیش‌فرض همه ستون‌ها) در آن‌ها تغییر کرده است.
+    بدون key سطرها به صورت چندمجموعه مقایسه می‌شوند (سطرهای تکراری جداگانه
+    شمرده می‌شوند) و تغییر یک سطر به صورت یک حذف و یک درج دیده می‌شود.
+    """
+    columns = list(columns) if columns is not None else list(new.columns)
+    old_hash = row_hashes(old, columns)
+    new_hash = row_hashes(new, columns)
+
+    if key is None:
+        # کلید مصنوعی: (هش سطر، شماره تکرار آن هش)
+        old_keys = pd.DataFrame({'hash': old_hash}).assign(
+            **{_OCCURRENCE: lambda d: d.groupby('hash').cumcount()})
+        new_keys = pd.DataFrame({'hash': new_hash}).assign(
+            **{_OCCURRENCE: lambda d: d.groupby('hash').cumcount()})
+        old_index = pd.MultiIndex.from_frame(old_keys)
+        new_index = pd.MultiIndex.from_frame(new_keys)
+        return {
+            'inserted': new[~new_index.isin(old_index)],
+            'deleted': old[~old_index.isin(new_index)],
+            'updated_old': old.iloc[:0],
+            'updated_new': new.iloc[:0],
+        }
+
+    key = [key] if isinstance(key, str) else list(key)
+    for name, df in (('old', old), ('new', new)):
+        if df.duplicated(key).any():
+            raise ValueError(f"{name} snapshot has duplicate keys {key}")
+
+    old_index = pd.MultiIndex.from_frame(old[key])
+    new_index = pd.MultiIndex.from_frame(new[key])
+    in_old = new_index.isin(old_index)
+    in_new = old_index.isin(new_index)
+
+    # هش سطرهای مشترک به ترتیب کلید مقایسه می‌شود
+    common_old = pd.Series(old_hash[in_new], index=old_index[in_new])
+    common_new = pd.Series(new_hash[in_old], index=new_index[in_old])
+    changed = common_new != common_old.reindex(common_new.index)
+    changed_keys = common_new.index[changed.to_numpy()]
+
+    return {
+        'inserted': new[~in_old],
+        'deleted': old[~in_new],
+        'updated_old': old[old_index.isin(changed_keys)],
+        'updated_new': new[new_index.isin(changed_keys)],
+    }
+
+
+def diff_counts(diff):
+    """تعداد سطرهای هر نوع تغییر"""
+    return {
+        'inserted': len(diff['inserted']),
+        'updated': len(diff['updated_new']),
+        'deleted': len(diff['deleted']),
+    }
+
+
+def delta_rows(diff):
+    """سطرهایی که باید به تجمیع اضافه (درج و نسخه جدید) و از آن کم (حذف و نسخه قبلی) شوند"""
+    added = pd.concat([diff['inserted'], diff['updated_new']], ignore_index=True)
+    removed = pd.concat([diff['deleted'], diff['updated_old']], ignore_index=True)
+    return added, removed
+
+# ==============================================================================
+# Applying Deltas
+# ==============================================================================
+
+def apply_delta(aggregate, added, removed, by, measures):
+    """
+    به‌روزرسانی جدول تجمیع (خروجی groupby(by).agg(**measures).reset_index())
+
+    سهم سطرهای added اضافه و سهم سطرهای removed کم می‌شود؛ هزینه متناسب با
+    تعداد سطرهای تغییر یافته و تعداد گروه‌هاست، نه کل جدول. گروه‌هایی که تعداد
+    سطرشان صفر شود حذف می‌شوند. فقط sum، count و size پشتیبانی می‌شوند.
+    """
+    unsupported = [func for _, func in measures.values() if func not in ADDITIVE]
+    if unsupported:
+        raise ValueError(f"Non-additive aggregations cannot be updated: {unsupported}")
+
+    by = list(by)
+    parts = [aggregate.set_index(by)[list(measures)]]
+    for rows, sign in ((added, 1), (removed, -1)):
+        if len(rows):
+            part = rows.groupby(by, dropna=False, sort=False, observed=True).agg(**measures)
+            parts.append(part * sign)
+
+    updated = pd.concat(parts).groupby(level=list(range(len(by))), dropna=False, observed=True).sum()
+
+    counts = [name for name, (_, func) in measures.items() if func in ('count', 'size')]
+    if counts:
+        updated = updated[(updated[counts] != 0).any(axis=1)]
+    return updated.reset_index()
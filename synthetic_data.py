@@ -0,0 +1,289 @@
+"""
+تولید داده مصنوعی ساتع برای آزمون مقیاس
+جداولی هم‌شکل Credits_Contracts و Credits_Payments (با همان نام ستون‌های فارسی)
+با توزیع‌های دم‌سنگین برای مبالغ تولید و به صورت تکه‌تکه در Parquet نوشته می‌شوند.
+
+اجرا:
+    python synthetic_data.py --subjects 200000 --universities 3000
+    python synthetic_data.py --subjects 50000 --years 1402 1403 1404 --out data/synthetic
+"""
+
+import argparse
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# ==============================================================================
+# Settings
+# ==============================================================================
+
+OUTPUT_DIR = Path('./data/synthetic')
+
+CONTRACTS_FILE = 'Credits_Contracts.parquet'
+PAYMENTS_FILE = 'Credits_Payments.parquet'
+
+# دستگاه‌های واقعی؛ برای تعداد بیشتر 'دستگاه N' اضافه می‌شود
+DEVICES = ['نیرو', 'نفت', 'صنعت', 'راه و شهرسازی', 'دفاع', 'اقتصاد', 'جهاد کشاورزی',
+           'ارتباطات و فناوری اطلاعات', 'انرژی اتمی', 'بهداشت', 'آموزش و پرورش', 'ورزش',
+           'میراث فرهنگی', 'سایر دستگاه ها', 'بانک مرکزی', 'قوه قضائیه', 'تعاون',
+           'فرهنگ و ارشاد', 'سازمان صدا و سیما']
+
+# شهرهای دانشگاهی (کلمات کلیدی تشخیص استان در season_3 و test)
+CITIES = ['تهران', 'اصفهان', 'شیراز', 'تبریز', 'مشهد', 'اهواز', 'کرمان', 'رشت', 'بابل',
+          'کرمانشاه', 'همدان', 'قزوین', 'یزد', 'سمنان', 'اردبیل', 'زنجان', 'سنندج', 'ارومیه',
+          'خرم آباد', 'ایلام', 'بوشهر', 'بندرعباس', 'زاهدان', 'بجنورد', 'بیرجند', 'کرج',
+          'قم', 'شهرکرد', 'یاسوج', 'گرگان', 'اراک']
+
+SUBJECT_TYPES = ['شرکت سهامی', 'سازمان', 'شرکت ملی', 'بانک', 'صندوق', 'شرکت مادر تخصصی']
+
+# پارامترهای توزیع (مبالغ به میلیون ریال، نزدیک به داده واقعی ۱۴۰۴)
+ZERO_CREDIT_SHARE = 0.3          # سهم مشمولین بدون اعتبار
+CREDIT_MEDIAN = 800              # میانه اعتبار غیر صفر
+CREDIT_SIGMA = 2.5               # پراکندگی لگ-نرمال اعتبار
+CONTRACT_MEDIAN = 10000          # میانه مبلغ قرارداد
+CONTRACT_SIGMA = 1.0
+NO_CONTRACT_SHARE = 0.9          # سهم مشمولین بدون قرارداد
+MISSING_DEVICE_SHARE = 0.06      # سهم سطرهای بدون دستگاه
+PAID_SHARE = 0.8                 # احتمال پرداخت برای هر قرارداد
+EXTRA_PAYMENT_SHARE = 0.3        # پرداخت به دانشگاهی بدون قرارداد امسال (قراردادهای سال قبل)
+YEAR_GROWTH_SIGMA = 0.3          # تغییر سالانه اعتبار هر مشمول
+
+# کوچک‌ترین بازه شماره‌های طبقه‌بندی (از 200100)
+CODE_SPAN = 101400
+
+# ==============================================================================
+# Entities
+# ==============================================================================
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def make_universities(n_universities):
+    """نام دانشگاه‌ها با شهرهای واقعی تا تشخیص استان روی آن‌ها کار کند"""
+    names = []
+    for i in range(n_universities):
+        city = CITIES[i % len(CITIES)]
+        copy = i // len(CITIES)
+        names.append(f'دانشگاه {city}' if copy == 0 else f'دانشگاه {city} {copy}')
+    return np.array(names, dtype=object)
+
+
+def make_devices(n_devices):
+    extra = [f'دستگاه {i}' for i in range(len(DEVICES) + 1, n_devices + 1)]
+    return np.array((DEVICES + extra)[:n_devices], dtype=object)
+
+
+def _code_stride(span):
+    """گام پراکنده‌سازی شماره‌ها: اولین عدد فرد از 0.618 × span که نسبت به span اول باشد"""
+    stride = int(span * 0.618) | 1
+    while math.gcd(stride, span) != 1:
+        stride += 2
+    return stride
+
+
+def make_subjects(rng, n_subjects, devices, years, chunk_size):
+    """
+    تولید تکه‌تکه مشمولین: شماره طبقه‌بندی، نام، دستگاه و اعتبار هر سال
+
+    هر تکه حداکثر chunk_size مشمول دارد و فقط همان تکه در حافظه است.
+    اعتبار سال اول لگ-نرمال (با سهمی صفر) است و سال‌های بعد با یک ضریب
+    تصادفی لگ-نرمال از سال قبل به دست می‌آیند. شماره‌ها یکتا و پراکنده‌اند
+    (i × گام به پیمانه بازه شماره‌ها).
+    """
+    span = max(n_subjects, CODE_SPAN)
+    stride = _code_stride(span)
+    device_weights = _zipf_weights(len(devices))
+
+    for start in range(0, n_subjects, chunk_size):
+        index = np.arange(start, min(start + chunk_size, n_subjects))
+        n = len(index)
+
+        device = rng.choice(devices, size=n, p=device_weights)
+        device[rng.random(n) < MISSING_DEVICE_SHARE] = None
+
+        types = rng.choice(SUBJECT_TYPES, size=n)
+        names = np.array([f'{t} شماره {i + 1}' for i, t in zip(index, types)], dtype=object)
+
+        credits = {}
+        base = rng.lognormal(np.log(CREDIT_MEDIAN), CREDIT_SIGMA, n)
+        base[rng.random(n) < ZERO_CREDIT_SHARE] = 0
+        for year in years:
+            credits[year] = np.round(base, 1)
+            base = base * rng.lognormal(0, YEAR_GROWTH_SIGMA, n)
+
+        yield {
+            'code': 200100 + index * stride % span,
+            'name': names,
+            'device': device,
+            'credits': credits,
+        }
+
+# ==============================================================================
+# Rows
+# ==============================================================================
+
+def _partner_rows(rng, n_subjects, universities, mean_partners):
+    """
+    سطرهای مشمول × دانشگاه: تعداد دانشگاه طرف قرارداد هر مشمول هندسی (دم‌سنگین)
+    و انتخاب دانشگاه‌ها با وزن Zipf (چند دانشگاه بزرگ سهم بیشتری دارند)
+    """
+    has_contract = rng.random(n_subjects) >= NO_CONTRACT_SHARE
+    counts = np.where(has_contract, rng.geometric(1 / mean_partners, n_subjects), 0)
+    subject_idx = np.repeat(np.arange(n_subjects), counts)
+    university = rng.choice(universities, size=len(subject_idx), p=_zipf_weights(len(universities)))
+    return has_contract, subject_idx, university
+
+
+def table_schema(year, amount_column):
+    """طرح ثابت Parquet هر جدول (ستون‌های تماماً خالی یک تکه هم نوع رشته‌ای دارند)"""
+    return pa.schema([
+        ('شماره طبقه بندی', pa.int64()),
+        ('نام مشمول', pa.string()),
+        ('دستگاه اجرایی مرتبط', pa.string()),
+        (f'اعتبار سال {year}', pa.float64()),
+        ('دانشگاه', pa.string()),
+        (amount_column, pa.float64()),
+    ])
+
+
+def _table(subjects, year, subject_idx, university, amounts, amount_column, empty_idx):
+    """ساخت یک تکه جدول: سطرهای دارای دانشگاه به همراه یک سطر خالی برای بقیه مشمولین"""
+    idx = np.concatenate([subject_idx, empty_idx])
+    order = np.argsort(idx, kind='stable')
+    idx = idx[order]
+    university = np.concatenate([university, np.full(len(empty_idx), None, dtype=object)])[order]
+    amounts = np.concatenate([amounts, np.full(len(empty_idx), np.nan)])[order]
+
+    return pd.DataFrame({
+        'شماره طبقه بندی': subjects['code'][idx],
+        'نام مشمول': subjects['name'][idx],
+        'دستگاه اجرایی مرتبط': subjects['device'][idx],
+        f'اعتبار سال {year}': subjects['credits'][year][idx],
+        'دانشگاه': university,
+        amount_column: amounts,
+    })
+
+
+def generate_chunk(rng, subjects, universities, year, mean_partners):
+    """سطرهای قرارداد و پرداخت یک تکه از مشمولین (خروجی make_subjects) برای یک سال"""
+    n = len(subjects['code'])
+    has_contract, subject_idx, university = _partner_rows(rng, n, universities, mean_partners)
+    contract_amounts = np.round(rng.lognormal(np.log(CONTRACT_MEDIAN), CONTRACT_SIGMA, len(subject_idx)), 2)
+    contracts = _table(subjects, year, subject_idx, university, contract_amounts,
+                       'مجموع مبالغ قراردادها', np.flatnonzero(~has_contract))
+
+    # پرداخت: بخشی از مبلغ قرارداد، به علاوه پرداخت قراردادهای سال‌های قبل
+    paid = rng.random(len(subject_idx)) < PAID_SHARE
+    pay_idx = subject_idx[paid]
+    pay_university = university[paid]
+    pay_amounts = contract_amounts[paid] * rng.beta(2, 5, paid.sum())
+
+    extra = rng.random(n) < EXTRA_PAYMENT_SHARE
+    extra_idx = np.flatnonzero(extra)
+    pay_idx = np.concatenate([pay_idx, extra_idx])
+    pay_university = np.concatenate([
+        pay_university, rng.choice(universities, size=len(extra_idx), p=_zipf_weights(len(universities)))])
+    pay_amounts = np.round(np.concatenate([
+        pay_amounts, rng.lognormal(np.log(CONTRACT_MEDIAN / 5), CONTRACT_SIGMA, len(extra_idx))]), 2)
+
+    has_payment = np.zeros(n, dtype=bool)
+    has_payment[pay_idx] = True
+    payments = _table(subjects, year, pay_idx, pay_university, pay_amounts,
+                      'مجموع مبالغ پرداختی', np.flatnonzero(~has_payment))
+    return contracts, payments
+
+# ==============================================================================
+# Writing
+# ==============================================================================
+
+# فایل خروجی -> ستون مبلغ آن
+AMOUNT_COLUMNS = {CONTRACTS_FILE: 'مجموع مبالغ قراردادها', PAYMENTS_FILE: 'مجموع مبالغ پرداختی'}
+
+def generate_dataset(n_subjects=100000, n_universities=2000, n_devices=40, years=(1404,),
+                     mean_partners=3, chunk_size=50000, output_dir=OUTPUT_DIR, seed=42):
+    """
+    تولید و نوشتن جریانی داده مصنوعی
+
+    برای هر سال پوشه output_dir/<year> با دو فایل Credits_Contracts.parquet و
+    Credits_Payments.parquet ساخته می‌شود؛ ستون اعتبار همان 'اعتبار سال <year>' است.
+    مشمولین در تکه‌های chunk_size تایی تولید و هر تکه برای همه سال‌ها یک row group
+    نوشته می‌شود، بنابراین حافظه مصرفی به اندازه کل داده بستگی ندارد. طرح هر فایل
+    (table_schema) از پیش ثابت است و به تکه اول بستگی ندارد.
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required to write Parquet output")
+
+    rng = np.random.default_rng(seed)
+    years = list(years)
+    universities = make_universities(n_universities)
+    devices = make_devices(n_devices)
+
+    schemas = {}
+    writers = {}
+    counts = {year: {file_name: 0 for file_name in AMOUNT_COLUMNS} for year in years}
+    try:
+        for year in years:
+            year_dir = Path(output_dir) / str(year)
+            year_dir.mkdir(parents=True, exist_ok=True)
+            for file_name, amount_column in AMOUNT_COLUMNS.items():
+                schemas[year, file_name] = table_schema(year, amount_column)
+                writers[year, file_name] = pq.ParquetWriter(year_dir / file_name, schemas[year, file_name])
+
+        for subjects in make_subjects(rng, n_subjects, devices, years, chunk_size):
+            for year in years:
+                tables = zip(AMOUNT_COLUMNS, generate_chunk(rng, subjects, universities, year, mean_partners))
+                for file_name, df in tables:
+                    table = pa.Table.from_pandas(df, schema=schemas[year, file_name], preserve_index=False)
+                    writers[year, file_name].write_table(table)
+                    counts[year][file_name] += len(df)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for year in years:
+        print(f"✓ {year}: {counts[year][CONTRACTS_FILE]:,} contract rows, "
+              f"{counts[year][PAYMENTS_FILE]:,} payment rows -> {Path(output_dir) / str(year)}")
+    return counts
+
+
+def load_synthetic(year=1404, output_dir=OUTPUT_DIR):
+    """خواندن جداول مصنوعی یک سال؛ ستون اعتبار مانند داده واقعی 'اعتبار سال 1404' نامیده می‌شود"""
+    year_dir = Path(output_dir) / str(year)
+    rename = {f'اعتبار سال {year}': 'اعتبار سال 1404'}
+    return (pd.read_parquet(year_dir / CONTRACTS_FILE).rename(columns=rename),
+            pd.read_parquet(year_dir / PAYMENTS_FILE).rename(columns=rename))
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Synthetic SATE dataset generator')
+    parser.add_argument('--subjects', type=int, default=100000, help='number of subjects (default: 100000)')
+    parser.add_argument('--universities', type=int, default=2000, help='number of universities (default: 2000)')
+    parser.add_argument('--devices', type=int, default=40, help='number of executive devices (default: 40)')
+    parser.add_argument('--years', nargs='+', type=int, default=[1404], help='credit years (default: 1404)')
+    parser.add_argument('--partners', type=float, default=3,
+                        help='mean universities per contracting subject (default: 3)')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='subjects per Parquet row group')
+    parser.add_argument('--out', type=Path, default=OUTPUT_DIR, help=f'output directory (default: {OUTPUT_DIR})')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    generate_dataset(args.subjects, args.universities, args.devices, args.years, args.partners,
+                     args.chunk_size, args.out, args.seed)
+
+
+if __name__ == '__main__':
+    main()
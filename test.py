@@ -4,396 +4,395 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import geopandas as gpd
-from matplotlib.patches import Polygon
-from matplotlib.collections import PatchCollection
 import json
+from functools import lru_cache
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
-# To show Farsi Font
-import arabic_reshaper
-from bidi.algorithm import get_display
+from lazy_imports import lazy_import
+from data_loader import load_report_data, CONTRACTS_PATH, PAYMENTS_PATH
+from report_utils import (fix_persian_text, fix_persian_labels, convert_to_persian_number,
+                          format_number_with_separator, format_persian_numbers,
+                          PersianNumberFormatter,
+                          save_figure)
+from province_resolver import (make_province_resolver, tag_provinces, province_codes,
+                               PROVINCES, UNKNOWN_PROVINCE)
+from aggregate_cube import payment_cells
+from province_geometry import (read_province_geometry, read_join_index, feature_codes,
+                               MAP_FIGSIZE, MAP_DPI, LABEL_X, LABEL_Y)
+from credit_schema import to_million
+
+# کتابخانه‌های رسم فقط هنگام ساخت اولین نمودار import می‌شوند
+plt = lazy_import('matplotlib.pyplot')
+martist = lazy_import('matplotlib.artist')
+mtext = lazy_import('matplotlib.text')
 
 # ==============================================================================
-# Font Configuration
+# Helper Functions
 # ==============================================================================
 
-try:
-    from matplotlib import font_manager
-    vazir_font = font_manager.FontProperties(family='Vazirmatn')
-    plt.rcParams['font.family'] = 'Vazirmatn'
-    print("✓ Using Vazirmatn font")
-except:
-    plt.rcParams['font.family'] = 'DejaVu Sans'
-    print("⚠ Vazirmatn not found, using DejaVu Sans")
+# لیست استان‌های ایران با نام‌های استاندارد (ترتیب مهم است: اولین تطابق برگردانده می‌شود)
+PROVINCE_KEYWORDS = {
+    'تهران': ['تهران', 'شهید بهشتی', 'علم و صنعت', 'امیرکبیر', 'صنعتی شریف', 'شریف', 'الزهرا', 'خواجه نصیر'],
+    'اصفهان': ['اصفهان', 'صنعتی اصفهان'],
+    'فارس': ['شیراز'],
+    'آذربایجان شرقی': ['تبریز', 'سهند'],
+    'خراسان رضوی': ['مشهد', 'فردوسی'],
+    'خوزستان': ['اهواز', 'چمران', 'جندی شاپور'],
+    'کرمان': ['کرمان', 'باهنر', 'شهید باهنر'],
+    'گیلان': ['گیلان', 'رشت'],
+    'مازندران': ['مازندران', 'بابلسر', 'ساری', 'نوشیروانی', 'بابل'],
+    'کرمانشاه': ['کرمانشاه', 'رازی'],
+    'همدان': ['همدان', 'بوعلی سینا'],
+    'قزوین': ['قزوین', 'امام خمینی'],
+    'یزد': ['یزد'],
+    'سمنان': ['سمنان'],
+    'اردبیل': ['اردبیل', 'محقق اردبیلی'],
+    'زنجان': ['زنجان'],
+    'کردستان': ['کردستان', 'سنندج'],
+    'آذربایجان غربی': ['ارومیه', 'ارمیه'],
+    'لرستان': ['لرستان', 'خرم آباد'],
+    'ایلام': ['ایلام'],
+    'بوشهر': ['بوشهر', 'خلیج فارس'],
+    'هرمزگان': ['هرمزگان', 'بندرعباس'],
+    'سیستان و بلوچستان': ['سیستان', 'بلوچستان', 'زاهدان'],
+    'خراسان شمالی': ['بجنورد'],
+    'خراسان جنوبی': ['بیرجند'],
+    'البرز': ['البرز', 'کرج'],
+    'قم': ['قم'],
+    'چهارمحال و بختیاری': ['شهرکرد'],
+    'کهگیلویه و بویراحمد': ['یاسوج'],
+    'گلستان': ['گلستان', 'گرگان']
+}
+
+# استخراج استان از نام دانشگاه (کامپایل‌شده و حافظه‌گذاری‌شده)
+extract_province = make_province_resolver(PROVINCE_KEYWORDS)
+
+# ==============================================================================
+# Setup
+# ==============================================================================
 
-plt.rcParams['axes.unicode_minus'] = False
-plt.rcParams['figure.autolayout'] = True
+OUTPUT_DIR = Path('./figs/s3_revised')
+
+# مسیرهای ممکن برای فایل GeoJSON
+GEOJSON_PATHS = [
+    './iran-geojson/iran_geo.json',
+    './iran-geojson/iran.json',
+    './iran_geo.json',
+    './data/iran_geo.json',
+    '../iran-geojson/iran_geo.json'
+]
 
 # ==============================================================================
-# Helper Functions
+# Data Preparation
 # ==============================================================================
 
-def fix_persian_text(text):
-    """تبدیل متن فارسی به فرمت قابل نمایش"""
-    if text is None or str(text).strip() == '':
-        return ''
+def load_province_geometry(province_data):
+    """خواندن هندسه استان‌ها و اتصال مبالغ پرداخت با کد استان؛ در صورت نبود فایل None برمی‌گرداند"""
+    print("\nLoading GeoJSON...")
+
+    geojson_path = None
+    for path in GEOJSON_PATHS:
+        if Path(path).exists():
+            geojson_path = path
+            break
+
+    if geojson_path is None:
+        print("ERROR: iran_geo.json not found!")
+        print("Please make sure the file exists in one of these locations:")
+        for path in GEOJSON_PATHS:
+            print(f"  - {path}")
+        return None
+
+    print(f"✓ Found GeoJSON at: {geojson_path}")
+
+    # خواندن هندسه ساده‌شده استان‌ها (از کش، در صورت تغییر نکردن GeoJSON)
     try:
-        reshaped_text = arabic_reshaper.reshape(str(text))
-        bidi_text = get_display(reshaped_text)
-        return bidi_text
+        iran_geo = read_province_geometry(geojson_path)
+        join_index = read_join_index(geojson_path)
     except Exception as e:
-        return str(text)
-
-def convert_to_persian_number(number):
-    """تبدیل اعداد انگلیسی به فارسی"""
-    english_digits = '0123456789.,%'
-    persian_digits = '۰۱۲۳۴۵۶۷۸۹.،٪'
-    translation_table = str.maketrans(english_digits, persian_digits)
-    return str(number).translate(translation_table)
-
-def format_number_with_separator(number, use_persian=True):
-    """قالب‌بندی اعداد با جداکننده هزارگان"""
-    if pd.isna(number):
-        return convert_to_persian_number('0') if use_persian else '0'
-    formatted = f'{number:,.0f}' if isinstance(number, (int, float)) else str(number)
-    if use_persian:
-        return convert_to_persian_number(formatted)
-    return formatted
-
-def extract_province(university_name):
-    """استخراج استان از نام دانشگاه"""
-    if pd.isna(university_name):
-        return 'نامشخص'
-    
-    name = str(university_name).strip()
-    
-    # لیست استان‌های ایران با نام‌های استاندارد
-    provinces = {
-        'تهران': ['تهران', 'شهید بهشتی', 'علم و صنعت', 'امیرکبیر', 'صنعتی شریف', 'شریف', 'الزهرا', 'خواجه نصیر'],
-        'اصفهان': ['اصفهان', 'صنعتی اصفهان'],
-        'فارس': ['شیراز'],
-        'آذربایجان شرقی': ['تبریز', 'سهند'],
-        'خراسان رضوی': ['مشهد', 'فردوسی'],
-        'خوزستان': ['اهواز', 'چمران', 'جندی شاپور'],
-        'کرمان': ['کرمان', 'باهنر', 'شهید باهنر'],
-        'گیلان': ['گیلان', 'رشت'],
-        'مازندران': ['مازندران', 'بابلسر', 'ساری', 'نوشیروانی', 'بابل'],
-        'کرمانشاه': ['کرمانشاه', 'رازی'],
-        'همدان': ['همدان', 'بوعلی سینا'],
-        'قزوین': ['قزوین', 'امام خمینی'],
-        'یزد': ['یزد'],
-        'سمنان': ['سمنان'],
-        'اردبیل': ['اردبیل', 'محقق اردبیلی'],
-        'زنجان': ['زنجان'],
-        'کردستان': ['کردستان', 'سنندج'],
-        'آذربایجان غربی': ['ارومیه', 'ارمیه'],
-        'لرستان': ['لرستان', 'خرم آباد'],
-        'ایلام': ['ایلام'],
-        'بوشهر': ['بوشهر', 'خلیج فارس'],
-        'هرمزگان': ['هرمزگان', 'بندرعباس'],
-        'سیستان و بلوچستان': ['سیستان', 'بلوچستان', 'زاهدان'],
-        'خراسان شمالی': ['بجنورد'],
-        'خراسان جنوبی': ['بیرجند'],
-        'البرز': ['البرز', 'کرج'],
-        'قم': ['قم'],
-        'چهارمحال و بختیاری': ['شهرکرد'],
-        'کهگیلویه و بویراحمد': ['یاسوج'],
-        'گلستان': ['گلستان', 'گرگان']
-    }
-    
-    # جستجو در نام دانشگاه
-    for province, keywords in provinces.items():
-        for keyword in keywords:
-            if keyword in name:
-                return province
-    
-    return 'سایر'
-
-def normalize_province_name(name):
-    """نرمال‌سازی نام استان برای تطبیق با GeoJSON"""
-    # دیکشنری تطبیق نام‌ها
-    name_mapping = {
-        'آذربایجان شرقی': 'آذربایجان شرقی',
-        'آذربایجان غربی': 'آذربایجان غربی',
-        'اردبیل': 'اردبیل',
-        'اصفهان': 'اصفهان',
-        'البرز': 'البرز',
-        'ایلام': 'ایلام',
-        'بوشهر': 'بوشهر',
-        'تهران': 'تهران',
-        'چهارمحال و بختیاری': 'چهارمحال و بختیاری',
-        'خراسان جنوبی': 'خراسان جنوبی',
-        'خراسان رضوی': 'خراسان رضوی',
-        'خراسان شمالی': 'خراسان شمالی',
-        'خوزستان': 'خوزستان',
-        'زنجان': 'زنجان',
-        'سمنان': 'سمنان',
-        'سیستان و بلوچستان': 'سیستان و بلوچستان',
-        'فارس': 'فارس',
-        'قزوین': 'قزوین',
-        'قم': 'قم',
-        'کردستان': 'کردستان',
-        'کرمان': 'کرمان',
-        'کرمانشاه': 'کرمانشاه',
-        'کهگیلویه و بویراحمد': 'کهگیلویه و بویراحمد',
-        'گلستان': 'گلستان',
-        'گیلان': 'گیلان',
-        'لرستان': 'لرستان',
-        'مازندران': 'مازندران',
-        'مرکزی': 'مرکزی',
-        'هرمزگان': 'هرمزگان',
-        'همدان': 'همدان',
-        'یزد': 'یزد'
-    }
-    
-    return name_mapping.get(name, name)
+        print(f"ERROR loading GeoJSON: {e}")
+        return None
 
-# ==============================================================================
-# Setup
-# ==============================================================================
+    print(f"✓ Loaded {len(iran_geo)} provinces from GeoJSON")
 
-output_dir = Path('./figs/s3_revised')
-output_dir.mkdir(parents=True, exist_ok=True)
+    # اتصال با جست‌وجوی کد استان: مبلغ هر کد در یک آرایه و مبلغ هر عارضه با اندیس کد آن
+    # (نام شهر و نام استان آن کد یکسان دارند و مبالغشان جمع می‌شود)
+    codes = feature_codes(iran_geo, join_index)
+    province_code = province_data['کد_استان'].to_numpy()
+    known = province_code >= 0
+    amount_by_code = np.bincount(province_code[known], weights=province_data['مبلغ_پرداخت'].to_numpy()[known],
+                                 minlength=len(PROVINCES) + 1)
 
-# ==============================================================================
-# Load Data
-# ==============================================================================
+    # کد NO_PROVINCE (-1) به آخرین خانه (صفر / 'نامشخص') اشاره می‌کند
+    iran_geo['استان_نرمال'] = np.array(PROVINCES + (UNKNOWN_PROVINCE,), dtype=object)[codes]
+    iran_geo['مبلغ_پرداخت'] = amount_by_code[codes]
 
-print("\nLoading data...")
-df_payments = pd.read_excel('./data/Credits_Payments.xlsx')
+    print(f"✓ Merged data: {(iran_geo['مبلغ_پرداخت'] > 0).sum()} provinces with payment data")
+    return iran_geo
 
-# استخراج استان‌ها
-df_payments['استان'] = df_payments['دانشگاه'].apply(extract_province)
 
-# تجمیع پرداخت‌ها به تفکیک استان
-province_payments = df_payments.groupby('استان')['مجموع مبالغ پرداختی'].sum() / 1000  # میلیارد
+def prepare(data):
+    """تجمیع پرداخت‌ها به تفکیک استان و اتصال به نقشه"""
+    payments = payment_cells(data['cube'])
 
-province_data = pd.DataFrame({
-    'استان': province_payments.index,
-    'مبلغ_پرداخت': province_payments.values
-})
+    # استخراج استان‌ها (با جدول کلمات کلیدی همین نقشه)
+    provinces = tag_provinces(payments['دانشگاه'], extract_province)
 
-# نرمال‌سازی نام استان‌ها
-province_data['استان_نرمال'] = province_data['استان'].apply(normalize_province_name)
+    # تجمیع پرداخت‌ها به تفکیک استان
+    province_payments = to_million(payments.groupby(provinces)['مبلغ پرداخت'].sum()) / 1000  # میلیارد
 
-print(f"Total provinces with payments: {len(province_data)}")
-print(f"Total payment amount: {province_data['مبلغ_پرداخت'].sum():.0f} billion")
+    province_data = pd.DataFrame({
+        'استان': province_payments.index,
+        'کد_استان': province_codes(province_payments.index),
+        'مبلغ_پرداخت': province_payments.values
+    })
+
+    print(f"Total provinces with payments: {len(province_data)}")
+    print(f"Total payment amount: {province_data['مبلغ_پرداخت'].sum():.0f} billion")
+
+    return {
+        **data,
+        'province_data': province_data,
+        'iran_merged': load_province_geometry(province_data),
+    }
 
 # ==============================================================================
-# Load GeoJSON
+# لایه برچسب استان‌ها
 # ==============================================================================
 
-print("\nLoading GeoJSON...")
+@lru_cache(maxsize=None)
+def _label_layer_class():
+    """ساخت کلاس Artist لایه برچسب در اولین استفاده (تا import این ماژول به matplotlib نیاز نداشته باشد)"""
+
+    class _LabelLayer(martist.Artist):
+        """یک Artist برای همه برچسب‌های یک لایه که همه را در یک فراخوانی draw رسم می‌کند"""
+
+        def __init__(self, texts, zorder):
+            super().__init__()
+            self.texts = texts
+            self.set_zorder(zorder)
+
+        def get_children(self):
+            return self.texts
+
+        def draw(self, renderer):
+            if not self.get_visible():
+                return
+            for text in self.texts:
+                text.draw(renderer)
+            self.stale = False
+
+    return _LabelLayer
+
+
+def add_label_layer(ax, x, y, labels, fontsizes, zorder=3, **text_kwargs):
+    """
+    افزودن همه برچسب‌ها (با ویژگی‌های مشترک text_kwargs و اندازه فونت جداگانه)
+    به صورت یک Artist؛ به جای یک ax.annotate برای هر استان فقط یک Artist به محور
+    اضافه می‌شود و محور یک بار به‌روز می‌شود.
+    """
+    texts = []
+    for xi, yi, label, size in zip(x, y, labels, fontsizes):
+        text = mtext.Text(xi, yi, label, fontsize=size, ha='center', va='center', **text_kwargs)
+        text.set_figure(ax.figure)
+        text.set_transform(ax.transData)
+        text.set_clip_on(False)
+        texts.append(text)
+
+    layer = _label_layer_class()(texts, zorder)
+    ax.add_artist(layer)
+    return layer
 
-# مسیرهای ممکن برای فایل GeoJSON
-possible_paths = [
-    './iran-geojson/iran_geo.json',
-    './iran-geojson/iran.json',
-    './iran_geo.json',
-    './data/iran_geo.json',
-    '../iran-geojson/iran_geo.json'
-]
+# ==============================================================================
+# نمودار 3-11: نقشه جغرافیایی Heatmap
+# ==============================================================================
 
-geojson_path = None
-for path in possible_paths:
-    if Path(path).exists():
-        geojson_path = path
-        break
-
-if geojson_path is None:
-    print("ERROR: iran_geo.json not found!")
-    print("Please make sure the file exists in one of these locations:")
-    for path in possible_paths:
-        print(f"  - {path}")
+def chart_3_11_placeholder(province_data, output_dir=OUTPUT_DIR):
+    """نمودار میله‌ای جایگزین وقتی فایل GeoJSON در دسترس نیست"""
     print("\nCreating a placeholder map instead...")
-    
+
     # ایجاد یک نقشه ساده با دیتای فعلی
     fig, ax = plt.subplots(figsize=(16, 14))
-    
+
     # مرتب‌سازی بر اساس مبلغ
     province_data_sorted = province_data.sort_values('مبلغ_پرداخت', ascending=True)
-    
+
     y_pos = np.arange(len(province_data_sorted))
     values = province_data_sorted['مبلغ_پرداخت'].values
-    
+
     colors = plt.cm.YlOrRd(values / values.max())
-    
+
     bars = ax.barh(y_pos, values, color=colors, edgecolor='black', linewidth=1.5)
-    
+
     ax.set_yticks(y_pos)
-    ax.set_yticklabels([fix_persian_text(p) for p in province_data_sorted['استان']], fontsize=12)
-    
+    ax.set_yticklabels(fix_persian_labels(province_data_sorted['استان']), fontsize=12)
+
     for bar, val in zip(bars, values):
         ax.text(val + max(values)*0.02, bar.get_y() + bar.get_height()/2,
                format_number_with_separator(val) + ' میلیارد',
                ha='left', va='center', fontsize=10, fontweight='bold')
-    
+
     ax.set_xlabel(fix_persian_text('مبلغ پرداخت (میلیارد ریال)'), fontsize=16, fontweight='bold')
     ax.set_title(fix_persian_text('توزیع استانی پرداخت‌ها\n(نقشه جغرافیایی در دسترس نیست)'),
                 fontsize=22, fontweight='bold', pad=20)
     ax.grid(True, axis='x', alpha=0.3)
-    
+
     plt.tight_layout()
-    plt.savefig(output_dir / 'chart_3_11.png', dpi=400, bbox_inches='tight', facecolor='white')
-    plt.savefig(output_dir / 'chart_3_11.jpg', dpi=400, bbox_inches='tight', facecolor='white')
+    save_figure(fig, output_dir / 'chart_3_11', jpg_quality=None)
     plt.close()
-    
+
     print("\n✓ Placeholder chart saved as chart_3_11")
-    exit()
 
-print(f"✓ Found GeoJSON at: {geojson_path}")
 
-# خواندن فایل GeoJSON
-try:
-    iran_geo = gpd.read_file(geojson_path)
-    print(f"✓ Loaded {len(iran_geo)} provinces from GeoJSON")
-    
-    # بررسی ستون‌های موجود
-    print(f"Available columns: {iran_geo.columns.tolist()}")
-    
-    # تشخیص ستون نام استان
-    name_column = None
-    for col in ['name', 'NAME', 'province', 'PROVINCE', 'استان', 'نام']:
-        if col in iran_geo.columns:
-            name_column = col
-            break
-    
-    if name_column is None:
-        print("Warning: Could not find province name column. Using first string column.")
-        for col in iran_geo.columns:
-            if iran_geo[col].dtype == 'object' and col != 'geometry':
-                name_column = col
-                break
-    
-    print(f"Using column '{name_column}' as province name")
-    
-    # نرمال‌سازی نام‌ها در GeoJSON
-    iran_geo['استان_نرمال'] = iran_geo[name_column].apply(normalize_province_name)
-    
-    # Merge data with geo
-    iran_merged = iran_geo.merge(province_data, on='استان_نرمال', how='left')
-    iran_merged['مبلغ_پرداخت'].fillna(0, inplace=True)
-    
-    print(f"✓ Merged data: {iran_merged['مبلغ_پرداخت'].notna().sum()} provinces with payment data")
-
-except Exception as e:
-    print(f"ERROR loading GeoJSON: {e}")
-    exit()
+def chart_3_11(data, output_dir=OUTPUT_DIR):
+    """نقشه جغرافیایی Heatmap پرداخت‌ها به تفکیک استان"""
+    iran_merged = data['iran_merged']
+    if iran_merged is None:
+        chart_3_11_placeholder(data['province_data'], output_dir)
+        return
+
+    print("\nGenerating Chart 3-11: Geographic Heatmap...")
+
+    fig, ax = plt.subplots(figsize=MAP_FIGSIZE)
+
+    # ترسیم نقشه با colormap
+    iran_merged.plot(column='مبلغ_پرداخت',
+                     cmap='YlOrRd',  # Yellow-Orange-Red
+                     linewidth=1.5,
+                     edgecolor='black',
+                     legend=False,
+                     ax=ax,
+                     missing_kwds={'color': 'lightgrey', 'label': 'بدون داده'})
+
+    # حذف محورها
+    ax.set_axis_off()
+
+    # عنوان
+    title_text = fix_persian_text('نقشه توزیع جغرافیایی پرداخت‌ها به دانشگاه‌ها\n(میلیارد ریال)')
+    ax.set_title(title_text, fontsize=28, fontweight='bold', pad=30)
+
+    # اضافه کردن نام و مقدار روی هر استان (دو لایه: استان‌های دارای پرداخت و بدون پرداخت)
+    names = np.array([fix_persian_text(name) for name in iran_merged['استان_نرمال']], dtype=object)
+    amounts = iran_merged['مبلغ_پرداخت'].to_numpy()
+    x = iran_merged[LABEL_X].to_numpy()
+    y = iran_merged[LABEL_Y].to_numpy()
+    active = amounts > 0
+
+    fontsizes = np.select([amounts < 10, amounts < 50], [9, 11], 13)
+    active_labels = [f"{name}\n{value}" for name, value in
+                     zip(names[active], format_persian_numbers(amounts[active], truncate=False))]
+
+    add_label_layer(ax, x[active], y[active], active_labels, fontsizes[active],
+                    fontweight='bold',
+                    bbox=dict(boxstyle='round,pad=0.5',
+                              facecolor='white',
+                              alpha=0.85,
+                              edgecolor='black',
+                              linewidth=1.5),
+                    zorder=10)
+
+    # فقط نام برای استان‌های بدون داده
+    add_label_layer(ax, x[~active], y[~active], names[~active], np.full((~active).sum(), 8),
+                    alpha=0.6, style='italic')
+
+    # Colorbar دستی
+    # محدوده رنگ‌ها
+    vmin = 0
+    vmax = iran_merged['مبلغ_پرداخت'].max()
+
+    norm = plt.Normalize(vmin=vmin, vmax=vmax)
+    sm = plt.cm.ScalarMappable(cmap='YlOrRd', norm=norm)
+    sm.set_array([])
+
+    # اضافه کردن colorbar
+    cbar = plt.colorbar(sm, ax=ax, orientation='horizontal',
+                       pad=0.02, aspect=50, shrink=0.6)
+    cbar.set_label(fix_persian_text('مبلغ پرداخت (میلیارد ریال)'),
+                  fontsize=18, fontweight='bold')
+    cbar.ax.tick_params(labelsize=14)
+
+    # تبدیل تیک‌ها به فارسی
+    cbar.ax.xaxis.set_major_formatter(PersianNumberFormatter(truncate=False))
+
+    # اضافه کردن جعبه آمار
+    stats_text = fix_persian_text(
+        f'تعداد استان‌های فعال: {(iran_merged["مبلغ_پرداخت"] > 0).sum()}\n'
+        f'مجموع پرداخت‌ها: {format_number_with_separator(iran_merged["مبلغ_پرداخت"].sum())} میلیارد\n'
+        f'میانگین: {format_number_with_separator(iran_merged[iran_merged["مبلغ_پرداخت"] > 0]["مبلغ_پرداخت"].mean())} میلیارد\n'
+        f'بیشترین: {format_number_with_separator(vmax)} میلیارد'
+    )
+
+    props = dict(boxstyle='round,pad=1.2', facecolor='wheat', alpha=0.95,
+                edgecolor='black', linewidth=2.5)
+    ax.text(0.02, 0.98, stats_text, transform=ax.transAxes,
+            fontsize=14, verticalalignment='top',
+            bbox=props, zorder=10)
+
+    plt.tight_layout()
+    save_figure(fig, output_dir / 'chart_3_11', dpi=MAP_DPI)
+    plt.close()
+
+    print(f"✓ Chart 3-11 saved")
+
+
+CHARTS = [chart_3_11]
+
+# وابستگی‌های هر نمودار برای ساخت افزایشی (chart_manifest):
+# فایل‌های ورودی و ستون‌هایی از داده آماده‌شده که نمودار رسم می‌کند (None یعنی کل مقدار)
+# و ماژول‌هایی که داده نمودار در prepare از آن‌ها ساخته می‌شود
+CHART_DEPENDENCIES = {
+    'chart_3_11': {
+        'files': [PAYMENTS_PATH] + GEOJSON_PATHS,
+        'columns': {'iran_merged': None, 'province_data': None},
+        'modules': ['province_geometry', 'province_resolver'],
+    },
+}
 
 # ==============================================================================
-# نمودار 3-11: نقشه جغرافیایی Heatmap
+# ذخیره داده‌های استانی
 # ==============================================================================
-print("\nGenerating Chart 3-11: Geographic Heatmap...")
 
-fig, ax = plt.subplots(figsize=(20, 16))
+def save_statistics(data, output_dir=OUTPUT_DIR):
+    """ذخیره مبالغ پرداخت به تفکیک استان نقشه"""
+    iran_merged = data['iran_merged']
+    if iran_merged is None:
+        return
 
-# ترسیم نقشه با colormap
-iran_merged.plot(column='مبلغ_پرداخت', 
-                 cmap='YlOrRd',  # Yellow-Orange-Red
-                 linewidth=1.5,
-                 edgecolor='black',
-                 legend=False,
-                 ax=ax,
-                 missing_kwds={'color': 'lightgrey', 'label': 'بدون داده'})
+    iran_merged[['استان_نرمال', 'مبلغ_پرداخت']].to_excel(
+        output_dir / 'geographic_payments.xlsx', index=False
+    )
 
-# حذف محورها
-ax.set_axis_off()
+    print("\n" + "="*70)
+    print("GEOGRAPHIC HEATMAP COMPLETE")
+    print("="*70)
+    print(f"Chart saved: {output_dir}/chart_3_11.png")
+    print(f"Active provinces: {(iran_merged['مبلغ_پرداخت'] > 0).sum()}")
+    print(f"Total payments: {iran_merged['مبلغ_پرداخت'].sum():.0f} billion IRR")
+    print("="*70)
 
-# عنوان
-title_text = fix_persian_text('نقشه توزیع جغرافیایی پرداخت‌ها به دانشگاه‌ها\n(میلیارد ریال)')
-ax.set_title(title_text, fontsize=28, fontweight='bold', pad=30)
+# ==============================================================================
+# Main
+# ==============================================================================
 
-# اضافه کردن نام و مقدار روی هر استان
-for idx, row in iran_merged.iterrows():
-    try:
-        # مرکز هر استان
-        centroid = row.geometry.centroid
-        x, y = centroid.x, centroid.y
-        
-        # نام استان
-        province_name = fix_persian_text(row['استان'] if pd.notna(row['استان']) else row['استان_نرمال'])
-        
-        # مقدار
-        amount = row['مبلغ_پرداخت']
-        
-        if amount > 0:
-            # نمایش نام و مقدار
-            text = f"{province_name}\n{format_number_with_separator(amount)}"
-            fontsize = 9 if amount < 10 else (11 if amount < 50 else 13)
-            
-            ax.annotate(text, xy=(x, y), ha='center', va='center',
-                       fontsize=fontsize, fontweight='bold',
-                       bbox=dict(boxstyle='round,pad=0.5', 
-                               facecolor='white', 
-                               alpha=0.85,
-                               edgecolor='black',
-                               linewidth=1.5),
-                       zorder=10)
-        else:
-            # فقط نام برای استان‌های بدون داده
-            ax.annotate(province_name, xy=(x, y), ha='center', va='center',
-                       fontsize=8, alpha=0.6, style='italic')
-    except:
-        continue
-
-# Colorbar دستی
-from matplotlib.cm import ScalarMappable
-from matplotlib.colors import Normalize
-
-# محدوده رنگ‌ها
-vmin = 0
-vmax = iran_merged['مبلغ_پرداخت'].max()
-
-norm = Normalize(vmin=vmin, vmax=vmax)
-sm = ScalarMappable(cmap='YlOrRd', norm=norm)
-sm.set_array([])
-
-# اضافه کردن colorbar
-cbar = plt.colorbar(sm, ax=ax, orientation='horizontal', 
-                   pad=0.02, aspect=50, shrink=0.6)
-cbar.set_label(fix_persian_text('مبلغ پرداخت (میلیارد ریال)'), 
-              fontsize=18, fontweight='bold')
-cbar.ax.tick_params(labelsize=14)
-
-# تبدیل تیک‌ها به فارسی
-ticks = cbar.get_ticks()
-cbar.ax.set_xticklabels([format_number_with_separator(tick) for tick in ticks])
-
-# اضافه کردن جعبه آمار
-stats_text = fix_persian_text(
-    f'تعداد استان‌های فعال: {(iran_merged["مبلغ_پرداخت"] > 0).sum()}\n'
-    f'مجموع پرداخت‌ها: {format_number_with_separator(iran_merged["مبلغ_پرداخت"].sum())} میلیارد\n'
-    f'میانگین: {format_number_with_separator(iran_merged[iran_merged["مبلغ_پرداخت"] > 0]["مبلغ_پرداخت"].mean())} میلیارد\n'
-    f'بیشترین: {format_number_with_separator(vmax)} میلیارد'
-)
-
-props = dict(boxstyle='round,pad=1.2', facecolor='wheat', alpha=0.95, 
-            edgecolor='black', linewidth=2.5)
-ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, 
-        fontsize=14, verticalalignment='top',
-        bbox=props, zorder=10)
-
-plt.tight_layout()
-plt.savefig(output_dir / 'chart_3_11.png', dpi=400, bbox_inches='tight', facecolor='white')
-plt.savefig(output_dir / 'chart_3_11.jpg', dpi=400, bbox_inches='tight', facecolor='white', 
-           pil_kwargs={'quality': 95})
-plt.close()
-
-print(f"✓ Chart 3-11 saved")
+def finish(data, output_dir=OUTPUT_DIR):
+    """ذخیره آمار و چاپ خلاصه نقشه استانی پس از ساخت همه نمودارها"""
+    save_statistics(data, output_dir)
 
-# ذخیره داده‌های استانی
-iran_merged[['استان_نرمال', 'مبلغ_پرداخت']].to_excel(
-    output_dir / 'geographic_payments.xlsx', index=False
-)
-
-print("\n" + "="*70)
-print("GEOGRAPHIC HEATMAP COMPLETE")
-print("="*70)
-print(f"Chart saved: {output_dir}/chart_3_11.png")
-print(f"Active provinces: {(iran_merged['مبلغ_پرداخت'] > 0).sum()}")
-print(f"Total payments: {iran_merged['مبلغ_پرداخت'].sum():.0f} billion IRR")
-print("="*70)
\ No newline at end of file
+
+def run(data, output_dir=OUTPUT_DIR):
+    """تولید نقشه استانی پرداخت‌ها از داده‌های آماده‌شده"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    chapter_data = prepare(data)
+    for chart in CHARTS:
+        chart(chapter_data, output_dir)
+
+    finish(chapter_data, output_dir)
+    return chapter_data
+
+
+if __name__ == '__main__':
+    run(load_report_data())
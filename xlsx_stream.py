@@ -0,0 +1,177 @@
+"""
+خواندن جریانی کاربرگ‌های بزرگ اکسل با حالت read-only در openpyxl
+سطرها دسته به دسته به DataFrame نوع‌دار تبدیل می‌شوند؛ فقط ستون‌های خواسته‌شده
+ساخته می‌شوند و فیلترها پیش از ساخت دسته روی مقدار خام سلول‌ها اعمال می‌شوند،
+بنابراین حافظه مصرفی به اندازه یک دسته (و نه کل کاربرگ) است.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+openpyxl = lazy_import('openpyxl')
+
+BATCH_SIZE = 10_000
+
+# نوع قابل‌تهی ستون‌هایی که در دسته اول بدون مقدار خالی استنتاج شده‌اند
+_NULLABLE = {'int64': 'Int64', 'bool': 'boolean'}
+
+# نحوه ترکیب نتایج جزئی هر دسته در تجمیع افزایشی
+_COMBINE = {'sum': 'sum', 'count': 'sum', 'size': 'sum', 'min': 'min', 'max': 'max'}
+
+# ==============================================================================
+# Helper Functions
+# ==============================================================================
+
+def _open_sheet(path, sheet):
+    """باز کردن کاربرگ در حالت read-only (مقادیر ذخیره‌شده فرمول‌ها، نه خود فرمول)"""
+    workbook = openpyxl.load_workbook(Path(path), read_only=True, data_only=True)
+    worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+    return workbook, worksheet
+
+
+def _typed_array(name, values, dtype):
+    try:
+        return pd.array(values, dtype=dtype)
+    except (TypeError, ValueError) as e:
+        raise TypeError(f"Column {name!r} does not fit dtype {dtype} of the first batch; "
+                        f"pass its type in dtypes") from e
+
+
+def _typed_frame(names, buffers, dtypes):
+    """ساخت DataFrame دسته؛ ستون‌های بدون نوع مشخص مانند read_excel استنتاج می‌شوند"""
+    return pd.DataFrame({
+        name: _typed_array(name, values, dtypes[name]) if name in dtypes else pd.Series(values)
+        for name, values in zip(names, buffers)
+    })
+
+
+def _fixed_dtypes(frame, dtypes):
+    """
+    نوع همه ستون‌ها برای دسته‌های بعدی: dtypes داده‌شده و برای بقیه نوع استنتاج‌شده
+    در دسته اول (اعداد صحیح و بولی قابل‌تهی، چون دسته‌های بعد ممکن است خالی داشته باشند)
+    """
+    fixed = dict(dtypes)
+    for name in frame.columns:
+        if name not in fixed:
+            fixed[name] = _NULLABLE.get(frame[name].dtype.name, frame[name].dtype)
+    return fixed
+
+
+def _batch(names, buffers, dtypes):
+    """DataFrame دسته به همراه نوع ستون‌ها برای دسته‌های بعدی (پس از دسته اول همه ثابت‌اند)"""
+    frame = _typed_frame(names, buffers, dtypes)
+    if len(dtypes) < len(names):
+        dtypes = _fixed_dtypes(frame, dtypes)
+        frame = frame.astype(dtypes)
+    return frame, dtypes
+
+# ==============================================================================
+# Streaming
+# ==============================================================================
+
+def sheet_header(path, sheet=None):
+    """نام ستون‌های کاربرگ (سطر اول)"""
+    workbook, worksheet = _open_sheet(path, sheet)
+    try:
+        return list(next(worksheet.iter_rows(max_row=1, values_only=True)))
+    finally:
+        workbook.close()
+
+
+def iter_sheet_batches(path, sheet=None, columns=None, where=None, converters=None,
+                       dtypes=None, batch_size=BATCH_SIZE):
+    """
+    خواندن جریانی یک کاربرگ؛ برای هر batch_size سطر یک DataFrame برمی‌گرداند
+
+    columns: فقط این ستون‌ها ساخته می‌شوند (و فقط بازه ستون‌های لازم تجزیه می‌شود).
+    where: دیکشنری ستون -> تابع شرط روی مقدار سلول؛ سطرهایی که یکی از شرط‌ها را
+    رد کنند پیش از ورود به دسته کنار گذاشته می‌شوند. ستون‌های شرط لازم نیست در
+    columns باشند.
+    converters: دیکشنری ستون -> تابع تبدیل مقدار (مانند read_excel) که پس از فیلتر
+    و پیش از ساخت آرایه اجرا می‌شود. dtypes: نوع pandas هر ستون خروجی؛ نوع
+    ستون‌های دیگر از دسته اول استنتاج و برای همه دسته‌ها ثابت می‌شود (مقداری که
+    در آن نوع نگنجد TypeError می‌دهد) تا الحاق دسته‌ها نوع ستونی را تغییر ندهد.
+    سطرهای کاملاً خالی (مانند سطرهای انتهای فایل) نادیده گرفته می‌شوند.
+    """
+    where = where or {}
+    converters = converters or {}
+    dtypes = dtypes or {}
+
+    workbook, worksheet = _open_sheet(path, sheet)
+    try:
+        rows = worksheet.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        names = header if columns is None else list(columns)
+        missing = [name for name in [*names, *where] if name not in header]
+        if missing:
+            raise KeyError(f"{worksheet.title}: unknown columns {missing}")
+
+        # فقط بازه ستون‌هایی که خوانده یا فیلتر می‌شوند تجزیه می‌شود
+        positions = [header.index(name) for name in [*names, *where]]
+        first, last = min(positions), max(positions)
+        rows = worksheet.iter_rows(min_row=2, min_col=first + 1, max_col=last + 1,
+                                   values_only=True)
+        picks = [header.index(name) - first for name in names]
+        checks = [(header.index(name) - first, test) for name, test in where.items()]
+        convert = [converters.get(name) for name in names]
+
+        buffers = [[] for _ in names]
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            if not all(test(row[pos]) for pos, test in checks):
+                continue
+            for buffer, pos, func in zip(buffers, picks, convert):
+                value = row[pos]
+                buffer.append(func(value) if func is not None and value is not None else value)
+
+            if len(buffers[0]) >= batch_size:
+                frame, dtypes = _batch(names, buffers, dtypes)
+                yield frame
+                buffers = [[] for _ in names]
+
+        if buffers and buffers[0]:
+            yield _batch(names, buffers, dtypes)[0]
+    finally:
+        workbook.close()
+
+
+def read_sheet(path, sheet=None, columns=None, where=None, converters=None, dtypes=None):
+    """خواندن کامل کاربرگ از طریق iter_sheet_batches"""
+    batches = list(iter_sheet_batches(path, sheet, columns, where, converters, dtypes))
+    if not batches:
+        return _typed_frame(columns or [], [[] for _ in columns or []], dtypes or {})
+    return pd.concat(batches, ignore_index=True)
+
+# ==============================================================================
+# Incremental Aggregation
+# ==============================================================================
+
+def fold_batches(batches, by, measures):
+    """
+    تجمیع افزایشی دسته‌ها
+
+    measures دیکشنری نام خروجی -> (ستون، تابع) با توابع sum، count، size، min یا max
+    است. هر دسته جداگانه گروه‌بندی و با نتیجه جمع‌شده قبلی ترکیب می‌شود، پس فقط
+    یک دسته و جدول گروه‌ها در حافظه می‌مانند.
+    """
+    unsupported = [func for _, func in measures.values() if func not in _COMBINE]
+    if unsupported:
+        raise ValueError(f"Non-additive aggregations are not supported: {unsupported}")
+    combine = {name: _COMBINE[func] for name, (_, func) in measures.items()}
+
+    by = list(by)
+    total = None
+    for batch in batches:
+        partial = batch.groupby(by, dropna=False, sort=False).agg(**measures)
+        if total is not None:
+            partial = pd.concat([total, partial]).groupby(
+                level=list(range(len(by))), dropna=False, sort=False).agg(combine)
+        total = partial
+
+    if total is None:
+        return pd.DataFrame(columns=[*by, *measures])
+    return total.sort_index().reset_index()